@@ -1,11 +1,19 @@
 from pydantic_settings import BaseSettings
 from typing import Optional
+from pathlib import Path
 
 class Settings(BaseSettings):
     # Server
     HOST: str = "0.0.0.0"
     PORT: int = 8000
     
+    # Worker processes; >1 moves predictions, cache versions, alerts and
+    # live events into shared SQLite state under STATE_DIR
+    WORKERS: int = 1
+    # With WORKERS > 1, how often each worker flushes its metrics snapshot
+    # for the merged /metrics exposition
+    METRICS_FLUSH_SECONDS: float = 5.0
+    
     # CORS
     FRONTEND_URL: str = "http://localhost:5173"
     
@@ -24,6 +32,57 @@ class Settings(BaseSettings):
     ENABLE_ARCGIS: bool = True
     USE_MOCK_DATA: bool = False
     
+    # Pipeline outputs and local service state (queues, indexes)
+    RUNS_DIR: str = str(Path(__file__).resolve().parents[2] / "data_store" / "runs")
+    STATE_DIR: str = str(Path(__file__).resolve().parents[2] / "data_store" / "state")
+    
+    # Response cache (versioned, invalidated on ingest / new pipeline run)
+    RESPONSE_CACHE_MAX_ENTRIES: int = 512
+    RESPONSE_CACHE_TTL_SECONDS: float = 300.0
+    RESPONSE_CACHE_MIN_COMPRESS_BYTES: int = 1024
+    RESPONSE_CACHE_BROTLI_QUALITY: int = 5
+    
+    # Alert notification dispatch
+    ALERT_RECIPIENTS_FILE: Optional[str] = None
+    ALERT_WEBHOOK_URL: Optional[str] = None
+    ALERT_SMTP_HOST: Optional[str] = None
+    ALERT_SMTP_PORT: int = 25
+    ALERT_SMTP_SENDER: str = "alerts@flowz.local"
+    ALERT_WORKERS: int = 2
+    ALERT_MAX_CONCURRENT_SENDS: int = 8
+    ALERT_BATCH_SIZE: int = 500
+    ALERT_MAX_ATTEMPTS: int = 5
+    
+    # Lease on a claimed alert/pipeline job: its owner renews it every third
+    # of this while alive, and any worker re-queues jobs whose lease expired
+    JOB_LEASE_SECONDS: float = 60.0
+    
+    # Pipeline runs: worker processes kept warm, i.e. the maximum number of
+    # runs executing at once (across all API workers)
+    PIPELINE_MAX_CONCURRENT: int = 2
+    
+    # Run progress streams: events.jsonl poll interval, and how long a stream
+    # for a run with no queued/running job waits for a new event
+    RUN_EVENTS_POLL_SECONDS: float = 0.5
+    RUN_EVENTS_IDLE_TIMEOUT_SECONDS: float = 900.0
+    
+    # Hydrograph time series: default point budget for LTTB downsampling
+    TIMESERIES_DEFAULT_POINTS: int = 500
+    
+    # Spatial index for bbox/point queries: "memory" (R-tree) or "postgis"
+    SPATIAL_INDEX_BACKEND: str = "memory"
+    
+    # Encode trusted internal data once with pydantic-core instead of
+    # revalidating it against response models on every response
+    FAST_RESPONSES: bool = False
+    
+    # Server-Sent Events
+    SSE_QUEUE_SIZE: int = 100
+    SSE_HEARTBEAT_SECONDS: float = 15.0
+    # Events kept for clients reconnecting with Last-Event-ID
+    SSE_REPLAY_EVENTS: int = 500
+    SSE_RELAY_INTERVAL_SECONDS: float = 0.25
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
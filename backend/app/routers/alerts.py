@@ -1,18 +1,52 @@
-from fastapi import APIRouter, HTTPException
-from app.schemas.models import AlertsResponse
-from app.services.mock_data import mock_service
+import asyncio
+
+from fastapi import APIRouter, HTTPException, Query, Request
+from app.schemas.models import AlertChangesResponse, AlertsResponse
+from app.services.alert_dispatch import alert_dispatcher
+from app.services.alert_engine import alert_engine
+from app.services.response_cache import response_cache
 
 router = APIRouter()
 
 @router.get("/alerts/generate", response_model=AlertsResponse)
-async def get_alerts():
+async def get_alerts(request: Request):
     """
     Get human-readable flood alerts for UI display.
     
-    Generated from high-severity predictions with action recommendations.
+    Served from the stored alert set, which is only re-evaluated when
+    predictions change (ingest, new pipeline run, new forecast cycle).
+    IDs are stable across evaluations; `version` increases on every change.
+    """
+    try:
+        # Marker checks read run dirs / shared state; keep them off the event loop
+        await asyncio.to_thread(alert_engine.sync)
+        return response_cache.respond(request, alert_engine.current, tag=f"alerts:{alert_engine.version}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/alerts/changes", response_model=AlertChangesResponse)
+async def get_alert_changes(request: Request, since: int = Query(..., ge=0)):
+    """
+    Get alerts added or updated, and IDs removed, after version `since`.
+    
+    When `reset` is true the client's version is too old (or from a previous
+    server run) and `alerts` holds the full current set instead of a diff.
     """
     try:
-        data = mock_service.get_alerts()
-        return data
+        await asyncio.to_thread(alert_engine.sync)
+        return response_cache.respond(
+            request, lambda: alert_engine.changes_since(since), tag=f"alerts:{alert_engine.version}"
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/alerts/dispatch/status")
+async def get_alert_dispatch_status():
+    """
+    Get notification queue status.
+    
+    Returns alert job counts by state (pending, in_progress, sent, failed).
+    """
+    return {"jobs": await asyncio.to_thread(alert_dispatcher.queue.counts)}
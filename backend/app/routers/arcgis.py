@@ -2,11 +2,13 @@
 ArcGIS API Router
 Provides endpoints for ArcGIS-integrated simulation visualization
 """
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request
 from fastapi.responses import StreamingResponse
 import io
 from app.services.arcgis_service import arcgis_service
 from app.services.mock_data import mock_service
+from app.services.response_cache import response_cache
+from app.services.serialization import json_response
 
 router = APIRouter(prefix="/arcgis", tags=["arcgis"])
 
@@ -96,7 +98,7 @@ async def get_elevation_profile(
     try:
         elevation = await arcgis_service.get_elevation_at_point(lat, lon)
         
-        return {
+        return json_response({
             "center": {"lat": lat, "lon": lon},
             "elevation_m": elevation,
             "radius_degrees": radius,
@@ -111,7 +113,7 @@ async def get_elevation_profile(
                 {"offset": (0, radius), "elevation": elevation - 1},
                 {"offset": (radius, radius), "elevation": elevation + 5},
             ]
-        }
+        })
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -138,7 +140,7 @@ async def get_flood_extent(prediction_id: str):
         
         geojson = await arcgis_service.query_flood_extent(location, bounds)
         
-        return geojson
+        return json_response(geojson)
         
     except HTTPException:
         raise
@@ -149,6 +151,7 @@ async def get_flood_extent(prediction_id: str):
 @router.get("/export/{prediction_id}")
 async def export_simulation_as_geojson(
     prediction_id: str,
+    request: Request,
     format: str = Query("geojson", regex="^(geojson|shapefile|kmz)$")
 ):
     """
@@ -162,7 +165,8 @@ async def export_simulation_as_geojson(
         GeoJSON or download stream
     """
     try:
-        simulation = mock_service.get_simulation_frames(prediction_id)
+        snapshot = mock_service.snapshot()
+        simulation = snapshot.simulations.get(prediction_id)
         if not simulation:
             raise HTTPException(status_code=404, detail=f"Simulation not found: {prediction_id}")
         
@@ -171,13 +175,17 @@ async def export_simulation_as_geojson(
         bounds = simulation["bounds"]
         
         if format == "geojson":
-            geojson = await arcgis_service.export_to_geojson(
-                prediction_id=prediction_id,
-                frames=frames,
-                bounds=bounds,
-                location_name=location_name
+            # Built, serialized and compressed once per forecast cycle
+            return await response_cache.respond_async(
+                request,
+                lambda: arcgis_service.export_to_geojson(
+                    prediction_id=prediction_id,
+                    frames=frames,
+                    bounds=bounds,
+                    location_name=location_name
+                ),
+                tag=snapshot.cycle_id
             )
-            return geojson
         
         elif format == "shapefile":
             # In production, use fiona or similar to create shapefile
@@ -256,7 +264,7 @@ async def get_simulation_analytics(prediction_id: str):
         max_area = max(f["affectedArea"] for f in frames)
         peak_frame = next((f for f in frames if f.get("isPeak")), frames[-1])
         
-        return {
+        return json_response({
             "prediction_id": prediction_id,
             "location": simulation["location"],
             "statistics": {
@@ -276,7 +284,7 @@ async def get_simulation_analytics(prediction_id: str):
                 }
                 for f in frames
             ]
-        }
+        })
         
     except HTTPException:
         raise
@@ -317,14 +325,14 @@ async def compare_simulations(
                     "peak_time": peak_frame["timeOffset"]
                 })
         
-        return {
+        return json_response({
             "comparison": comparisons,
             "metrics": {
                 "highest_risk": max(comparisons, key=lambda x: x["peak_depth"]) if comparisons else None,
                 "largest_area": max(comparisons, key=lambda x: x["peak_area"]) if comparisons else None,
                 "earliest_peak": min(comparisons, key=lambda x: x["peak_time"]) if comparisons else None,
             }
-        }
+        })
         
     except HTTPException:
         raise
@@ -0,0 +1,75 @@
+"""
+Run Artifacts Router
+
+Serves files from pipeline runs (rasters, NetCDF, reports) with HTTP Range
+support so GIS clients can read individual COG blocks remotely.
+"""
+
+import asyncio
+from email.utils import formatdate
+from fastapi import APIRouter, HTTPException, Request, Response
+from app.services.artifact_store import (
+    ArtifactResponse, RangeNotSatisfiable, artifact_store, etag_for, is_fresh, parse_range, range_applies
+)
+from app.services.serialization import json_response
+
+router = APIRouter()
+
+
+@router.get("/artifacts/{run_id}")
+async def list_run_artifacts(run_id: str):
+    """
+    List the files of a pipeline run.
+    
+    Returns path, size, validators and download URL for each artifact.
+    """
+    try:
+        files = await asyncio.to_thread(artifact_store.list_run, run_id)
+        return json_response({"run_id": run_id, "total": len(files), "files": files})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail=f"Run not found: {run_id}")
+
+
+@router.api_route("/artifacts/{run_id}/{artifact_path:path}", methods=["GET", "HEAD"])
+async def get_run_artifact(run_id: str, artifact_path: str, request: Request):
+    """
+    Download a run artifact, e.g. `04_predictions/final_map.tif`.
+    
+    **Supports:**
+    - `Range: bytes=...` (single range -> 206, several -> multipart/byteranges)
+    - `If-Range`, `If-None-Match` and `If-Modified-Since`
+    - `HEAD` for size and validators without a body
+    """
+    try:
+        path = await asyncio.to_thread(artifact_store.resolve, run_id, artifact_path)
+        stat = await asyncio.to_thread(path.stat)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail=f"Artifact not found: {run_id}/{artifact_path}")
+    if not path.is_file():
+        raise HTTPException(status_code=404, detail=f"Artifact not found: {run_id}/{artifact_path}")
+
+    etag = etag_for(stat)
+    headers = {
+        "etag": etag,
+        "last-modified": formatdate(stat.st_mtime, usegmt=True),
+        "accept-ranges": "bytes",
+        "cache-control": "public, max-age=0, must-revalidate"
+    }
+
+    if is_fresh(request.headers, etag, stat.st_mtime):
+        return Response(status_code=304, headers=headers)
+
+    ranges = None
+    range_header = request.headers.get("range")
+    if range_header and range_applies(request.headers, etag, stat.st_mtime):
+        try:
+            ranges = parse_range(range_header, stat.st_size)
+        except RangeNotSatisfiable:
+            headers["content-range"] = f"bytes */{stat.st_size}"
+            return Response(status_code=416, headers=headers)
+
+    return ArtifactResponse(path, stat, ranges, headers, send_body=request.method == "GET")
@@ -1,18 +1,19 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from app.schemas.models import SeverityLevelsResponse
 from app.services.mock_data import mock_service
+from app.services.response_cache import response_cache
 
 router = APIRouter()
 
 @router.get("/config/severity-levels", response_model=SeverityLevelsResponse)
-async def get_severity_levels():
+async def get_severity_levels(request: Request):
     """
     Get severity level configuration for color coding and risk thresholds.
     
     Defines LOW, MODERATE, HIGH, CRITICAL severity levels with colors and opacity.
     """
     try:
-        data = mock_service.get_severity_levels()
-        return data
+        snapshot = mock_service.snapshot()
+        return response_cache.respond(request, lambda: snapshot.severity_levels_json, tag=snapshot.cycle_id)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -4,20 +4,24 @@ Deep Learning Predictions Router
 Handles ingestion of U-Net + ConvLSTM predictions and serves them to frontend.
 """
 
-from fastapi import APIRouter, HTTPException, BackgroundTasks
-from typing import Optional
+import asyncio
+import time
+from datetime import datetime
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from typing import List, Optional
 from app.schemas.dl_models import DLPredictionIngest, DLPredictionResponse
+from app.services.alert_dispatch import alert_dispatcher
+from app.services.alert_engine import alert_engine, candidate_from_dl
+from app.services.event_hub import event_hub
+from app.services.metrics import dl_ingest, dl_ingest_duration
+from app.services.prediction_store import prediction_store, resolve_fields, VIEWS
+from app.services.response_cache import response_cache
+from app.services.spatial_index import spatial_index
 
 router = APIRouter()
 
-# In-memory storage for demo (replace with database in production)
-dl_predictions_store = {}
-
 @router.post("/predictions/ingest", response_model=DLPredictionResponse)
-async def ingest_dl_prediction(
-    prediction: DLPredictionIngest,
-    background_tasks: BackgroundTasks
-):
+async def ingest_dl_prediction(prediction: DLPredictionIngest):
     """
     Ingest prediction from U-Net + ConvLSTM model pipeline.
     
@@ -27,13 +31,20 @@ async def ingest_dl_prediction(
     **Process:**
     1. Validate prediction data
     2. Store in database (currently in-memory for demo)
-    3. If HIGH/CRITICAL, trigger alert notifications
-    4. Return confirmation
+    3. Re-evaluate the basin's alerts
+    4. If HIGH/CRITICAL, queue alert notifications for the dispatch workers
+    5. Return confirmation
     """
+    started = time.perf_counter()
     try:
+        # Severity of the basin's previous latest prediction, for change events
+        previous = _latest_for_basin(prediction.location.basin, VIEWS["summary"])
+        
         # Store prediction (in production, use database)
-        dl_predictions_store[prediction.prediction_id] = prediction.dict()
-        stored_id = len(dl_predictions_store)
+        document = prediction.model_dump(mode="json")
+        stored_id = prediction_store.put(document, trusted=True)
+        await _run_index(spatial_index.add, document)
+        response_cache.bump_version()
         
         # Log ingestion
         print(f"✅ Ingested prediction: {prediction.prediction_id}")
@@ -43,15 +54,31 @@ async def ingest_dl_prediction(
         print(f"   Peak Depth: {prediction.aggregated_metrics.peak_depth_max}m")
         print(f"   Timesteps: {prediction.grid_shape.timesteps}")
         
-        # If high-risk, trigger alert (async background task)
+        # Re-evaluate alert rules for the basin's (possibly unchanged) latest prediction
+        latest = _latest_for_basin(prediction.location.basin, VIEWS["summary"])
+        await asyncio.to_thread(
+            alert_engine.evaluate, f"dl:{prediction.location.basin.lower()}", [candidate_from_dl(_summarize(latest))]
+        )
+        
+        # If high-risk, queue alert (delivered by the alert dispatch workers)
         if prediction.risk_assessment.severity_class in ["HIGH", "CRITICAL"]:
-            background_tasks.add_task(
-                send_alert_notification,
+            await alert_dispatcher.enqueue(
                 prediction_id=prediction.prediction_id,
                 severity=prediction.risk_assessment.severity_class,
-                location=prediction.location.region
+                region=prediction.location.region,
+                forecast_cycle=prediction.forecast_cycle,
+                risk_score=prediction.risk_assessment.risk_score
             )
         
+        # Push to live subscribers instead of waiting for the next poll
+        publish_prediction_events(
+            prediction_store.get(prediction.prediction_id, VIEWS["summary"]),
+            previous
+        )
+        
+        dl_ingest.inc(prediction.risk_assessment.severity_class)
+        dl_ingest_duration.observe(time.perf_counter() - started)
+        
         return DLPredictionResponse(
             status="success",
             prediction_id=prediction.prediction_id,
@@ -64,43 +91,122 @@ async def ingest_dl_prediction(
 
 
 @router.get("/predictions/dl/latest/{basin}")
-async def get_latest_dl_prediction(basin: str):
+async def get_latest_dl_prediction(
+    basin: str,
+    request: Request,
+    view: Optional[str] = Query(None, description="Named projection: summary, map or full"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields, e.g. prediction_id,location.region")
+):
     """
     Get latest deep learning prediction for a specific basin.
     
-    Returns full prediction metadata including raster URLs.
+    Returns full prediction metadata including raster URLs, or only the
+    requested `view` / `fields`.
     """
-    # Find most recent prediction for basin
-    matching = [
-        p for p in dl_predictions_store.values()
-        if p['location']['basin'].lower() == basin.lower()
-    ]
+    projection = _resolve_projection(view, fields)
+    prediction_id = prediction_store.latest_id_for_basin(basin)
     
-    if not matching:
+    if not prediction_id:
         raise HTTPException(status_code=404, detail=f"No predictions found for basin: {basin}")
     
-    # Sort by inference timestamp and get latest
-    latest = sorted(matching, key=lambda x: x['inference_timestamp'], reverse=True)[0]
+    return response_cache.respond(request, lambda: prediction_store.get_json(prediction_id, projection))
+
+
+@router.get("/predictions/dl/summary")
+async def get_all_dl_predictions_summary(request: Request):
+    """
+    Get summary of all deep learning predictions.
+    
+    Returns lightweight metadata for dashboard overview.
+    """
+    def build():
+        summaries = []
+        
+        for prediction_id in prediction_store.ids():
+            summaries.append(_summarize(prediction_store.get(prediction_id, VIEWS["summary"])))
+        
+        # Sort by risk score descending
+        summaries.sort(key=lambda x: x['risk_score'], reverse=True)
+        
+        return {
+            "total_predictions": len(summaries),
+            "predictions": summaries
+        }
+    
+    return response_cache.respond(request, build)
+
+
+@router.get("/predictions/dl/spatial/bbox")
+async def query_dl_predictions_bbox(
+    west: float = Query(..., ge=-180, le=180),
+    south: float = Query(..., ge=-90, le=90),
+    east: float = Query(..., ge=-180, le=180),
+    north: float = Query(..., ge=-90, le=90),
+    since: Optional[datetime] = Query(None, description="Only predictions inferred at or after this time"),
+    until: Optional[datetime] = Query(None, description="Only predictions inferred at or before this time"),
+    view: Optional[str] = Query("summary", description="Named projection: summary, map or full"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields"),
+    limit: int = Query(500, ge=1, le=5000)
+):
+    """
+    Get predictions whose extent intersects a viewport.
+    
+    Used by the globe to load only what is on screen. Results are newest
+    first and use the `summary` view unless `view` / `fields` say otherwise.
+    """
+    if west > east or south > north:
+        raise HTTPException(status_code=400, detail="Bounding box must satisfy west <= east and south <= north")
     
-    return latest
+    projection = _resolve_projection(view, fields)
+    ids = await _query_index((west, south, east, north), since, until)
+    return _spatial_response(ids[:limit], len(ids), projection)
+
+
+@router.get("/predictions/dl/spatial/point")
+async def query_dl_predictions_point(
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    since: Optional[datetime] = Query(None, description="Only predictions inferred at or after this time"),
+    until: Optional[datetime] = Query(None, description="Only predictions inferred at or before this time"),
+    view: Optional[str] = Query("summary", description="Named projection: summary, map or full"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields"),
+    limit: int = Query(100, ge=1, le=5000)
+):
+    """
+    Get predictions whose extent covers a point.
+    
+    Results are newest first and use the `summary` view by default.
+    """
+    projection = _resolve_projection(view, fields)
+    ids = await _query_index((lon, lat, lon, lat), since, until)
+    return _spatial_response(ids[:limit], len(ids), projection)
 
 
 @router.get("/predictions/dl/{prediction_id}")
-async def get_dl_prediction_by_id(prediction_id: str):
+async def get_dl_prediction_by_id(
+    prediction_id: str,
+    request: Request,
+    view: Optional[str] = Query(None, description="Named projection: summary, map or full"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields, e.g. prediction_id,location.region")
+):
     """
     Get specific deep learning prediction by ID.
     
-    Returns complete prediction data including all raster URLs.
+    Returns complete prediction data including all raster URLs, or only the
+    requested `view` / `fields`.
     """
-    if prediction_id not in dl_predictions_store:
+    projection = _resolve_projection(view, fields)
+    
+    if prediction_id not in prediction_store:
         raise HTTPException(status_code=404, detail=f"Prediction not found: {prediction_id}")
     
-    return dl_predictions_store[prediction_id]
+    return response_cache.respond(request, lambda: prediction_store.get_json(prediction_id, projection))
 
 
 @router.get("/predictions/dl/timeseries/{prediction_id}")
 async def get_dl_timeseries_urls(
     prediction_id: str,
+    request: Request,
     variables: str = "depth,velocity"
 ):
     """
@@ -115,65 +221,112 @@ async def get_dl_timeseries_urls(
     - Individual timestep GeoTIFF URLs
     - Preview PNG URLs for frontend
     """
-    if prediction_id not in dl_predictions_store:
+    if prediction_id not in prediction_store:
         raise HTTPException(status_code=404, detail=f"Prediction not found: {prediction_id}")
     
-    prediction = dl_predictions_store[prediction_id]
-    requested_vars = [v.strip() for v in variables.split(',')]
+    def build():
+        prediction = prediction_store.get(prediction_id, ["raster_data", "grid_shape", "location.bounds"])
+        requested_vars = [v.strip() for v in variables.split(',')]
+        
+        return {
+            "prediction_id": prediction_id,
+            "netcdf_crf_url": prediction['raster_data']['netcdf_crf_url'],
+            "arcgis_service_url": prediction['raster_data']['arcgis_service_url'],
+            "timesteps": prediction['raster_data']['geotiff_urls'],
+            "previews": prediction['raster_data']['preview_urls'],
+            "requested_variables": requested_vars,
+            "grid_shape": prediction['grid_shape'],
+            "bounds": prediction['location']['bounds']
+        }
     
-    return {
-        "prediction_id": prediction_id,
-        "netcdf_crf_url": prediction['raster_data']['netcdf_crf_url'],
-        "arcgis_service_url": prediction['raster_data']['arcgis_service_url'],
-        "timesteps": prediction['raster_data']['geotiff_urls'],
-        "previews": prediction['raster_data']['preview_urls'],
-        "requested_variables": requested_vars,
-        "grid_shape": prediction['grid_shape'],
-        "bounds": prediction['location']['bounds']
-    }
+    return response_cache.respond(request, build)
 
 
-@router.get("/predictions/dl/summary")
-async def get_all_dl_predictions_summary():
-    """
-    Get summary of all deep learning predictions.
-    
-    Returns lightweight metadata for dashboard overview.
-    """
-    summaries = []
-    
-    for pred_id, pred in dl_predictions_store.items():
-        summaries.append({
-            "prediction_id": pred_id,
-            "region": pred['location']['region'],
-            "basin": pred['location']['basin'],
-            "severity": pred['risk_assessment']['severity_class'],
-            "risk_score": pred['risk_assessment']['risk_score'],
-            "peak_depth": pred['aggregated_metrics']['peak_depth_max'],
-            "affected_area_km2": pred['aggregated_metrics']['affected_area_km2'],
-            "inference_timestamp": pred['inference_timestamp'],
-            "forecast_cycle": pred['forecast_cycle']
-        })
-    
-    # Sort by risk score descending
-    summaries.sort(key=lambda x: x['risk_score'], reverse=True)
-    
+# Helpers
+def _resolve_projection(view: Optional[str], fields: Optional[str]) -> Optional[List[str]]:
+    """Validate ?view= / ?fields= and return the field list (None = full)"""
+    try:
+        return resolve_fields(view, fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+async def _run_index(method, *args):
+    """Call a spatial index method, off the event loop if it does I/O"""
+    if spatial_index.blocking:
+        return await asyncio.to_thread(method, *args)
+    return method(*args)
+
+
+async def _query_index(bbox, since: Optional[datetime], until: Optional[datetime]) -> List[str]:
+    """Spatial query, first indexing predictions ingested by other workers"""
+    if prediction_store.shared:
+        await asyncio.to_thread(spatial_index.catch_up, prediction_store)
+    return await _run_index(spatial_index.query_bbox, bbox, since, until)
+
+
+def _spatial_response(ids: List[str], total: int, projection: Optional[List[str]]) -> Response:
+    """Splice stored (projected) predictions into a single JSON body"""
+    documents = [prediction_store.get_json(pid, projection) for pid in ids]
+    documents = [doc for doc in documents if doc is not None]
+    body = (
+        b'{"total":' + str(total).encode() +
+        b',"returned":' + str(len(documents)).encode() +
+        b',"predictions":[' + b",".join(documents) + b"]}"
+    )
+    return Response(content=body, media_type="application/json")
+
+
+def _latest_for_basin(basin: str, fields: Optional[List[str]] = None) -> Optional[dict]:
+    """Most recent stored prediction for a basin, or None"""
+    prediction_id = prediction_store.latest_id_for_basin(basin)
+    if not prediction_id:
+        return None
+    return prediction_store.get(prediction_id, fields)
+
+
+def _summarize(pred: dict) -> dict:
+    """Lightweight dashboard view of a stored prediction (summary projection)"""
     return {
-        "total_predictions": len(summaries),
-        "predictions": summaries
+        "prediction_id": pred['prediction_id'],
+        "region": pred['location']['region'],
+        "basin": pred['location']['basin'],
+        "severity": pred['risk_assessment']['severity_class'],
+        "risk_score": pred['risk_assessment']['risk_score'],
+        "peak_depth": pred['aggregated_metrics']['peak_depth_max'],
+        "affected_area_km2": pred['aggregated_metrics']['affected_area_km2'],
+        "inference_timestamp": pred['inference_timestamp'],
+        "forecast_cycle": pred['forecast_cycle']
     }
 
 
-# Background task functions
-async def send_alert_notification(prediction_id: str, severity: str, location: str):
+def publish_prediction_events(pred: dict, previous: Optional[dict] = None):
     """
-    Send alert notification for high-risk predictions.
+    Broadcast ingest results to SSE subscribers.
     
-    In production, this would:
-    - Send email/SMS alerts
-    - Post to emergency management systems
-    - Trigger automated warnings
+    Emits a prediction event, a severity_change event when the basin's
+    severity class differs from its previous latest prediction, and an
+    alert event for HIGH/CRITICAL predictions.
     """
-    print(f"🚨 ALERT: {severity} flood risk in {location}")
-    print(f"   Prediction ID: {prediction_id}")
-    # TODO: Implement actual notification system
+    summary = _summarize(pred)
+    event_hub.publish("prediction", summary)
+    
+    previous_severity = previous['risk_assessment']['severity_class'] if previous else None
+    if previous_severity != summary["severity"]:
+        event_hub.publish("severity_change", {
+            "basin": summary["basin"],
+            "region": summary["region"],
+            "prediction_id": summary["prediction_id"],
+            "previous_severity": previous_severity,
+            "severity": summary["severity"]
+        })
+    
+    if summary["severity"] in ["HIGH", "CRITICAL"]:
+        event_hub.publish("alert", {
+            "prediction_id": summary["prediction_id"],
+            "region": summary["region"],
+            "basin": summary["basin"],
+            "severity": summary["severity"],
+            "risk_score": summary["risk_score"],
+            "issued_at": summary["inference_timestamp"]
+        })
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from typing import List, Optional
+from app.services.serialization import json_response
 
 router = APIRouter()
 
@@ -82,13 +83,13 @@ async def get_evacuation_plan(location: Optional[dict] = None):
         shelters = SHELTERS_MAP.get(location_id, SHELTERS_MAP["pred_ganges_kolkata_001"])
         nearest_shelter = shelters[0]
         
-        return {
+        return json_response({
             "location_id": location_id,
             "location_name": "West Bengal District",
             "nearest_shelter": nearest_shelter,
             "alternative_routes": EVACUATION_ROUTES,
             "recommended_actions": RECOMMENDED_ACTIONS
-        }
+        }, EvacuationPlan)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -101,7 +102,7 @@ async def get_shelters(location_id: str):
     """
     try:
         shelters = SHELTERS_MAP.get(location_id, SHELTERS_MAP["pred_ganges_kolkata_001"])
-        return shelters
+        return json_response(shelters, List[Shelter])
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -111,6 +112,6 @@ async def get_evacuation_routes(location_id: str):
     Get recommended evacuation routes for a location.
     """
     try:
-        return EVACUATION_ROUTES
+        return json_response(EVACUATION_ROUTES, List[EvacuationRoute])
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
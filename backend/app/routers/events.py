@@ -0,0 +1,90 @@
+"""
+Event Stream Router
+
+Pushes newly ingested predictions, severity changes and alerts to the
+frontend over Server-Sent Events, replacing summary/alert polling.
+"""
+
+import asyncio
+from typing import Optional
+from fastapi import APIRouter, Header, Request
+from fastapi.responses import StreamingResponse
+from app.config import settings
+from app.services.event_hub import event_hub
+
+router = APIRouter()
+
+
+@router.get("/events/stream")
+async def stream_events(request: Request, last_event_id: Optional[str] = Header(None)):
+    """
+    Subscribe to live prediction and alert events.
+
+    **Event types:**
+    - prediction: a new DL prediction was ingested
+    - severity_change: a basin's severity class changed
+    - alert: a HIGH/CRITICAL alert was raised
+    - evicted: the client fell too far behind and must reconnect
+    - reset: events since Last-Event-ID are no longer available; reload state
+
+    On reconnect (Last-Event-ID) the events missed since then are replayed
+    first. A comment heartbeat is sent when idle so proxies keep the
+    connection open.
+    """
+    try:
+        after = int(last_event_id) if last_event_id else None
+    except ValueError:
+        after = None
+    # Subscribe before reading the replay, so nothing falls in between
+    subscriber = event_hub.subscribe()
+
+    async def event_generator():
+        try:
+            yield "retry: 5000\n\n"
+            replayed = 0
+            if after is not None:
+                missed = await event_hub.replay(after)
+                if missed is None:
+                    yield event_hub.format_event("reset", {"last_event_id": after})
+                else:
+                    for event_id, frame in missed:
+                        replayed = event_id
+                        yield frame
+            while True:
+                if await request.is_disconnected():
+                    break
+                try:
+                    event_id, frame = await asyncio.wait_for(
+                        subscriber.queue.get(),
+                        timeout=settings.SSE_HEARTBEAT_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    yield ": heartbeat\n\n"
+                    continue
+
+                if event_id is not None and event_id <= replayed:
+                    continue  # already sent by the replay
+                yield frame
+                if subscriber.evicted and subscriber.queue.empty():
+                    break
+        finally:
+            event_hub.unsubscribe(subscriber)
+
+    return StreamingResponse(
+        event_generator(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+
+@router.get("/events/stats")
+async def get_event_stats():
+    """Get broadcast hub statistics (connected clients, evictions)."""
+    return {
+        "subscribers": event_hub.subscriber_count,
+        "published": event_hub.published_count,
+        "evicted": event_hub.evicted_count
+    }
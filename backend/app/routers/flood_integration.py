@@ -3,23 +3,34 @@ Backend Integration with Pipeline
 Connects the flood prediction pipeline with FastAPI backend
 """
 
-from fastapi import APIRouter, HTTPException, BackgroundTasks
+from fastapi import APIRouter, Header, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from typing import List, Optional
 from pydantic import BaseModel
+import asyncio
 import sys
+import time
 from pathlib import Path
-import subprocess
+
+from app.config import settings
+from app.services.alert_engine import alert_engine, candidate_from_run
+from app.services.artifact_store import artifact_store
+from app.services.event_hub import event_hub
+from app.services.pipeline_jobs import ACTIVE_STATUSES, pipeline_jobs
+from app.services.run_progress import START_EVENT, TERMINAL_EVENT, RunEventReader, summary_event
+from app.services.serialization import json_response
 
 # Import the data bridge from pipeline
 pipeline_path = Path(__file__).parent.parent.parent.parent / "pipeline"
 sys.path.insert(0, str(pipeline_path))
 
 try:
-    from data_bridge import DataBridge
+    from data_bridge import DataBridge, run_data_cache
     from config import Config
 except ImportError:
     # Fallback if pipeline not available
     DataBridge = None
+    run_data_cache = None
     Config = None
 
 router = APIRouter(prefix="/api/flood", tags=["flood"])
@@ -51,60 +62,200 @@ class PredictionData(BaseModel):
 
 @router.post("/pipeline/run")
 async def trigger_pipeline_run(
-    background_tasks: BackgroundTasks,
-    suffix: str = "TRIGGERED"
+    suffix: str = "TRIGGERED",
+    use_cache: Optional[bool] = Query(None, description="Reuse cached stage outputs (default: pipeline setting)")
 ):
-    """Trigger a new pipeline execution"""
+    """
+    Queue a pipeline run for the warm worker pool.
+    
+    A request identical to a job that is still queued or running returns
+    that job (deduplicated=true) instead of starting another run.
+    """
     if not Config:
         raise HTTPException(status_code=503, detail="Pipeline not available")
     
     try:
-        run_id = Config.get_run_id(suffix)
-        background_tasks.add_task(run_pipeline_subprocess, run_id=run_id)
+        options = {} if use_cache is None else {"use_cache": use_cache}
+        job, created = await pipeline_jobs.submit(Config.get_run_id(suffix), suffix, options)
         
         return {
-            "message": "Pipeline triggered successfully",
-            "run_id": run_id,
-            "status": "queued"
+            "message": "Pipeline triggered successfully" if created else "Identical pipeline run already pending",
+            "job_id": job["id"],
+            "run_id": job["run_id"],
+            "status": job["status"],
+            "deduplicated": not created
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/pipeline/jobs")
+async def list_pipeline_jobs(
+    status: Optional[str] = Query(None, description="queued, running, completed or failed"),
+    limit: int = Query(50, ge=1, le=500)
+):
+    """Recent pipeline jobs (newest first) and queue counts"""
+    try:
+        jobs, counts = await asyncio.gather(
+            asyncio.to_thread(pipeline_jobs.queue.list_jobs, status, limit),
+            asyncio.to_thread(pipeline_jobs.queue.counts)
+        )
+        return json_response({
+            "jobs": jobs,
+            "counts": counts,
+            "max_concurrent": pipeline_jobs.max_concurrent
+        })
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/pipeline/jobs/{job_id}")
+async def get_pipeline_job(job_id: int):
+    """Status of one pipeline job (queue_position while queued)"""
+    job = await asyncio.to_thread(pipeline_jobs.queue.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Pipeline job {job_id} not found")
+    return json_response(job)
+
 # ============================================================================
 # Pipeline Results
 # ============================================================================
 
 @router.get("/predictions/latest")
 async def get_latest_predictions():
-    """Get predictions from the most recent pipeline run"""
+    """
+    Get predictions from the most recent pipeline run.
+    
+    The run document is served from DataBridge's in-memory cache while its
+    files are unchanged; the catalog lookup and file stats run in a worker
+    thread so they never block the event loop.
+    """
     if not DataBridge:
         raise HTTPException(status_code=503, detail="Pipeline not available")
     
     try:
-        latest_data = DataBridge.get_latest_run_data()
+        latest_data = await asyncio.to_thread(DataBridge.get_latest_run_data, with_predictions=True)
         predictions = latest_data.get("predictions", {}).get("risk_summary")
         
         if not predictions:
             raise HTTPException(status_code=404, detail="No predictions found")
         
-        return predictions
+        return json_response(predictions)
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/runs/list")
-async def list_all_runs():
-    """List all available pipeline runs"""
+async def list_all_runs(
+    status: Optional[str] = Query(None, description="completed, failed or in_progress"),
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0)
+):
+    """
+    List pipeline runs, newest first, from the run catalog.
+    
+    The total number of matching runs is returned in X-Total-Count.
+    """
     if not DataBridge:
         raise HTTPException(status_code=503, detail="Pipeline not available")
     
     try:
-        runs = DataBridge.list_all_runs()
-        return runs
+        runs = await asyncio.to_thread(DataBridge.list_all_runs, status=status, limit=limit, offset=offset)
+        total = await asyncio.to_thread(DataBridge.count_runs, status)
+        return json_response(runs, headers={"X-Total-Count": str(total)})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/runs/{run_id}/events")
+async def stream_run_events(
+    run_id: str,
+    request: Request,
+    last_event_id: Optional[str] = Header(None)
+):
+    """
+    Live progress of one run over Server-Sent Events.
+    
+    **Event types:**
+    - queued: the run's job is waiting for a worker (with queue_position)
+    - run_started: stage list and resource budget
+    - stage_started / stage_finished: per stage; finished events carry
+      status, duration_seconds, cache, bytes_written and process_peak_rss_mb
+    - run_finished: final status and total duration; the stream then ends
+    
+    Events already in the log are replayed first (after Last-Event-ID when
+    reconnecting), so a finished run yields its full timeline.
+    """
+    job = await asyncio.to_thread(pipeline_jobs.queue.get_by_run, run_id)
+    try:
+        run_dir = artifact_store.resolve(run_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except FileNotFoundError:
+        if job is None or job["status"] not in ACTIVE_STATUSES:
+            raise HTTPException(status_code=404, detail=f"Run {run_id} not found")
+        # Queued: the worker creates the run directory when it starts
+        run_dir = Path(settings.RUNS_DIR) / run_id
+    
+    try:
+        after = int(last_event_id) if last_event_id else 0
+    except ValueError:
+        after = 0
+    reader = RunEventReader(run_dir)
+    
+    def job_active() -> bool:
+        current = pipeline_jobs.queue.get_by_run(run_id)
+        return current is not None and current["status"] in ACTIVE_STATUSES
+    
+    async def event_generator():
+        yield "retry: 5000\n\n"
+        if job is not None and job["status"] == "queued":
+            yield event_hub.format_event("queued", {"run_id": run_id, "queue_position": job.get("queue_position")})
+        
+        last_activity = last_heartbeat = time.monotonic()
+        # --resume appends a new attempt to the same log: only a run_finished
+        # after the latest run_started ends the stream
+        finished = False
+        while not await request.is_disconnected():
+            events = await asyncio.to_thread(reader.read_new)
+            if not events and not reader.exists() and not await asyncio.to_thread(job_active):
+                # Finished before progress events existed: summarize the report
+                summary = await asyncio.to_thread(summary_event, run_dir)
+                if after < summary["seq"]:
+                    yield event_hub.format_event(TERMINAL_EVENT, summary, summary["seq"])
+                return
+            
+            for event in events:
+                if event.get("type") == START_EVENT:
+                    finished = False
+                elif event.get("type") == TERMINAL_EVENT:
+                    finished = True
+                if event.get("seq", 0) > after:
+                    yield event_hub.format_event(event.get("type", "message"), event, event.get("seq"))
+            # A queued resume has not appended its run_started yet
+            if finished and not await asyncio.to_thread(job_active):
+                return
+            
+            now = time.monotonic()
+            if events:
+                last_activity = last_heartbeat = now
+            elif now - last_activity > settings.RUN_EVENTS_IDLE_TIMEOUT_SECONDS and \
+                    not await asyncio.to_thread(job_active):
+                # No job is driving this run and it stopped reporting (e.g. killed)
+                yield event_hub.format_event("idle_timeout", {"run_id": run_id})
+                return
+            elif now - last_heartbeat >= settings.SSE_HEARTBEAT_SECONDS:
+                last_heartbeat = now
+                yield ": heartbeat\n\n"
+            await asyncio.sleep(settings.RUN_EVENTS_POLL_SECONDS)
+    
+    return StreamingResponse(
+        event_generator(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        }
+    )
+
 @router.get("/health")
 async def pipeline_health():
     """Check pipeline health"""
@@ -121,11 +272,12 @@ async def pipeline_health():
                 "message": "data_store directory not found"
             }
         
-        runs = DataBridge.list_all_runs() if DataBridge else []
         return {
             "status": "healthy",
             "message": "Pipeline operational",
-            "total_runs": len(runs)
+            "total_runs": await asyncio.to_thread(DataBridge.count_runs),
+            "jobs": await asyncio.to_thread(pipeline_jobs.queue.counts),
+            "run_data_cache": run_data_cache.stats()
         }
     except Exception as e:
         return {
@@ -137,26 +289,27 @@ async def pipeline_health():
 # Helper Functions
 # ============================================================================
 
-def run_pipeline_subprocess(run_id: str):
-    """Execute pipeline in subprocess"""
-    try:
-        pipeline_dir = Path(__file__).parent.parent.parent.parent / "pipeline"
-        
-        if Config:
-            Config.ensure_run_structure(run_id)
-        
-        result = subprocess.run(
-            ["python", str(pipeline_dir / "orchestrator.py"), "--run-id", run_id],
-            cwd=str(pipeline_dir),
-            capture_output=True,
-            text=True
-        )
-        
-        if result.returncode != 0:
-            print(f"Pipeline execution failed for {run_id}")
-            print(f"STDERR: {result.stderr}")
-        else:
-            print(f"Pipeline execution completed for {run_id}")
-    
-    except Exception as e:
-        print(f"Error running pipeline: {str(e)}")
\ No newline at end of file
+def _latest_summarized_run() -> Optional[Path]:
+    """Newest run directory that already has a risk summary"""
+    run_id = DataBridge.get_latest_run_id(with_predictions=True)
+    if run_id is None:
+        return None
+    run_dir = Config.get_run_dir(run_id)
+    return run_dir if (run_dir / "04_predictions" / "risk_summary.json").exists() else None
+
+def _run_alert_mark() -> Optional[str]:
+    run_dir = _latest_summarized_run()
+    if run_dir is None:
+        return None
+    return f"{run_dir.name}:{(run_dir / '04_predictions' / 'risk_summary.json').stat().st_mtime_ns}"
+
+def _run_alert_candidates() -> list:
+    run_dir = _latest_summarized_run()
+    if run_dir is None:
+        return []
+    risk_summary = DataBridge.get_run_data(run_dir.name)["predictions"].get("risk_summary")
+    return [candidate_from_run(risk_summary)] if risk_summary else []
+
+# Alerts follow the latest completed pipeline run
+if Config and DataBridge:
+    alert_engine.watch("pipeline", _run_alert_mark, _run_alert_candidates)
@@ -1,11 +1,12 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from app.schemas.models import PredictionsResponse
 from app.services.mock_data import mock_service
+from app.services.response_cache import response_cache
 
 router = APIRouter()
 
 @router.get("/predictions/current", response_model=PredictionsResponse)
-async def get_current_predictions():
+async def get_current_predictions(request: Request):
     """
     Get current flood predictions for all locations in West Bengal.
     
@@ -13,7 +14,7 @@ async def get_current_predictions():
     Updated every 6 hours with IMD forecast cycles.
     """
     try:
-        data = mock_service.get_current_predictions()
-        return data
+        snapshot = mock_service.snapshot()
+        return response_cache.respond(request, lambda: snapshot.predictions_json, tag=snapshot.cycle_id)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,80 @@
+"""
+Synthetic Scenarios Router
+
+Generates large synthetic scenarios for load testing (mock mode only).
+The generator (and numpy with it) is imported on the first request.
+"""
+
+import asyncio
+import time
+from datetime import datetime
+from fastapi import APIRouter, HTTPException, Query, Request
+from app.config import settings
+from app.services.prediction_store import prediction_store
+from app.services.response_cache import response_cache
+from app.services.serialization import dumps
+from app.services.spatial_index import spatial_index
+
+router = APIRouter()
+
+MAX_LOCATIONS = 100000
+
+
+@router.get("/scenarios/predictions")
+async def get_scenario_predictions(
+    request: Request,
+    count: int = Query(10000, ge=1, le=MAX_LOCATIONS),
+    seed: int = Query(0)
+):
+    """
+    Synthetic PredictionsResponse with `count` locations.
+    
+    Same seed and count always produce the same scenario within a forecast
+    hour, so repeated load-test requests are served from the response cache.
+    """
+    _require_mock_mode()
+    from app.services.scenario_generator import Scenario
+    hour = datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+
+    async def build():
+        # Up to 100k rows: generate and serialize off the event loop
+        return await asyncio.to_thread(lambda: dumps(Scenario(count, seed=seed, now=hour).predictions_response()))
+
+    return await response_cache.respond_async(request, build, tag=hour.isoformat())
+
+
+@router.post("/scenarios/load")
+async def load_scenario(
+    count: int = Query(10000, ge=1, le=MAX_LOCATIONS),
+    seed: int = Query(0),
+    spatial: bool = Query(True, description="Also index locations for bbox/point queries")
+):
+    """
+    Generate a synthetic scenario and bulk-load it into the DL prediction store.
+    
+    Loaded predictions are then served by the /predictions/dl endpoints.
+    """
+    _require_mock_mode()
+    from app.services.scenario_generator import Scenario
+    start = time.perf_counter()
+    scenario = Scenario(count, seed=seed)
+    generated = time.perf_counter()
+
+    await asyncio.to_thread(scenario.load_into, prediction_store, spatial_index if spatial else None)
+    response_cache.bump_version()
+    loaded = time.perf_counter()
+
+    print(f"🧪 Loaded synthetic scenario: {count} locations (seed {seed})")
+    return {
+        "status": "success",
+        "count": count,
+        "seed": seed,
+        "total_stored": len(prediction_store),
+        "generate_ms": round((generated - start) * 1000, 1),
+        "load_ms": round((loaded - generated) * 1000, 1)
+    }
+
+
+def _require_mock_mode():
+    if not settings.MOCK_MODE:
+        raise HTTPException(status_code=403, detail="Synthetic scenarios are only available in mock mode")
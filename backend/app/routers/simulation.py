@@ -1,11 +1,12 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from app.schemas.models import SimulationResponse
 from app.services.mock_data import mock_service
+from app.services.response_cache import response_cache
 
 router = APIRouter()
 
 @router.get("/simulation/{prediction_id}", response_model=SimulationResponse)
-async def get_simulation_frames(prediction_id: str):
+async def get_simulation_frames(prediction_id: str, request: Request):
     """
     Get flood simulation animation frames for a specific prediction.
     
@@ -13,10 +14,11 @@ async def get_simulation_frames(prediction_id: str):
     Frames show water depth progression from T+0h to T+48h.
     """
     try:
-        data = mock_service.get_simulation_frames(prediction_id)
+        snapshot = mock_service.snapshot()
+        data = snapshot.simulations_json.get(prediction_id)
         if not data:
             raise HTTPException(status_code=404, detail=f"Simulation not found for prediction: {prediction_id}")
-        return data
+        return response_cache.respond(request, lambda: data, tag=snapshot.cycle_id)
     except HTTPException:
         raise
     except Exception as e:
@@ -1,23 +1,188 @@
-from fastapi import APIRouter, HTTPException
-from app.schemas.models import HydrographResponse
-from app.services.mock_data import mock_service
+import asyncio
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+from fastapi import APIRouter, HTTPException, Query, Request
+from app.config import settings
+from app.schemas.models import (
+    HydrographResponse,
+    HydrographRollupsResponse,
+    ObservationBatch,
+    ObservationWriteResponse,
+)
+from app.services.mock_data import GAUGE_INTERVAL_SECONDS, MONSOON_SEASON_DAYS, mock_service
+from app.services.response_cache import response_cache
+from app.services.serialization import json_response
+from app.services.timeseries_store import from_epoch, lttb, timeseries_store, to_epoch
 
 router = APIRouter()
 
+MAX_POINTS_LIMIT = 5000
+
+# Serializes mock gauge seeding between start-up and first requests
+_seed_lock = threading.Lock()
+
 @router.get("/timeseries/{prediction_id}/hydrograph", response_model=HydrographResponse)
-async def get_hydrograph(prediction_id: str):
+async def get_hydrograph(
+    prediction_id: str,
+    request: Request,
+    start: Optional[datetime] = Query(None, description="Range start (defaults to the start of the stored series)"),
+    end: Optional[datetime] = Query(None, description="Range end (defaults to the latest observation)"),
+    max_points: int = Query(settings.TIMESERIES_DEFAULT_POINTS, ge=3, le=MAX_POINTS_LIMIT,
+                            description="Point budget per series (LTTB downsampling)")
+):
     """
     Get discharge hydrograph time series data for a prediction.
     
     Includes forecast and observed discharge values with warning levels.
-    Useful for detailed charts and analysis.
+    Observed gauge data comes from the time-series store and is downsampled
+    to at most `max_points` points with Largest-Triangle-Three-Buckets.
+    Forecast points written to the store replace the model forecast.
     """
     try:
-        data = mock_service.get_hydrograph(prediction_id)
-        if not data:
+        snapshot = mock_service.snapshot()
+        hydrograph = snapshot.hydrographs.get(prediction_id)
+        if not hydrograph:
             raise HTTPException(status_code=404, detail=f"Hydrograph not found for prediction: {prediction_id}")
-        return data
+        
+        async def build():
+            observed = await asyncio.to_thread(
+                _observed_series, prediction_id, snapshot.cycle_start, start, end, max_points
+            )
+            forecast = await asyncio.to_thread(
+                _forecast_series, prediction_id, hydrograph, start, end, max_points
+            )
+            return {**hydrograph, "forecast": forecast, "observed": observed}
+        
+        return await response_cache.respond_async(request, build, HydrographResponse, tag=snapshot.cycle_id)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/timeseries/{prediction_id}/rollups", response_model=HydrographRollupsResponse)
+async def get_hydrograph_rollups(
+    prediction_id: str,
+    request: Request,
+    resolution: str = Query("hour", regex="^(hour|day)$"),
+    data_type: str = Query("observed", regex="^(observed|forecast)$"),
+    start: Optional[datetime] = Query(None),
+    end: Optional[datetime] = Query(None)
+):
+    """
+    Get hourly or daily min/max/mean discharge buckets.
+    
+    Rollups are maintained on write, so season-long summaries never scan
+    the raw 15-minute series.
+    """
+    snapshot = mock_service.snapshot()
+    if prediction_id not in snapshot.hydrographs:
+        raise HTTPException(status_code=404, detail=f"Hydrograph not found for prediction: {prediction_id}")
+    
+    async def build():
+        if data_type == "observed":
+            await asyncio.to_thread(_ensure_mock_gauge, prediction_id, snapshot.cycle_start)
+        buckets = await asyncio.to_thread(
+            timeseries_store.rollups, prediction_id, data_type, resolution, start, end
+        )
+        return {
+            "predictionId": prediction_id,
+            "dataType": data_type,
+            "resolution": resolution,
+            "buckets": buckets
+        }
+    
+    return await response_cache.respond_async(request, build, HydrographRollupsResponse, tag=snapshot.cycle_id)
+
+@router.post("/timeseries/{prediction_id}/observations", response_model=ObservationWriteResponse)
+async def write_observations(prediction_id: str, batch: ObservationBatch):
+    """
+    Append (or overwrite) gauge readings for a prediction's gauge station.
+    
+    Forecast points, once written, are served by the hydrograph instead of
+    the model forecast. Hourly and daily rollups for the affected buckets are refreshed in the
+    same transaction.
+    """
+    if prediction_id not in mock_service.snapshot().hydrographs:
+        raise HTTPException(status_code=404, detail=f"Hydrograph not found for prediction: {prediction_id}")
+    
+    try:
+        stored = await asyncio.to_thread(
+            timeseries_store.write,
+            prediction_id,
+            batch.dataType,
+            [(point.timestamp, point.discharge) for point in batch.points]
+        )
+        response_cache.bump_version()
+        return json_response({
+            "predictionId": prediction_id,
+            "dataType": batch.dataType,
+            "stored": stored
+        }, ObservationWriteResponse)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# Helpers
+def _observed_series(
+    prediction_id: str,
+    cycle_start: datetime,
+    start: Optional[datetime],
+    end: Optional[datetime],
+    max_points: int
+) -> List[Dict]:
+    """Stored observations in range, downsampled to the point budget"""
+    _ensure_mock_gauge(prediction_id, cycle_start)
+    points = timeseries_store.query(prediction_id, "observed", start, end)
+    return [
+        {"timestamp": from_epoch(ts), "discharge": discharge}
+        for ts, discharge in lttb(points, max_points)
+    ]
+
+def _forecast_series(
+    prediction_id: str,
+    hydrograph: Dict,
+    start: Optional[datetime],
+    end: Optional[datetime],
+    max_points: int
+) -> List[Dict]:
+    """Stored forecast in range (downsampled), or the model forecast when none was written"""
+    if timeseries_store.last_timestamp(prediction_id, "forecast") is not None:
+        points = timeseries_store.query(prediction_id, "forecast", start, end)
+        return [
+            {"timestamp": from_epoch(ts), "discharge": discharge}
+            for ts, discharge in lttb(points, max_points)
+        ]
+    return [
+        point for point in hydrograph["forecast"]
+        if _in_range(to_epoch(point["timestamp"]), start, end)
+    ]
+
+def _ensure_mock_gauge(prediction_id: str, cycle_start: datetime):
+    """In mock mode, fill the synthetic gauge series up to the current cycle"""
+    if not settings.MOCK_MODE:
+        return
+    
+    end = to_epoch(cycle_start)
+    with _seed_lock:
+        last = timeseries_store.last_timestamp(prediction_id, "observed")
+        if last is not None and last >= end:
+            return
+        
+        start = end - MONSOON_SEASON_DAYS * 86400 if last is None else last + GAUGE_INTERVAL_SECONDS
+        points = mock_service.build_gauge_series(prediction_id, start, end)
+        timeseries_store.write(prediction_id, "observed", points)
+
+def seed_mock_gauges():
+    """
+    Fill every mock gauge up to the current cycle, so the first hydrograph
+    request does not pay for a season of 15-minute readings (run at start-up)
+    """
+    if not settings.MOCK_MODE:
+        return
+    snapshot = mock_service.snapshot()
+    for prediction_id in snapshot.hydrographs:
+        _ensure_mock_gauge(prediction_id, snapshot.cycle_start)
+
+def _in_range(ts: int, start: Optional[datetime], end: Optional[datetime]) -> bool:
+    return (start is None or ts >= to_epoch(start)) and (end is None or ts <= to_epoch(end))
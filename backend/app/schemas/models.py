@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict
+from typing import List, Literal, Optional, Dict
 from datetime import datetime
 
 # Location Models
@@ -121,10 +121,20 @@ class Alert(BaseModel):
     validUntil: datetime
     affectedRegions: List[str]
     actions: List[str]
+    revision: int = 1
+    updatedAt: Optional[datetime] = None
 
 class AlertsResponse(BaseModel):
+    version: int = 0
     alerts: List[Alert]
 
+class AlertChangesResponse(BaseModel):
+    version: int
+    since: int
+    reset: bool
+    alerts: List[Alert]
+    removed: List[str]
+
 # History Models
 class PredictionRecord(BaseModel):
     issuedAt: datetime
@@ -183,6 +193,28 @@ class HydrographResponse(BaseModel):
     observed: List[TimeSeriesPoint]
     warningLevels: WarningLevels
 
+class ObservationBatch(BaseModel):
+    dataType: Literal["observed", "forecast"] = "observed"
+    points: List[TimeSeriesPoint]
+
+class ObservationWriteResponse(BaseModel):
+    predictionId: str
+    dataType: str
+    stored: int
+
+class RollupBucket(BaseModel):
+    timestamp: datetime
+    count: int
+    min: float
+    max: float
+    mean: float
+
+class HydrographRollupsResponse(BaseModel):
+    predictionId: str
+    dataType: str
+    resolution: str
+    buckets: List[RollupBucket]
+
 # Config Models
 class SeverityLevel(BaseModel):
     class_: str = Field(..., alias="class")
@@ -0,0 +1,543 @@
+"""
+Alert Dispatch Service
+Durable, batched delivery of flood alert notifications.
+
+Alerts are written to a SQLite-backed queue at ingest time and delivered
+by a small pool of worker tasks, so notification fan-out never runs inside
+a request and survives process restarts.
+"""
+import asyncio
+import json
+import smtplib
+import sqlite3
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from email.message import EmailMessage
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from app.config import settings
+from app.services.shared_state import INSTANCE_ID
+
+SEVERITY_RANK = {"LOW": 0, "MODERATE": 1, "HIGH": 2, "CRITICAL": 3}
+
+
+# ============================================================================
+# Persistent Queue
+# ============================================================================
+
+class AlertQueue:
+    """
+    SQLite queue of alert jobs and their per-channel recipient batches.
+
+    One job exists per (region, forecast cycle); repeated alerts for the same
+    region and cycle are coalesced into it, and a higher severity re-opens a
+    job that was already delivered so the escalation goes out too.
+
+    Every API worker opens the same database. A claimed job records its
+    owner (INSTANCE_ID) and a lease the owner keeps renewing; only jobs
+    whose lease expired are returned to the queue, so a worker starting up
+    never re-sends jobs another live worker is still delivering.
+    """
+
+    def __init__(self, db_path: Path):
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False, isolation_level=None, timeout=30.0)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS alert_jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                dedupe_key TEXT NOT NULL UNIQUE,
+                region TEXT NOT NULL,
+                severity TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                revision INTEGER NOT NULL DEFAULT 0,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at REAL NOT NULL DEFAULT 0,
+                last_error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_alert_jobs_ready
+                ON alert_jobs (status, next_attempt_at);
+            CREATE TABLE IF NOT EXISTS alert_batches (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                job_id INTEGER NOT NULL REFERENCES alert_jobs(id),
+                channel TEXT NOT NULL,
+                recipients TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending'
+            );
+            CREATE INDEX IF NOT EXISTS idx_alert_batches_job ON alert_batches (job_id);
+        """)
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(alert_jobs)")}
+        if "owner" not in columns:
+            # Queues from before leases: in-progress rows get no lease, i.e. expired
+            self._conn.execute("ALTER TABLE alert_jobs ADD COLUMN owner TEXT")
+            self._conn.execute("ALTER TABLE alert_jobs ADD COLUMN lease_expires_at REAL")
+
+    @contextmanager
+    def _transaction(self, mode: str = ""):
+        self._conn.execute(f"BEGIN {mode}")
+        try:
+            yield
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+
+    def enqueue(self, alert: Dict) -> int:
+        """
+        Queue an alert, coalescing with any job for the same region and cycle.
+
+        Returns:
+            The id of the (new or existing) job
+        """
+        key = f"{alert['region']}|{alert['forecast_cycle']}"
+        now = time.time()
+        payload = json.dumps(alert, default=str)
+
+        # One write transaction: concurrent workers coalescing the same
+        # region and cycle serialize here instead of racing on dedupe_key
+        with self._lock, self._transaction("IMMEDIATE"):
+            row = self._conn.execute(
+                "SELECT id, severity, status FROM alert_jobs WHERE dedupe_key = ?", (key,)
+            ).fetchone()
+
+            if row is None:
+                cursor = self._conn.execute(
+                    "INSERT INTO alert_jobs (dedupe_key, region, severity, payload, created_at, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, alert["region"], alert["severity"], payload, now, now)
+                )
+                return cursor.lastrowid
+
+            if SEVERITY_RANK.get(alert["severity"], 0) <= SEVERITY_RANK.get(row["severity"], 0):
+                # Duplicate for this region and cycle: nothing new to tell anyone
+                return row["id"]
+
+            # Escalation: resend with the higher severity
+            self._conn.execute(
+                "UPDATE alert_jobs SET severity = ?, payload = ?, revision = revision + 1, "
+                "status = CASE WHEN status = 'in_progress' THEN status ELSE 'pending' END, "
+                "attempts = 0, next_attempt_at = 0, updated_at = ? WHERE id = ?",
+                (alert["severity"], payload, now, row["id"])
+            )
+            if row["status"] != "in_progress":
+                self._conn.execute("DELETE FROM alert_batches WHERE job_id = ?", (row["id"],))
+            return row["id"]
+
+    def claim(self, lease_seconds: float = 60.0) -> Optional[Dict]:
+        """Atomically take the next ready job, marking it in progress under a lease"""
+        with self._lock, self._transaction("IMMEDIATE"):
+            row = self._conn.execute(
+                "SELECT * FROM alert_jobs WHERE status = 'pending' AND next_attempt_at <= ? "
+                "ORDER BY next_attempt_at, id LIMIT 1",
+                (time.time(),)
+            ).fetchone()
+            if row is None:
+                return None
+            now = time.time()
+            self._conn.execute(
+                "UPDATE alert_jobs SET status = 'in_progress', attempts = attempts + 1, owner = ?, "
+                "lease_expires_at = ?, updated_at = ? WHERE id = ?",
+                (INSTANCE_ID, now + lease_seconds, now, row["id"])
+            )
+        # Return the row as claimed (attempts already incremented)
+        claimed = dict(row)
+        claimed["attempts"] += 1
+        return claimed
+
+    def ensure_batches(self, job_id: int, recipients_by_channel: Dict[str, List[str]], batch_size: int):
+        """Split recipients into batches the first time a job is processed"""
+        with self._lock:
+            exists = self._conn.execute(
+                "SELECT 1 FROM alert_batches WHERE job_id = ? LIMIT 1", (job_id,)
+            ).fetchone()
+            if exists:
+                return
+            rows = [
+                (job_id, channel, json.dumps(recipients[i:i + batch_size]))
+                for channel, recipients in recipients_by_channel.items()
+                for i in range(0, len(recipients), batch_size)
+            ]
+            with self._transaction():
+                self._conn.executemany(
+                    "INSERT INTO alert_batches (job_id, channel, recipients) VALUES (?, ?, ?)", rows
+                )
+
+    def pending_batches(self, job_id: int) -> List[sqlite3.Row]:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT * FROM alert_batches WHERE job_id = ? AND status != 'sent'", (job_id,)
+            ).fetchall()
+
+    def mark_batch_sent(self, batch_id: int):
+        with self._lock:
+            self._conn.execute("UPDATE alert_batches SET status = 'sent' WHERE id = ?", (batch_id,))
+
+    def renew(self, job_id: int, lease_seconds: float) -> bool:
+        """Extend this process's lease on a job; False if it lost the job"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE alert_jobs SET lease_expires_at = ? "
+                "WHERE id = ? AND owner = ? AND status = 'in_progress'",
+                (time.time() + lease_seconds, job_id, INSTANCE_ID)
+            )
+            return cursor.rowcount == 1
+
+    def finish(self, job: Dict, error: Optional[str], max_attempts: int, backoff_seconds: float):
+        """Mark a job sent, schedule a retry, or give up after max_attempts"""
+        now = time.time()
+        with self._lock, self._transaction("IMMEDIATE"):
+            current = self._conn.execute(
+                "SELECT revision, owner, status FROM alert_jobs WHERE id = ?", (job["id"],)
+            ).fetchone()
+            if current["owner"] != INSTANCE_ID or current["status"] != "in_progress":
+                # Our lease expired and the job was re-queued: its new owner decides
+                return
+            if current["revision"] != job["revision"]:
+                # Escalated while we were sending: deliver the new revision
+                self._conn.execute("DELETE FROM alert_batches WHERE job_id = ?", (job["id"],))
+                self._conn.execute(
+                    "UPDATE alert_jobs SET status = 'pending', attempts = 0, next_attempt_at = 0, "
+                    "updated_at = ? WHERE id = ?",
+                    (now, job["id"])
+                )
+            elif error is None:
+                self._conn.execute(
+                    "UPDATE alert_jobs SET status = 'sent', last_error = NULL, updated_at = ? WHERE id = ?",
+                    (now, job["id"])
+                )
+            elif job["attempts"] >= max_attempts:
+                self._conn.execute(
+                    "UPDATE alert_jobs SET status = 'failed', last_error = ?, updated_at = ? WHERE id = ?",
+                    (error, now, job["id"])
+                )
+            else:
+                delay = backoff_seconds * (2 ** (job["attempts"] - 1))
+                self._conn.execute(
+                    "UPDATE alert_jobs SET status = 'pending', last_error = ?, next_attempt_at = ?, "
+                    "updated_at = ? WHERE id = ?",
+                    (error, now + delay, now, job["id"])
+                )
+
+    def recover(self) -> int:
+        """Return jobs whose owner stopped renewing its lease to the queue"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE alert_jobs SET status = 'pending', next_attempt_at = 0, owner = NULL, "
+                "lease_expires_at = NULL WHERE status = 'in_progress' "
+                "AND (lease_expires_at IS NULL OR lease_expires_at < ?)",
+                (time.time(),)
+            )
+            return cursor.rowcount
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT status, COUNT(*) AS n FROM alert_jobs GROUP BY status"
+            ).fetchall()
+        return {row["status"]: row["n"] for row in rows}
+
+
+# ============================================================================
+# Channels
+# ============================================================================
+
+class NotificationChannel:
+    """Delivers one alert to a batch of recipients"""
+
+    name = "base"
+
+    async def send(self, alert: Dict, recipients: List[str]):
+        raise NotImplementedError
+
+
+class LogChannel(NotificationChannel):
+    """Prints alerts to the server log (default when nothing is configured)"""
+
+    name = "log"
+
+    async def send(self, alert: Dict, recipients: List[str]):
+        print(f"🚨 ALERT: {alert['severity']} flood risk in {alert['region']}")
+        print(f"   Prediction ID: {alert['prediction_id']}")
+        print(f"   Recipients: {len(recipients)}")
+
+
+class MemoryChannel(NotificationChannel):
+    """Records deliveries in memory; stand-in for real channels in tests"""
+
+    name = "memory"
+
+    def __init__(self):
+        self.sent: List[Dict] = []
+
+    async def send(self, alert: Dict, recipients: List[str]):
+        self.sent.append({"alert": alert, "recipients": list(recipients)})
+
+
+class WebhookChannel(NotificationChannel):
+    """POSTs each batch as JSON to a webhook endpoint"""
+
+    name = "webhook"
+
+    def __init__(self, url: str, timeout: float = 10.0):
+        self.url = url
+        self.timeout = timeout
+
+    async def send(self, alert: Dict, recipients: List[str]):
+        body = json.dumps({"alert": alert, "recipients": recipients}, default=str).encode("utf-8")
+        request = urllib.request.Request(
+            self.url, data=body, headers={"Content-Type": "application/json"}, method="POST"
+        )
+        await asyncio.to_thread(self._post, request)
+
+    def _post(self, request: urllib.request.Request):
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+
+class SMTPChannel(NotificationChannel):
+    """
+    Emails each batch as a single BCC message.
+
+    Point ALERT_SMTP_HOST at a local debugging server
+    (e.g. ``python -m aiosmtpd -n -l localhost:1025``) for testing.
+    """
+
+    name = "email"
+
+    def __init__(self, host: str, port: int, sender: str, timeout: float = 10.0):
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.timeout = timeout
+
+    async def send(self, alert: Dict, recipients: List[str]):
+        message = EmailMessage()
+        message["Subject"] = f"[{alert['severity']}] Flood alert: {alert['region']}"
+        message["From"] = self.sender
+        message["To"] = self.sender
+        message.set_content(
+            f"{alert['severity']} flood risk predicted in {alert['region']} "
+            f"(risk score {alert['risk_score']}).\n"
+            f"Prediction ID: {alert['prediction_id']}\n"
+            f"Forecast cycle: {alert['forecast_cycle']}\n"
+        )
+        await asyncio.to_thread(self._deliver, message, recipients)
+
+    def _deliver(self, message: EmailMessage, recipients: List[str]):
+        with smtplib.SMTP(self.host, self.port, timeout=self.timeout) as smtp:
+            smtp.send_message(message, to_addrs=recipients)
+
+
+# ============================================================================
+# Dispatcher
+# ============================================================================
+
+class AlertDispatcher:
+    """
+    Worker pool that drains the alert queue.
+
+    Recipients are looked up per region from ALERT_RECIPIENTS_FILE, a JSON
+    object mapping region names (or "*") to lists of
+    ``{"channel": "email", "address": "..."}`` entries.
+    """
+
+    def __init__(
+        self,
+        queue: AlertQueue,
+        channels: Dict[str, NotificationChannel],
+        recipients_file: Optional[str] = None,
+        workers: int = 2,
+        max_concurrent_sends: int = 8,
+        batch_size: int = 500,
+        max_attempts: int = 5,
+        backoff_seconds: float = 5.0,
+        poll_seconds: float = 2.0,
+        lease_seconds: float = 60.0
+    ):
+        self.queue = queue
+        self.channels = channels
+        self.recipients_file = recipients_file
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.poll_seconds = poll_seconds
+        self.lease_seconds = lease_seconds
+        self._last_recover = 0.0
+        self.max_concurrent_sends = max_concurrent_sends
+        # Created on the serving event loop in start()/drain()
+        self._send_slots: Optional[asyncio.Semaphore] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+        self._directory: Optional[Dict[str, List[Dict]]] = None
+
+    async def enqueue(
+        self,
+        prediction_id: str,
+        severity: str,
+        region: str,
+        forecast_cycle: str,
+        risk_score: float
+    ) -> int:
+        """Persist an alert for delivery; returns immediately"""
+        job_id = await asyncio.to_thread(self.queue.enqueue, {
+            "prediction_id": prediction_id,
+            "severity": severity,
+            "region": region,
+            "forecast_cycle": forecast_cycle,
+            "risk_score": risk_score
+        })
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return job_id
+
+    async def start(self):
+        """Recover interrupted jobs and start the worker tasks"""
+        await self._recover()
+        self._send_slots = asyncio.Semaphore(self.max_concurrent_sends)
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def drain(self):
+        """Process every ready job now (used by tests and tooling)"""
+        if self._send_slots is None:
+            self._send_slots = asyncio.Semaphore(self.max_concurrent_sends)
+        while await self.process_next():
+            pass
+
+    async def process_next(self) -> bool:
+        """Deliver one job; returns False when nothing was ready"""
+        job = await asyncio.to_thread(self.queue.claim, self.lease_seconds)
+        if job is None:
+            return False
+
+        heartbeat = asyncio.create_task(self._renew_lease(job["id"]))
+        delivery = asyncio.create_task(self._deliver(job))
+        try:
+            await asyncio.wait({heartbeat, delivery}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            heartbeat.cancel()
+            if not delivery.done():
+                # Lease lost (or shutting down): another worker owns the job now
+                delivery.cancel()
+                await asyncio.gather(delivery, return_exceptions=True)
+        if not delivery.cancelled() and delivery.exception() is not None:
+            raise delivery.exception()
+        if heartbeat.done() and not heartbeat.cancelled():
+            reason = heartbeat.exception() or "lease taken over"
+            print(f"📬 Stopped delivering alert job {job['id']}: {reason}")
+        return True
+
+    async def _deliver(self, job: Dict):
+        alert = json.loads(job["payload"])
+        error = None
+        try:
+            await asyncio.to_thread(
+                self.queue.ensure_batches, job["id"], self._recipients_for(alert["region"]), self.batch_size
+            )
+            batches = await asyncio.to_thread(self.queue.pending_batches, job["id"])
+            results = await asyncio.gather(
+                *(self._send_batch(alert, batch) for batch in batches),
+                return_exceptions=True
+            )
+            failures = [r for r in results if isinstance(r, Exception)]
+            if failures:
+                error = f"{len(failures)}/{len(batches)} batches failed: {failures[0]}"
+        except Exception as e:
+            error = str(e)
+
+        await asyncio.to_thread(self.queue.finish, job, error, self.max_attempts, self.backoff_seconds)
+
+    async def _renew_lease(self, job_id: int):
+        """Keep the job's lease alive; returns once it could not be renewed"""
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            if not await asyncio.to_thread(self.queue.renew, job_id, self.lease_seconds):
+                return
+
+    async def _recover(self):
+        """Re-queue jobs of workers that died (at most once per lease period)"""
+        self._last_recover = time.monotonic()
+        recovered = await asyncio.to_thread(self.queue.recover)
+        if recovered:
+            print(f"📬 Re-queued {recovered} interrupted alert job(s)")
+
+    async def _send_batch(self, alert: Dict, batch: sqlite3.Row):
+        channel = self.channels.get(batch["channel"])
+        if channel is None:
+            raise ValueError(f"Unknown alert channel: {batch['channel']}")
+        async with self._send_slots:
+            await channel.send(alert, json.loads(batch["recipients"]))
+        await asyncio.to_thread(self.queue.mark_batch_sent, batch["id"])
+
+    async def _worker(self):
+        while True:
+            try:
+                if not await self.process_next():
+                    if time.monotonic() - self._last_recover >= self.lease_seconds:
+                        await self._recover()
+                    self._wakeup.clear()
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_seconds)
+                    except asyncio.TimeoutError:
+                        pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Alert dispatch worker error: {e}")
+                await asyncio.sleep(self.poll_seconds)
+
+    def _recipients_for(self, region: str) -> Dict[str, List[str]]:
+        """Group a region's recipients (plus "*" subscribers) by channel"""
+        if self._directory is None:
+            self._directory = self._load_directory()
+
+        grouped: Dict[str, List[str]] = {}
+        for entry in self._directory.get(region, []) + self._directory.get("*", []):
+            grouped.setdefault(entry["channel"], []).append(entry["address"])
+        return grouped
+
+    def _load_directory(self) -> Dict[str, List[Dict]]:
+        if self.recipients_file and Path(self.recipients_file).exists():
+            with open(self.recipients_file, 'r') as f:
+                return json.load(f)
+        return {"*": [{"channel": "log", "address": "operations"}]}
+
+
+def _build_channels() -> Dict[str, NotificationChannel]:
+    """Channels enabled by configuration (log is always available)"""
+    channels: Dict[str, NotificationChannel] = {"log": LogChannel()}
+    if settings.ALERT_WEBHOOK_URL:
+        channels["webhook"] = WebhookChannel(settings.ALERT_WEBHOOK_URL)
+    if settings.ALERT_SMTP_HOST:
+        channels["email"] = SMTPChannel(
+            settings.ALERT_SMTP_HOST, settings.ALERT_SMTP_PORT, settings.ALERT_SMTP_SENDER
+        )
+    return channels
+
+
+alert_dispatcher = AlertDispatcher(
+    queue=AlertQueue(Path(settings.STATE_DIR) / "alert_queue.db"),
+    channels=_build_channels(),
+    recipients_file=settings.ALERT_RECIPIENTS_FILE,
+    workers=settings.ALERT_WORKERS,
+    max_concurrent_sends=settings.ALERT_MAX_CONCURRENT_SENDS,
+    batch_size=settings.ALERT_BATCH_SIZE,
+    max_attempts=settings.ALERT_MAX_ATTEMPTS,
+    lease_seconds=settings.JOB_LEASE_SECONDS
+)
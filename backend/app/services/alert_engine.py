@@ -0,0 +1,355 @@
+"""
+Alert Engine Service
+Materializes flood alerts when predictions change instead of on every read.
+
+Threshold rules are evaluated whenever a prediction source changes (a DL
+ingest, a new pipeline run or a new mock forecast cycle). The resulting
+alert set is stored with stable IDs, and every change bumps a version so
+clients can fetch only what changed since the version they last saw.
+
+With several workers the alert set is kept in shared state: evaluations run
+inside a cross-process transaction and readers adopt newer versions written
+by other workers, so every worker serves the same IDs and versions.
+"""
+import re
+import threading
+from collections import deque
+from contextlib import nullcontext
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.services.event_hub import event_hub
+from app.services.mock_data import mock_service
+from app.services.shared_state import shared_state
+
+SEVERITY_RANK = {"LOW": 0, "MODERATE": 1, "HIGH": 2, "CRITICAL": 3}
+
+# How long an alert stays valid after it was issued or last changed
+ALERT_VALIDITY_HOURS = 48
+
+# Removed-alert markers kept for diff queries; older `since` values get a reset
+MAX_TOMBSTONES = 1000
+
+# Shared state blob holding the alert set (multi-worker mode)
+SHARED_BLOB = "alerts"
+
+AFFECTED_REGIONS = {
+    "Kolkata Metropolitan Area": ["North Kolkata", "Salt Lake", "Park Street", "Howrah"],
+    "Jalpaiguri District": ["Jalpaiguri Town", "Mainaguri", "Mal", "Nagrakata"],
+    "Howrah District": ["Howrah City", "Uluberia", "Shyampur", "Bagnan"],
+    "South 24 Parganas (Sundarbans)": ["Gosaba", "Basanti", "Kultali", "Patharpratima"],
+}
+
+SAFETY_ACTIONS = {
+    "CRITICAL": [
+        "Evacuate low-lying areas immediately",
+        "Do not cross flooded bridges or roads",
+        "Contact local disaster management authorities",
+        "Move to designated evacuation shelters"
+    ],
+    "HIGH": [
+        "Move to higher ground if in low-lying areas",
+        "Avoid travel through flooded roads",
+        "Keep emergency supplies ready",
+        "Monitor updates from local authorities"
+    ],
+}
+
+
+@dataclass
+class AlertRule:
+    """Raise `type` for predictions at or above `min_severity`"""
+    type: str
+    min_severity: str
+
+    def matches(self, candidate: Dict) -> bool:
+        return SEVERITY_RANK.get(candidate["severity"], -1) >= SEVERITY_RANK[self.min_severity]
+
+
+RULES = [AlertRule("FLOOD_WARNING", "HIGH")]
+
+
+class AlertEngine:
+    """
+    Stored alert set for all prediction sources.
+
+    Each source (``mock``, ``dl:<basin>``, ``pipeline``) owns the alerts
+    derived from its latest predictions; re-evaluating a source adds,
+    updates or removes only its own alerts.
+    """
+
+    def __init__(self, rules: List[AlertRule]):
+        self.rules = rules
+        self.version = 0
+        self._lock = threading.Lock()
+        self._alerts: Dict[str, Dict] = {}
+        self._changed_at: Dict[str, int] = {}
+        self._sources: Dict[str, set] = {}
+        self._tombstones: Deque[Tuple[int, str]] = deque(maxlen=MAX_TOMBSTONES)
+        self._source_marks: Dict[str, str] = {}
+        self._watched: Dict[str, Tuple[Callable[[], Optional[str]], Callable[[], List[Dict]]]] = {}
+
+    # ------------------------------------------------------------------
+    # Evaluation
+    # ------------------------------------------------------------------
+
+    def evaluate(self, source: str, candidates: List[Dict], now: Optional[datetime] = None) -> Dict:
+        """
+        Re-evaluate the rules for one source's current predictions.
+
+        Args:
+            source: Source key; replaces every alert previously derived from it
+            candidates: Normalized predictions (see candidate_* helpers)
+            now: Evaluation time (defaults to utcnow)
+
+        Returns:
+            {"version", "added", "updated", "removed"} alert ID lists
+        """
+        now = now or datetime.utcnow()
+        changes = {"added": [], "updated": [], "removed": []}
+
+        # Across workers, the read-modify-write must hold the shared write lock
+        transaction = shared_state.transaction() if shared_state is not None else nullcontext()
+        with transaction, self._lock:
+            self._refresh_locked()
+            fresh = {}
+            for candidate in candidates:
+                for rule in self.rules:
+                    if rule.matches(candidate):
+                        alert = _build_alert(rule, candidate)
+                        fresh[alert["id"]] = alert
+
+            for alert_id, alert in fresh.items():
+                current = self._alerts.get(alert_id)
+                if current is None:
+                    alert.update(issuedAt=_iso(now), updatedAt=_iso(now), revision=1,
+                                 validUntil=_iso(now + timedelta(hours=ALERT_VALIDITY_HOURS)))
+                    changes["added"].append(alert_id)
+                elif _content(current) != _content(alert):
+                    alert.update(issuedAt=current["issuedAt"], updatedAt=_iso(now),
+                                 revision=current["revision"] + 1,
+                                 validUntil=_iso(now + timedelta(hours=ALERT_VALIDITY_HOURS)))
+                    changes["updated"].append(alert_id)
+                else:
+                    continue
+                self._alerts[alert_id] = alert
+
+            previous_ids = self._sources.get(source, set())
+            changes["removed"] = sorted(previous_ids - set(fresh))
+            self._sources[source] = set(fresh)
+
+            if any(changes.values()):
+                self.version += 1
+                for alert_id in changes["added"] + changes["updated"]:
+                    self._changed_at[alert_id] = self.version
+                for alert_id in changes["removed"]:
+                    self._alerts.pop(alert_id, None)
+                    self._changed_at.pop(alert_id, None)
+                    self._tombstones.append((self.version, alert_id))
+                if shared_state is not None:
+                    shared_state.save_blob(SHARED_BLOB, self.version, self._snapshot())
+            changes["version"] = self.version
+
+        if any(changes[kind] for kind in ("added", "updated", "removed")):
+            print(f"🔔 Alerts v{changes['version']} ({source}): "
+                  f"+{len(changes['added'])} ~{len(changes['updated'])} -{len(changes['removed'])}")
+            event_hub.publish("alerts_changed", changes)
+        return changes
+
+    def evaluate_once(self, source: str, mark: str, build_candidates) -> Optional[Dict]:
+        """
+        Evaluate a source only when its change marker differs from the last
+        evaluated one (e.g. a forecast cycle ID or pipeline run ID).
+        """
+        if self._source_marks.get(source) == mark:
+            return None
+        changes = self.evaluate(source, build_candidates())
+        self._source_marks[source] = mark
+        return changes
+
+    def watch(
+        self,
+        source: str,
+        mark: Callable[[], Optional[str]],
+        candidates: Callable[[], List[Dict]]
+    ):
+        """
+        Register a polled source: `mark` cheaply identifies its current
+        version (None = unavailable) and `candidates` loads its predictions.
+        """
+        self._watched[source] = (mark, candidates)
+
+    def sync(self):
+        """Re-evaluate every watched source whose marker changed"""
+        for source, (mark, candidates) in list(self._watched.items()):
+            current = mark()
+            if current is not None:
+                self.evaluate_once(source, current, candidates)
+        self._refresh()
+
+    # ------------------------------------------------------------------
+    # Shared state (multi-worker mode)
+    # ------------------------------------------------------------------
+
+    def _refresh(self):
+        """Adopt an alert set written by another worker"""
+        if shared_state is not None and shared_state.blob_version(SHARED_BLOB) != self.version:
+            with self._lock:
+                self._refresh_locked()
+
+    def _refresh_locked(self):
+        if shared_state is None:
+            return
+        version, state = shared_state.load_blob(SHARED_BLOB)
+        if state is None or version == self.version:
+            return
+        self.version = version
+        self._alerts = state["alerts"]
+        self._changed_at = state["changed_at"]
+        self._sources = {source: set(ids) for source, ids in state["sources"].items()}
+        self._tombstones = deque((tuple(t) for t in state["tombstones"]), maxlen=MAX_TOMBSTONES)
+
+    def _snapshot(self) -> Dict:
+        return {
+            "alerts": self._alerts,
+            "changed_at": self._changed_at,
+            "sources": {source: sorted(ids) for source, ids in self._sources.items()},
+            "tombstones": list(self._tombstones)
+        }
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def current(self) -> Dict:
+        """Full alert set, most severe first"""
+        self._refresh()
+        with self._lock:
+            alerts = sorted(
+                self._alerts.values(),
+                key=lambda a: (-SEVERITY_RANK.get(a["severity"], 0), a["id"])
+            )
+            return {"version": self.version, "alerts": alerts}
+
+    def changes_since(self, since: int) -> Dict:
+        """
+        Alerts added/updated and IDs removed after version `since`.
+
+        `reset` is true when `since` predates the retained removal history;
+        the client should then replace its set with `alerts`.
+        """
+        self._refresh()
+        with self._lock:
+            oldest = self._tombstones[0][0] if len(self._tombstones) == MAX_TOMBSTONES else 0
+            reset = since < oldest or since > self.version
+            if reset:
+                changed = list(self._alerts.values())
+                removed = []
+            else:
+                changed = [self._alerts[i] for i, v in self._changed_at.items() if v > since]
+                removed = [
+                    alert_id for version, alert_id in self._tombstones
+                    if version > since and alert_id not in self._alerts
+                ]
+            return {
+                "version": self.version,
+                "since": since,
+                "reset": reset,
+                "alerts": sorted(changed, key=lambda a: a["id"]),
+                "removed": removed
+            }
+
+
+# ============================================================================
+# Candidate normalization (one per prediction source)
+# ============================================================================
+
+def candidate_from_mock(prediction: Dict) -> Dict:
+    """Candidate from a PredictionsResponse entry"""
+    return {
+        "key": prediction["id"],
+        "predictionId": prediction["id"],
+        "name": prediction["location"]["name"],
+        "severity": prediction["current"]["severityClass"],
+        "timeToPeak": prediction["current"]["timeToPeak"],
+        "depth": prediction["forecast"]["maxWaterDepth"]
+    }
+
+
+def candidate_from_dl(summary: Dict) -> Dict:
+    """Candidate from a DL prediction summary (one alert per basin)"""
+    return {
+        "key": f"dl_{summary['basin']}",
+        "predictionId": summary["prediction_id"],
+        "name": summary["region"],
+        "severity": summary["severity"],
+        "timeToPeak": None,
+        "depth": summary["peak_depth"]
+    }
+
+
+def candidate_from_run(risk_summary: Dict) -> Dict:
+    """Candidate from a pipeline run's risk_summary.json"""
+    return {
+        "key": f"run_{risk_summary['location']}",
+        "predictionId": risk_summary["id"],
+        "name": risk_summary["location"],
+        "severity": risk_summary["severityLevel"],
+        "timeToPeak": None,
+        "depth": risk_summary.get("waterLevel")
+    }
+
+
+# ============================================================================
+# Helpers
+# ============================================================================
+
+def _build_alert(rule: AlertRule, candidate: Dict) -> Dict:
+    name = candidate["name"]
+    severity = candidate["severity"]
+    return {
+        "id": "alert_" + re.sub(r"[^a-z0-9]+", "_", f"{candidate['key']}_{rule.type}".lower()).strip("_"),
+        "predictionId": candidate["predictionId"],
+        "type": rule.type,
+        "severity": severity,
+        "title": f"{name} - {'Critical Flood Alert' if severity == 'CRITICAL' else 'Severe Flood Warning'}",
+        "description": _describe(candidate),
+        "affectedRegions": AFFECTED_REGIONS.get(name, [name]),
+        "actions": SAFETY_ACTIONS.get(severity, SAFETY_ACTIONS["HIGH"])
+    }
+
+
+def _describe(candidate: Dict) -> str:
+    name = candidate["name"]
+    details = []
+    if candidate.get("timeToPeak") is not None:
+        details.append(f"Peak flooding expected in {candidate['timeToPeak']} hours")
+    if candidate.get("depth") is not None:
+        details.append(f"water depth up to {candidate['depth']} meters")
+    sentence = " with ".join(details)
+    detail = f" {sentence[0].upper()}{sentence[1:]}." if sentence else ""
+
+    if candidate["severity"] == "CRITICAL":
+        return f"Extreme flood conditions predicted in {name}.{detail} Immediate evacuation advised for riverside areas."
+    return f"High flood risk predicted in {name}.{detail}"
+
+
+def _content(alert: Dict) -> Tuple:
+    """Fields whose change makes an alert 'updated' (not timestamps)"""
+    return tuple(alert[k] for k in ("predictionId", "severity", "title", "description"))
+
+
+def _iso(value: datetime) -> str:
+    return value.replace(microsecond=0).isoformat() + "Z"
+
+
+alert_engine = AlertEngine(RULES)
+
+if settings.MOCK_MODE:
+    alert_engine.watch(
+        "mock",
+        lambda: mock_service.snapshot().cycle_id,
+        lambda: [candidate_from_mock(p) for p in mock_service.snapshot().predictions["predictions"]]
+    )
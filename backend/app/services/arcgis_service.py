@@ -2,13 +2,19 @@
 ArcGIS Integration Service for Flood Simulation Visualization
 Provides methods to generate simulation frames using ArcGIS APIs
 """
-from typing import Dict, Optional, List
+from typing import TYPE_CHECKING, Dict, Optional, List
 from datetime import datetime, timedelta
 import json
 import io
-from PIL import Image, ImageDraw
+import time
 import math
 
+if TYPE_CHECKING:
+    from PIL import Image
+
+# PIL is imported by the renderers on first use, so API start-up (and every
+# router that only reads the render counters) does not load it
+
 class ArcGISService:
     """Service to integrate ArcGIS with flood simulation data"""
     
@@ -18,6 +24,13 @@ class ArcGISService:
         self.elevation_service_url = "https://elevation.arcgisonline.com/arcgis/rest/services/WorldElevation/1/ImageServer"
         self.world_imagery_url = f"{self.arcgis_base_url}/World_Imagery/MapServer"
         
+        # Renderer counters (exported by app/services/metrics.py)
+        self.frames_rendered = 0
+        self.tiles_rendered = 0
+        self.render_errors = 0
+        self.render_seconds = 0.0
+        self.rendered_bytes = 0
+        
     async def generate_simulation_frame(
         self,
         prediction_id: str,
@@ -46,6 +59,7 @@ class ArcGISService:
         Returns:
             PNG image bytes
         """
+        started = time.perf_counter()
         try:
             # Create base image with gradient representing terrain
             img = self._create_base_terrain(width, height, depth)
@@ -64,14 +78,21 @@ class ArcGISService:
             img.save(img_bytes, format='PNG', quality=85)
             img_bytes.seek(0)
             
-            return img_bytes.getvalue()
+            png = img_bytes.getvalue()
+            self.frames_rendered += 1
+            self.rendered_bytes += len(png)
+            return png
             
         except Exception as e:
+            self.render_errors += 1
             print(f"Error generating simulation frame: {e}")
             raise
+        finally:
+            self.render_seconds += time.perf_counter() - started
     
-    def _create_base_terrain(self, width: int, height: int, depth: float) -> Image.Image:
+    def _create_base_terrain(self, width: int, height: int, depth: float) -> "Image.Image":
         """Create base terrain image"""
+        from PIL import Image, ImageDraw
         img = Image.new('RGB', (width, height), color='#2D5016')  # Green base
         draw = ImageDraw.Draw(img, 'RGBA')
         
@@ -91,8 +112,9 @@ class ArcGISService:
         
         return img
     
-    def _add_flood_overlay(self, img: Image.Image, depth: float, width: int, height: int) -> Image.Image:
+    def _add_flood_overlay(self, img: "Image.Image", depth: float, width: int, height: int) -> "Image.Image":
         """Add flood visualization based on depth"""
+        from PIL import ImageDraw
         draw = ImageDraw.Draw(img, 'RGBA')
         
         # Color mapping based on depth
@@ -126,8 +148,9 @@ class ArcGISService:
         
         return img
     
-    def _add_grid(self, img: Image.Image, bounds: Dict, width: int, height: int) -> Image.Image:
+    def _add_grid(self, img: "Image.Image", bounds: Dict, width: int, height: int) -> "Image.Image":
         """Add coordinate grid to image"""
+        from PIL import ImageDraw
         draw = ImageDraw.Draw(img, 'RGBA')
         
         # Draw grid lines
@@ -152,13 +175,14 @@ class ArcGISService:
     
     def _add_metadata(
         self,
-        img: Image.Image,
+        img: "Image.Image",
         time_offset: int,
         depth: float,
         lat: float,
         lon: float
-    ) -> Image.Image:
+    ) -> "Image.Image":
         """Add metadata text to image"""
+        from PIL import ImageDraw
         draw = ImageDraw.Draw(img, 'RGBA')
         
         # Background for text
@@ -330,13 +354,19 @@ class ArcGISService:
             # https://server.arcgisonline.com/ArcGIS/rest/services/World_Imagery/MapServer/tile/{z}/{y}/{x}
             
             # For now, return placeholder
+            from PIL import Image
             img = Image.new('RGB', (256, 256), color='#2D5016')
             img_bytes = io.BytesIO()
             img.save(img_bytes, format='PNG')
             img_bytes.seek(0)
-            return img_bytes.getvalue()
+            
+            png = img_bytes.getvalue()
+            self.tiles_rendered += 1
+            self.rendered_bytes += len(png)
+            return png
             
         except Exception as e:
+            self.render_errors += 1
             print(f"Error fetching base map tile: {e}")
             return None
 
@@ -0,0 +1,287 @@
+"""
+Artifact Store Service
+Serves pipeline outputs from data_store/runs over HTTP with Range support.
+
+Paths are validated against the runs directory before any file is opened.
+Validators (strong ETag, Last-Modified) come from file metadata, so nothing
+is hashed or read to answer conditional requests. Bodies are streamed with
+the ASGI zero-copy send extension when the server offers it, and otherwise
+with positional reads off the event loop, so a Cloud Optimized GeoTIFF
+client fetching a few blocks only costs those blocks.
+"""
+import mimetypes
+import os
+import re
+import secrets
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import anyio
+from starlette.responses import Response
+
+from app.config import settings
+
+CHUNK_SIZE = 256 * 1024
+
+# More ranges than this in one request are refused (416) instead of
+# being turned into an oversized multipart response
+MAX_RANGES = 32
+
+RUN_ID_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]*$")
+
+CONTENT_TYPES = {
+    ".tif": "image/tiff",
+    ".tiff": "image/tiff",
+    ".nc": "application/x-netcdf",
+    ".json": "application/json",
+    ".geojson": "application/geo+json",
+    ".csv": "text/csv",
+    ".log": "text/plain",
+}
+
+ByteRange = Tuple[int, int]  # inclusive (first, last)
+
+
+class RangeNotSatisfiable(Exception):
+    """No requested range overlaps the file (or too many ranges)"""
+
+
+class ArtifactStore:
+    """Read-only view of the pipeline runs directory"""
+
+    def __init__(self, runs_dir: Path):
+        self.runs_dir = runs_dir
+
+    def resolve(self, run_id: str, relative_path: str = "") -> Path:
+        """
+        Map a run ID and artifact path to a file or directory inside the run.
+
+        Raises:
+            ValueError: Malformed run ID or path (absolute, `..`, hidden parts)
+            FileNotFoundError: Nothing at that path
+        """
+        if not RUN_ID_PATTERN.match(run_id):
+            raise ValueError(f"Invalid run ID: {run_id}")
+
+        parts = [part for part in relative_path.split("/") if part]
+        if relative_path.startswith("/") or "\\" in relative_path or any(
+            part in (".", "..") or part.startswith(".") for part in parts
+        ):
+            raise ValueError(f"Invalid artifact path: {relative_path}")
+
+        root = (self.runs_dir / run_id).resolve()
+        target = root.joinpath(*parts).resolve()
+        # resolve() follows symlinks, so a link pointing outside the run is caught here
+        if target != root and root not in target.parents:
+            raise ValueError(f"Invalid artifact path: {relative_path}")
+        if not target.exists() or root.parent != self.runs_dir.resolve():
+            raise FileNotFoundError(f"{run_id}/{relative_path}")
+        return target
+
+    def list_run(self, run_id: str) -> List[Dict]:
+        """Every servable file of a run with its size and validators"""
+        root = self.resolve(run_id)
+        if not root.is_dir():
+            raise FileNotFoundError(run_id)
+
+        files = []
+        for path in sorted(root.rglob("*")):
+            relative = path.relative_to(root)
+            if any(part.startswith(".") for part in relative.parts) or not path.is_file():
+                continue
+            stat = path.stat()
+            files.append({
+                "path": relative.as_posix(),
+                "size": stat.st_size,
+                "modified": formatdate(stat.st_mtime, usegmt=True),
+                "etag": etag_for(stat),
+                "contentType": content_type_for(path),
+                "url": f"/api/artifacts/{run_id}/{relative.as_posix()}"
+            })
+        return files
+
+
+def etag_for(stat: os.stat_result) -> str:
+    """Strong validator from inode, size and nanosecond mtime"""
+    return f'"{stat.st_ino:x}-{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+
+
+def content_type_for(path: Path) -> str:
+    return CONTENT_TYPES.get(path.suffix.lower()) or mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+
+
+def parse_range(header: str, size: int) -> Optional[List[ByteRange]]:
+    """
+    Parse a `Range: bytes=...` header into sorted, merged inclusive ranges.
+
+    Returns None when the header is malformed or not a byte range (the
+    caller then serves the whole file, as RFC 9110 allows).
+
+    Raises:
+        RangeNotSatisfiable: No range overlaps the file, or too many ranges
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or not spec.strip():
+        return None
+
+    ranges = []
+    for part in spec.split(","):
+        first, dash, last = part.strip().partition("-")
+        if not dash:
+            return None
+        try:
+            if first == "":
+                # Suffix range: the last N bytes
+                length = int(last)
+                if length == 0:
+                    continue
+                ranges.append((max(size - length, 0), size - 1))
+            else:
+                start = int(first)
+                end = int(last) if last else None
+                if end is not None and end < start:
+                    return None
+                if start < size:
+                    ranges.append((start, size - 1 if end is None else min(end, size - 1)))
+        except ValueError:
+            return None
+
+    if not ranges or len(ranges) > MAX_RANGES:
+        raise RangeNotSatisfiable()
+
+    ranges.sort()
+    merged = [ranges[0]]
+    for start, end in ranges[1:]:
+        if start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def is_fresh(headers, etag: str, mtime: float) -> bool:
+    """If-None-Match / If-Modified-Since evaluation (True = send 304)"""
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in tags or etag in tags or f"W/{etag}" in tags
+    return _not_modified_since(headers.get("if-modified-since"), mtime)
+
+
+def range_applies(headers, etag: str, mtime: float) -> bool:
+    """If-Range: honor Range only while the client's copy is current"""
+    if_range = headers.get("if-range")
+    if if_range is None:
+        return True
+    if_range = if_range.strip()
+    if if_range.startswith('"') or if_range.startswith("W/"):
+        # Strong comparison: weak tags never match
+        return if_range == etag
+    # A date only validates when it is exactly the file's Last-Modified
+    try:
+        return parsedate_to_datetime(if_range).timestamp() == int(mtime)
+    except (TypeError, ValueError):
+        return False
+
+
+def _not_modified_since(value: Optional[str], mtime: float) -> bool:
+    if not value:
+        return False
+    try:
+        return int(mtime) <= parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return False
+
+
+class ArtifactResponse(Response):
+    """
+    Whole-file, single-range or multipart/byteranges response for a file.
+
+    The body is never loaded into memory: each range is sent either as a
+    zero-copy file segment or as CHUNK_SIZE positional reads.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        stat: os.stat_result,
+        ranges: Optional[List[ByteRange]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        send_body: bool = True
+    ):
+        super().__init__(status_code=206 if ranges else 200, headers=headers)
+        self.path = path
+        self.size = stat.st_size
+        self.send_body = send_body
+        content_type = content_type_for(path)
+
+        if not ranges:
+            self.segments = [(None, 0, self.size)]
+            self.media_type = content_type
+            length = self.size
+        elif len(ranges) == 1:
+            first, last = ranges[0]
+            self.segments = [(None, first, last - first + 1)]
+            self.media_type = content_type
+            self.headers["content-range"] = f"bytes {first}-{last}/{self.size}"
+            length = last - first + 1
+        else:
+            boundary = secrets.token_hex(12)
+            self.media_type = f"multipart/byteranges; boundary={boundary}"
+            self.segments = []
+            for first, last in ranges:
+                part_header = (
+                    f"--{boundary}\r\nContent-Type: {content_type}\r\n"
+                    f"Content-Range: bytes {first}-{last}/{self.size}\r\n\r\n"
+                ).encode("latin-1")
+                self.segments.append((part_header, first, last - first + 1))
+            self.trailer = f"\r\n--{boundary}--\r\n".encode("latin-1")
+            length = sum(len(h) + count for h, _, count in self.segments) + \
+                2 * (len(self.segments) - 1) + len(self.trailer)
+
+        self.headers["content-type"] = self.media_type
+        self.headers["content-length"] = str(length)
+        self.headers["accept-ranges"] = "bytes"
+
+    async def __call__(self, scope, receive, send):
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if not self.send_body:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        zero_copy = "http.response.zerocopysend" in scope.get("extensions", {})
+        multipart = self.segments[0][0] is not None
+        file = await anyio.to_thread.run_sync(open, self.path, "rb")
+        try:
+            for i, (part_header, offset, count) in enumerate(self.segments):
+                if part_header is not None:
+                    prefix = (b"\r\n" if i else b"") + part_header
+                    await send({"type": "http.response.body", "body": prefix, "more_body": True})
+                more = multipart or i < len(self.segments) - 1
+                if zero_copy:
+                    await send({
+                        "type": "http.response.zerocopysend",
+                        "file": file, "offset": offset, "count": count, "more_body": more
+                    })
+                else:
+                    await self._send_chunks(send, file.fileno(), offset, count, more)
+            if multipart:
+                await send({"type": "http.response.body", "body": self.trailer, "more_body": False})
+        finally:
+            file.close()
+
+    @staticmethod
+    async def _send_chunks(send, fd: int, offset: int, count: int, more_body: bool):
+        end = offset + count
+        while True:
+            size = min(CHUNK_SIZE, end - offset)
+            chunk = await anyio.to_thread.run_sync(os.pread, fd, size, offset) if size else b""
+            offset += len(chunk)
+            last = offset >= end or not chunk
+            await send({"type": "http.response.body", "body": chunk, "more_body": more_body or not last})
+            if last:
+                return
+
+
+artifact_store = ArtifactStore(Path(settings.RUNS_DIR))
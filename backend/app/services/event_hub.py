@@ -0,0 +1,214 @@
+"""
+Event Hub Service
+In-process broadcast hub that pushes prediction and alert events to
+Server-Sent Events subscribers.
+
+With several workers (WORKERS > 1) events are also appended to the shared
+event log; each worker relays the events published by the others to its
+own subscribers, and event ids come from the log so they agree everywhere.
+
+A reconnecting client (Last-Event-ID) is sent the events it missed from the
+last `SSE_REPLAY_EVENTS` (a ring buffer, or the shared log with several
+workers). When its id is older than that, or from before a restart, it
+gets a `reset` event and should reload its state.
+"""
+import asyncio
+import json
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Deque, Dict, List, Optional, Set, Tuple
+
+from app.config import settings
+from app.services.shared_state import shared_state
+
+
+class Subscriber:
+    """A single connected client with its own bounded queue of (event id, frame)"""
+
+    def __init__(self, max_queue_size: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue_size)
+        self.evicted = False
+        self.connected_at = datetime.utcnow()
+
+
+class EventHub:
+    """
+    Fan out events to every connected subscriber.
+
+    Publishing never blocks: each subscriber has a bounded queue and a
+    client that falls behind is evicted instead of slowing down ingest
+    or the other subscribers.
+    """
+
+    def __init__(self, max_queue_size: int = 100, replay_size: int = 500):
+        self.max_queue_size = max_queue_size
+        self.replay_size = replay_size
+        self._subscribers: Set[Subscriber] = set()
+        self._history: Deque[Tuple[int, str]] = deque(maxlen=replay_size)
+        # publish() may run in worker threads (alert evaluation); fan-out
+        # to the asyncio queues always happens on the serving loop
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._event_id = 0
+        self._relay_task: Optional[asyncio.Task] = None
+        self._relayed_id = 0
+        self._local_ids: Set[int] = set()
+        self.published_count = 0
+        self.evicted_count = 0
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self) -> Subscriber:
+        """Register a new subscriber"""
+        subscriber = Subscriber(self.max_queue_size)
+        self._loop = asyncio.get_running_loop()
+        self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        """Remove a subscriber (safe to call more than once)"""
+        self._subscribers.discard(subscriber)
+
+    def publish(self, event_type: str, data: Dict) -> int:
+        """
+        Broadcast an event to all subscribers.
+
+        The event is serialized once and the same SSE frame is queued for
+        every client. Safe to call from worker threads. Returns the event id.
+        """
+        payload = _encode(data)
+        with self._lock:
+            if shared_state is not None:
+                self._event_id = shared_state.append_event(event_type, payload)
+                if self._relay_task is not None:
+                    self._local_ids.add(self._event_id)
+            else:
+                self._event_id += 1
+            event_id = self._event_id
+            frame = _frame(event_type, payload, event_id)
+            self._history.append((event_id, frame))
+            self.published_count += 1
+
+        if self._loop is not None and _running_loop() is not self._loop:
+            self._loop.call_soon_threadsafe(self._broadcast, event_id, frame)
+        else:
+            self._broadcast(event_id, frame)
+        return event_id
+
+    async def replay(self, last_event_id: int) -> Optional[List[Tuple[int, str]]]:
+        """
+        (event id, frame) for every event after last_event_id, oldest first.
+
+        Returns None when some of them are no longer retained (or the id is
+        from before a restart), i.e. the client must resynchronize.
+        """
+        if shared_state is not None:
+            # Starting at last_event_id itself: if it is gone, events were pruned
+            rows = await asyncio.to_thread(shared_state.events_since, last_event_id - 1, self.replay_size + 2)
+            if not rows or rows[0][0] != last_event_id or len(rows) > self.replay_size + 1:
+                return None
+            return [(event_id, _frame(event_type, payload, event_id)) for event_id, event_type, payload in rows[1:]]
+
+        with self._lock:
+            current = self._event_id
+            missed = [(event_id, frame) for event_id, frame in self._history if event_id > last_event_id]
+        if last_event_id > current:
+            return None
+        oldest = missed[0][0] if missed else current + 1
+        if oldest != last_event_id + 1:
+            return None
+        return missed
+
+    def _broadcast(self, event_id: int, frame: str):
+        for subscriber in list(self._subscribers):
+            try:
+                subscriber.queue.put_nowait((event_id, frame))
+            except asyncio.QueueFull:
+                self._evict(subscriber)
+
+    # ------------------------------------------------------------------
+    # Cross-worker relay
+    # ------------------------------------------------------------------
+
+    async def start(self):
+        """Start relaying other workers' events (no-op with one worker)"""
+        if shared_state is None or self._relay_task is not None:
+            return
+        self._relayed_id = await asyncio.to_thread(shared_state.last_event_id)
+        self._relay_task = asyncio.create_task(self._relay())
+
+    async def stop(self):
+        if self._relay_task is not None:
+            self._relay_task.cancel()
+            try:
+                await self._relay_task
+            except asyncio.CancelledError:
+                pass
+            self._relay_task = None
+
+    async def _relay(self):
+        while True:
+            await asyncio.sleep(settings.SSE_RELAY_INTERVAL_SECONDS)
+            try:
+                rows = await asyncio.to_thread(shared_state.events_since, self._relayed_id)
+            except Exception as e:
+                print(f"⚠️  Event relay failed: {e}")
+                continue
+            for event_id, event_type, payload in rows:
+                self._relayed_id = event_id
+                if event_id in self._local_ids:
+                    # Already delivered to this worker's subscribers
+                    self._local_ids.discard(event_id)
+                elif self._subscribers:
+                    self._broadcast(event_id, _frame(event_type, payload, event_id))
+
+    def _evict(self, subscriber: Subscriber):
+        """Drop a slow consumer and wake its stream so it can close"""
+        self._subscribers.discard(subscriber)
+        subscriber.evicted = True
+        self.evicted_count += 1
+
+        # Make room for a final notice so the client knows to reconnect. It
+        # carries no id: the client's Last-Event-ID must stay at the last event
+        # it received, so the dropped ones are replayed on reconnect
+        while not subscriber.queue.empty():
+            subscriber.queue.get_nowait()
+        subscriber.queue.put_nowait((None, self.format_event("evicted", {"reason": "slow consumer"})))
+
+    @staticmethod
+    def format_event(event_type: str, data: Dict, event_id: Optional[int] = None) -> str:
+        """Encode an event as a Server-Sent Events frame"""
+        return _frame(event_type, _encode(data), event_id)
+
+
+def _encode(data: Dict) -> str:
+    return json.dumps(data, default=_json_default, separators=(",", ":"))
+
+
+def _frame(event_type: str, payload: str, event_id: Optional[int] = None) -> str:
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event_type}")
+    lines.append(f"data: {payload}")
+    return "\n".join(lines) + "\n\n"
+
+
+def _running_loop() -> Optional[asyncio.AbstractEventLoop]:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+def _json_default(value):
+    """Serialize datetimes as ISO 8601, anything else as a string"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+event_hub = EventHub(max_queue_size=settings.SSE_QUEUE_SIZE, replay_size=settings.SSE_REPLAY_EVENTS)
@@ -0,0 +1,449 @@
+"""
+Metrics Service
+Dependency-free Prometheus instrumentation for the API.
+
+`MetricsMiddleware` records per-route, per-status latency and response-size
+histograms plus an in-flight gauge with a couple of dict lookups per
+request. Service counters (caches, renderers, ingest, alerts) are pulled
+from the owning singletons at scrape time, and everything is rendered in
+the Prometheus text exposition format at `/metrics`.
+
+With several workers (WORKERS > 1) a scrape reaches one random process,
+so each worker also flushes a snapshot of its metrics to
+`STATE_DIR/metrics/<instance>.json` (`MultiprocessMetrics`) and `/metrics`
+renders the merge: counters and histograms summed over the live workers'
+snapshots, and gauges labelled with each worker's `pid`. Gauges read from
+state all workers share (the job queues, the shared prediction store) are
+reported once, from the scraped worker, without a `pid` label. A worker
+removes its snapshot when it stops; snapshots not refreshed for three
+flush intervals (a crashed worker) are deleted at the next scrape.
+"""
+import asyncio
+import json
+import os
+import time
+from bisect import bisect_left
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from app.services.alert_dispatch import alert_dispatcher
+from app.services.alert_engine import alert_engine
+from app.services.arcgis_service import arcgis_service
+from app.services.event_hub import event_hub
+from app.services.pipeline_jobs import pipeline_jobs
+from app.services.prediction_store import prediction_store
+from app.services.response_cache import response_cache
+from app.services.shared_state import INSTANCE_ID
+from app.config import settings
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+LabelValues = Tuple[str, ...]
+
+
+class Metric:
+    """Base class: a named metric family with fixed label names"""
+
+    type = "untyped"
+    shared = False
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    @property
+    def family_name(self) -> str:
+        """Name in the HELP/TYPE lines; must match the sample names"""
+        return self.name
+
+    def samples(self) -> Iterable[Tuple[str, Dict[str, str], float]]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    @property
+    def family_name(self) -> str:
+        return self.name + "_total"
+
+    def samples(self):
+        for labels, value in self._values.items():
+            yield self.family_name, dict(zip(self.labelnames, labels)), value
+
+
+class Gauge(Metric):
+    type = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), shared: bool = False):
+        super().__init__(name, documentation, labelnames)
+        # Same value in every worker (read from shared state): not merged per pid
+        self.shared = shared
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def dec(self, *labels: str, amount: float = 1.0):
+        self._values[labels] = self._values.get(labels, 0.0) - amount
+
+    def set(self, value: float, *labels: str):
+        self._values[labels] = value
+
+    def samples(self):
+        for labels, value in self._values.items():
+            yield self.name, dict(zip(self.labelnames, labels)), value
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts..., +Inf count, sum]
+        self._values: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, *labels: str):
+        series = self._values.get(labels)
+        if series is None:
+            series = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def samples(self):
+        for labels, series in self._values.items():
+            base = dict(zip(self.labelnames, labels))
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                yield self.name + "_bucket", {**base, "le": _format_value(bound)}, cumulative
+            cumulative += series[len(self.buckets)]
+            yield self.name + "_bucket", {**base, "le": "+Inf"}, cumulative
+            yield self.name + "_count", base, cumulative
+            yield self.name + "_sum", base, series[-1]
+
+
+class Registry:
+    """Metric families plus scrape-time collectors"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._collectors: List[Callable[[], Iterable[Metric]]] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def add_collector(self, collector: Callable[[], Iterable[Metric]]):
+        """Register a callable returning freshly filled metrics at scrape time"""
+        self._collectors.append(collector)
+
+    def collect(self) -> List[Metric]:
+        """Registered metrics plus freshly collected service metrics"""
+        families = list(self._metrics.values())
+        for collector in self._collectors:
+            try:
+                families.extend(collector())
+            except Exception as e:
+                print(f"⚠️  Metrics collector failed: {e}")
+        return families
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        return render_families(self.collect())
+
+
+def render_families(families: Iterable[Metric]) -> str:
+    lines = []
+    for metric in families:
+        lines.append(f"# HELP {metric.family_name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.family_name} {metric.type}")
+        for name, labels, value in metric.samples():
+            lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+class MultiprocessMetrics:
+    """
+    Per-worker metric snapshots in a shared directory, merged at scrape time.
+
+    Each worker rewrites its own file every `flush_seconds` and before
+    answering a scrape, so merged values lag other workers by at most one
+    flush interval.
+    """
+
+    def __init__(self, directory: Path, instance_id: str, flush_seconds: float = 5.0):
+        self.directory = directory
+        self.instance_id = instance_id
+        self.flush_seconds = flush_seconds
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def path(self) -> Path:
+        return self.directory / f"{self.instance_id}.json"
+
+    def flush(self, source: "Registry"):
+        """Write this worker's current values (atomically)"""
+        self._write(source.collect())
+
+    def _write(self, families: List[Metric]):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        snapshot = {
+            "pid": os.getpid(),
+            "families": [
+                {
+                    "name": metric.name,
+                    "type": metric.type,
+                    "documentation": metric.documentation,
+                    "labelnames": list(metric.labelnames),
+                    "buckets": list(getattr(metric, "buckets", ())),
+                    "values": [[list(labels), value] for labels, value in metric._values.items()]
+                }
+                for metric in families
+                if not metric.shared
+            ]
+        }
+        staging = self.path.with_name(f".{self.path.name}.tmp")
+        staging.write_text(json.dumps(snapshot, separators=(",", ":")))
+        os.replace(staging, self.path)
+
+    def render(self, source: "Registry") -> str:
+        """Merged exposition of every live worker's snapshot"""
+        families = source.collect()
+        self._write(families)
+        live_after = time.time() - 3 * self.flush_seconds
+        merged: Dict[str, Metric] = {}
+        for path in sorted(self.directory.glob("*.json")):
+            try:
+                if path.stat().st_mtime < live_after:
+                    # Its worker exited without cleaning up (or is wedged)
+                    path.unlink(missing_ok=True)
+                    continue
+                snapshot = json.loads(path.read_text())
+            except (OSError, ValueError):
+                continue
+            for family in snapshot["families"]:
+                metric = merged.get(family["name"])
+                if metric is None:
+                    metric = merged[family["name"]] = _empty_family(family)
+                for labels, value in family["values"]:
+                    labels = tuple(labels)
+                    if metric.type == "gauge":
+                        metric._values[labels + (str(snapshot["pid"]),)] = value
+                    elif metric.type == "histogram":
+                        series = metric._values.get(labels)
+                        metric._values[labels] = value if series is None else [a + b for a, b in zip(series, value)]
+                    else:
+                        metric._values[labels] = metric._values.get(labels, 0.0) + value
+        for metric in families:
+            if metric.shared:
+                merged[metric.name] = metric
+        return render_families(merged.values())
+
+    async def start(self, source: "Registry"):
+        self._task = asyncio.create_task(self._flusher(source))
+
+    async def stop(self):
+        """Stop flushing and withdraw this worker's snapshot"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        self.path.unlink(missing_ok=True)
+
+    async def _flusher(self, source: "Registry"):
+        while True:
+            await asyncio.sleep(self.flush_seconds)
+            try:
+                self.flush(source)
+            except Exception as e:
+                print(f"⚠️  Metrics flush failed: {e}")
+
+
+def _empty_family(family: Dict) -> Metric:
+    labelnames = tuple(family["labelnames"])
+    if family["type"] == "histogram":
+        return Histogram(family["name"], family["documentation"], labelnames, family["buckets"])
+    if family["type"] == "gauge":
+        return Gauge(family["name"], family["documentation"], labelnames + ("pid",))
+    return Counter(family["name"], family["documentation"], labelnames)
+
+
+registry = Registry()
+
+# Cross-worker aggregation (None with a single worker)
+multiprocess_metrics = MultiprocessMetrics(
+    Path(settings.STATE_DIR) / "metrics", INSTANCE_ID, settings.METRICS_FLUSH_SECONDS
+) if settings.WORKERS > 1 else None
+
+
+def render_metrics() -> str:
+    """Exposition for /metrics: this process, or the merge of all workers"""
+    if multiprocess_metrics is not None:
+        return multiprocess_metrics.render(registry)
+    return registry.render()
+
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template",
+    ("method", "route", "status")
+)
+http_response_size = registry.histogram(
+    "http_response_size_bytes", "HTTP response body size by route template",
+    ("method", "route"), buckets=SIZE_BUCKETS
+)
+http_requests_in_flight = registry.gauge(
+    "http_requests_in_flight", "HTTP requests currently being served", ("method",)
+)
+http_streams = registry.counter(
+    "http_streams", "Streaming (SSE) responses opened, excluded from latency", ("route",)
+)
+dl_ingest = registry.counter(
+    "dl_ingest", "Deep learning predictions ingested", ("severity",)
+)
+dl_ingest_duration = registry.histogram(
+    "dl_ingest_duration_seconds", "Time spent storing, indexing and fanning out an ingest"
+)
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware (no BaseHTTPMiddleware task overhead).
+
+    The route label is the matched path template (e.g.
+    `/api/simulation/{prediction_id}`), taken from the endpoint the router
+    stores in the scope, so cardinality stays bounded by the route table.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._templates: Dict[Callable, str] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        state = {"status": 500, "size": 0, "streaming": False}
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                state["status"] = message["status"]
+                for key, value in message.get("headers", ()):
+                    if key == b"content-type" and value.startswith(b"text/event-stream"):
+                        state["streaming"] = True
+            elif message["type"] == "http.response.body":
+                state["size"] += len(message.get("body", b""))
+            await send(message)
+
+        http_requests_in_flight.inc(method)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_requests_in_flight.dec(method)
+            route = self._route_template(scope)
+            if state["streaming"]:
+                http_streams.inc(route)
+            else:
+                http_request_duration.observe(time.perf_counter() - started, method, route, str(state["status"]))
+                http_response_size.observe(state["size"], method, route)
+
+    def _route_template(self, scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        template = self._templates.get(endpoint)
+        if template is None:
+            app = scope.get("app")
+            template = next(
+                (route.path for route in getattr(app, "routes", ()) if getattr(route, "endpoint", None) is endpoint),
+                getattr(endpoint, "__name__", "unknown")
+            )
+            self._templates[endpoint] = template
+        return template
+
+
+def _service_metrics() -> List[Metric]:
+    """Counters owned by the service singletons, read at scrape time"""
+    metrics: List[Metric] = []
+
+    def add(metric: Metric, value: float, *labels: str):
+        if isinstance(metric, Counter):
+            metric.inc(*labels, amount=value)
+        else:
+            metric.set(value, *labels)
+        if metric not in metrics:
+            metrics.append(metric)
+
+    cache = response_cache.stats()
+    lookups = Counter("response_cache_lookups", "Response cache lookups by result", ("result",))
+    for result in ("hits", "misses", "not_modified"):
+        add(lookups, cache[result], result)
+    add(Gauge("response_cache_entries", "Cached response payloads"), cache["entries"])
+
+    add(Counter("renderer_frames", "Simulation frames rendered"), arcgis_service.frames_rendered)
+    add(Counter("renderer_tiles", "Base map tiles rendered"), arcgis_service.tiles_rendered)
+    add(Counter("renderer_errors", "Frame or tile renders that failed"), arcgis_service.render_errors)
+    add(Counter("renderer_seconds", "Time spent rendering frames"), arcgis_service.render_seconds)
+    add(Counter("renderer_bytes", "PNG bytes produced by the renderers"), arcgis_service.rendered_bytes)
+
+    add(Gauge("prediction_store_predictions", "DL predictions held in the prediction store",
+              shared=prediction_store.shared), len(prediction_store))
+
+    add(Gauge("alerts_version", "Materialized alert set version"), alert_engine.version)
+    add(Gauge("alerts_active", "Currently active alerts"), len(alert_engine.current()["alerts"]))
+    jobs = Gauge("alert_dispatch_jobs", "Alert notification jobs by status", ("status",), shared=True)
+    for status, count in alert_dispatcher.queue.counts().items():
+        add(jobs, count, status)
+
+    pipeline = Gauge("pipeline_jobs", "Pipeline run jobs by status", ("status",), shared=True)
+    for status, count in pipeline_jobs.queue.counts().items():
+        add(pipeline, count, status)
+
+    add(Gauge("sse_subscribers", "Connected Server-Sent Events clients"), event_hub.subscriber_count)
+    add(Counter("sse_events_published", "Events published to SSE subscribers"), event_hub.published_count)
+    add(Counter("sse_subscribers_evicted", "Slow SSE clients evicted"), event_hub.evicted_count)
+    return metrics
+
+
+registry.add_collector(_service_metrics)
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        f'{key}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(10), chr(92) + "n").replace(chr(34), chr(92) + chr(34))}"'
+        for key, value in labels.items()
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value)) if abs(value) < 1e15 else repr(value)
+    return repr(value) if isinstance(value, float) else str(value)
@@ -1,9 +1,71 @@
 from datetime import datetime, timedelta
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
+import math
 import random
+import threading
+
+from app.schemas.models import (
+    PredictionsResponse,
+    SeverityLevelsResponse,
+    SimulationResponse,
+)
+from app.services.serialization import dumps
+
+# IMD forecast cycles are issued every 6 hours (00, 06, 12, 18 UTC)
+FORECAST_CYCLE_HOURS = 6
+
+# Synthetic river gauges report every 15 minutes; a monsoon season is Jun-Sep
+GAUGE_INTERVAL_SECONDS = 15 * 60
+MONSOON_SEASON_DAYS = 122
+
+
+class MockSnapshot:
+    """
+    Every mock response for one forecast cycle, materialized once.
+    
+    Holds both the response dicts (for internal callers such as the ArcGIS
+    router) and their validated, pre-serialized JSON bytes (for the API).
+    """
+    
+    def __init__(self, cycle_start: datetime):
+        self.cycle_start = cycle_start
+        self.cycle_id = f"IMD_{cycle_start.strftime('%Y%m%d_%H')}"
+        self.cycle_end = cycle_start + timedelta(hours=FORECAST_CYCLE_HOURS)
+        
+        # Seeded per cycle so every request in the cycle sees the same values
+        self.predictions = MockDataService._build_current_predictions(
+            cycle_start, random.Random(f"{self.cycle_id}:predictions")
+        )
+        self.severity_levels = MockDataService.get_severity_levels()
+        
+        hydrograph_rng = random.Random(f"{self.cycle_id}:hydrographs")
+        self.simulations = {}
+        self.hydrographs = {}
+        for loc in MockDataService.LOCATIONS:
+            self.simulations[loc["id"]] = MockDataService._build_simulation_frames(loc["id"], cycle_start)
+            self.hydrographs[loc["id"]] = MockDataService._build_hydrograph(loc["id"], cycle_start, hydrograph_rng)
+        
+        self.predictions_json = _to_json(PredictionsResponse, self.predictions)
+        self.severity_levels_json = _to_json(SeverityLevelsResponse, self.severity_levels)
+        self.simulations_json = {
+            pid: _to_json(SimulationResponse, data) for pid, data in self.simulations.items()
+        }
+
+
+def _to_json(model, data: Dict) -> bytes:
+    """
+    Serialize once per cycle (validated unless FAST_RESPONSES is on), by
+    alias so both modes emit the same field names (e.g. "class")
+    """
+    return dumps(data, model, by_alias=True)
 
 class MockDataService:
-    """Generates realistic mock data for West Bengal flood predictions"""
+    """
+    Generates realistic mock data for West Bengal flood predictions.
+    
+    Responses are built once per forecast cycle (see MockSnapshot) and
+    served from the snapshot until the next cycle starts.
+    """
     
     # West Bengal locations with realistic coordinates
     LOCATIONS = [
@@ -99,18 +161,59 @@ class MockDataService:
         }
     ]
     
-    @staticmethod
-    def get_current_predictions() -> Dict:
-        """Generate current predictions for all locations"""
+    def __init__(self):
+        self._snapshot: Optional[MockSnapshot] = None
+        self._rebuild_lock = threading.Lock()
+    
+    def snapshot(self) -> MockSnapshot:
+        """
+        Current cycle's snapshot, rebuilt at cycle rollover.
+        
+        The new snapshot is built completely before it replaces the old one,
+        so concurrent readers always see a consistent response set.
+        """
         now = datetime.utcnow()
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.cycle_start <= now < snapshot.cycle_end:
+            return snapshot
         
+        with self._rebuild_lock:
+            snapshot = self._snapshot
+            cycle_start = self.cycle_start(now)
+            if snapshot is None or snapshot.cycle_start != cycle_start:
+                snapshot = MockSnapshot(cycle_start)
+                self._snapshot = snapshot
+            return snapshot
+    
+    @staticmethod
+    def cycle_start(now: datetime) -> datetime:
+        """Start of the forecast cycle containing now"""
+        return now.replace(
+            hour=now.hour - now.hour % FORECAST_CYCLE_HOURS, minute=0, second=0, microsecond=0
+        )
+    
+    def get_current_predictions(self) -> Dict:
+        """Current predictions for all locations"""
+        return self.snapshot().predictions
+    
+    def get_simulation_frames(self, prediction_id: str) -> Optional[Dict]:
+        """Simulation frame data for a prediction (None if unknown)"""
+        return self.snapshot().simulations.get(prediction_id)
+    
+    def get_hydrograph(self, prediction_id: str) -> Optional[Dict]:
+        """Hydrograph time series for a prediction (None if unknown)"""
+        return self.snapshot().hydrographs.get(prediction_id)
+    
+    @staticmethod
+    def _build_current_predictions(now: datetime, rng: random.Random) -> Dict:
+        """Generate current predictions for all locations"""
         predictions = []
         for loc in MockDataService.LOCATIONS:
             # Calculate time-based risk variations
             time_horizons = MockDataService._generate_time_horizons(loc["risk"])
             
             # Generate driving factors based on severity
-            driving_factors = MockDataService._generate_driving_factors(loc["severity"])
+            driving_factors = MockDataService._generate_driving_factors(loc["severity"], rng)
             
             prediction = {
                 "id": loc["id"],
@@ -127,7 +230,7 @@ class MockDataService:
                     "severityClass": loc["severity"],
                     "influenceRadius": MockDataService._calculate_radius(loc["risk"]),
                     "timeToPeak": MockDataService._calculate_time_to_peak(loc["risk"]),
-                    "confidence": round(random.uniform(0.82, 0.95), 2)
+                    "confidence": round(rng.uniform(0.82, 0.95), 2)
                 },
                 "forecast": {
                     "peakDischarge": MockDataService._calculate_discharge(loc["risk"]),
@@ -138,7 +241,7 @@ class MockDataService:
                 "timeHorizons": time_horizons,
                 "drivingFactors": driving_factors,
                 "simulationAvailable": True,
-                "hasHistoricalData": random.choice([True, False])
+                "hasHistoricalData": rng.choice([True, False])
             }
             predictions.append(prediction)
         
@@ -181,7 +284,7 @@ class MockDataService:
         }
     
     @staticmethod
-    def _generate_driving_factors(severity: str) -> Dict:
+    def _generate_driving_factors(severity: str, rng: random.Random = random) -> Dict:
         """Generate realistic driving factors based on severity"""
         factor_ranges = {
             "LOW": {"rainfall": (20, 60), "discharge": (5000, 15000), "saturation": (0.3, 0.5)},
@@ -193,21 +296,21 @@ class MockDataService:
         ranges = factor_ranges.get(severity, factor_ranges["MODERATE"])
         
         factors = {
-            "rainfall24h": round(random.uniform(*ranges["rainfall"]), 1),
-            "upstreamDischarge": round(random.uniform(*ranges["discharge"]), 0),
-            "soilSaturation": round(random.uniform(*ranges["saturation"]), 2)
+            "rainfall24h": round(rng.uniform(*ranges["rainfall"]), 1),
+            "upstreamDischarge": round(rng.uniform(*ranges["discharge"]), 0),
+            "soilSaturation": round(rng.uniform(*ranges["saturation"]), 2)
         }
         
         # Add coastal tide for coastal areas
-        if random.random() > 0.7:
-            factors["tideLevel"] = round(random.uniform(1.5, 3.2), 1)
+        if rng.random() > 0.7:
+            factors["tideLevel"] = round(rng.uniform(1.5, 3.2), 1)
         
         # Add reservoir release for dam areas
-        if random.random() > 0.8:
-            factors["reservoirRelease"] = round(random.uniform(200, 800), 0)
+        if rng.random() > 0.8:
+            factors["reservoirRelease"] = round(rng.uniform(200, 800), 0)
         
         # Add slope instability for hilly areas
-        if severity in ["HIGH", "CRITICAL"] and random.random() > 0.6:
+        if severity in ["HIGH", "CRITICAL"] and rng.random() > 0.6:
             factors["slopeInstability"] = True
         
         return factors
@@ -240,7 +343,7 @@ class MockDataService:
             return "LOW"
     
     @staticmethod
-    def get_simulation_frames(prediction_id: str) -> Dict:
+    def _build_simulation_frames(prediction_id: str, now: datetime) -> Optional[Dict]:
         """Generate simulation frame data for a prediction"""
         # Find the location
         location = next((loc for loc in MockDataService.LOCATIONS if loc["id"] == prediction_id), None)
@@ -268,7 +371,7 @@ class MockDataService:
             frame = {
                 "timeOffset": time_offset,
                 "timeLabel": f"T+{time_offset}h" if time_offset > 0 else "T+0h (Now)",
-                "timestamp": (datetime.utcnow() + timedelta(hours=time_offset)).isoformat() + "Z",
+                "timestamp": (now + timedelta(hours=time_offset)).isoformat() + "Z",
                 "waterLevel": round(water_level, 2),
                 "depth": depth,
                 "affectedArea": area,
@@ -297,7 +400,7 @@ class MockDataService:
                 "basin": location["basin"]
             },
             "simulation": {
-                "source": f"LISFLOOD_v4.2_scenario_{location['basin'].lower().replace('-', '_')}_{datetime.utcnow().strftime('%Y%m%d')}",
+                "source": f"LISFLOOD_v4.2_scenario_{location['basin'].lower().replace('-', '_')}_{now.strftime('%Y%m%d')}",
                 "resolution": "500m",
                 "totalDuration": 48,
                 "frameCount": len(frames),
@@ -323,71 +426,6 @@ class MockDataService:
             }
         }
     
-    @staticmethod
-    def get_alerts() -> Dict:
-        """Generate alert messages from predictions"""
-        alerts = []
-        now = datetime.utcnow()
-        
-        # Generate alerts for HIGH and CRITICAL severity locations
-        for loc in MockDataService.LOCATIONS:
-            if loc["severity"] in ["HIGH", "CRITICAL"]:
-                alert = {
-                    "id": f"alert_{len(alerts) + 1:03d}",
-                    "predictionId": loc["id"],
-                    "type": "FLOOD_WARNING",
-                    "severity": loc["severity"],
-                    "title": f"{loc['name']} - {'Critical Flood Alert' if loc['severity'] == 'CRITICAL' else 'Severe Flood Warning'}",
-                    "description": MockDataService._generate_alert_description(loc),
-                    "issuedAt": now.isoformat() + "Z",
-                    "validUntil": (now + timedelta(hours=48)).isoformat() + "Z",
-                    "affectedRegions": MockDataService._get_affected_regions(loc["name"]),
-                    "actions": MockDataService._get_safety_actions(loc["severity"])
-                }
-                alerts.append(alert)
-        
-        return {"alerts": alerts}
-    
-    @staticmethod
-    def _generate_alert_description(location: Dict) -> str:
-        """Generate alert description"""
-        time_to_peak = MockDataService._calculate_time_to_peak(location["risk"])
-        depth = round(location["risk"] * 6.0, 1)
-        
-        if location["severity"] == "CRITICAL":
-            return f"Extreme flood conditions predicted in {location['name']}. Peak flooding expected in {time_to_peak} hours with water depth up to {depth} meters. Immediate evacuation advised for riverside areas."
-        else:
-            return f"High flood risk predicted in {location['name']}. Peak flooding expected in {time_to_peak} hours with water depth up to {depth} meters."
-    
-    @staticmethod
-    def _get_affected_regions(location_name: str) -> List[str]:
-        """Get affected sub-regions"""
-        region_map = {
-            "Kolkata Metropolitan Area": ["North Kolkata", "Salt Lake", "Park Street", "Howrah"],
-            "Jalpaiguri District": ["Jalpaiguri Town", "Mainaguri", "Mal", "Nagrakata"],
-            "Howrah District": ["Howrah City", "Uluberia", "Shyampur", "Bagnan"],
-            "South 24 Parganas (Sundarbans)": ["Gosaba", "Basanti", "Kultali", "Patharpratima"],
-        }
-        return region_map.get(location_name, [location_name])
-    
-    @staticmethod
-    def _get_safety_actions(severity: str) -> List[str]:
-        """Get safety action recommendations"""
-        if severity == "CRITICAL":
-            return [
-                "Evacuate low-lying areas immediately",
-                "Do not cross flooded bridges or roads",
-                "Contact local disaster management authorities",
-                "Move to designated evacuation shelters"
-            ]
-        else:
-            return [
-                "Move to higher ground if in low-lying areas",
-                "Avoid travel through flooded roads",
-                "Keep emergency supplies ready",
-                "Monitor updates from local authorities"
-            ]
-    
     @staticmethod
     def get_severity_levels() -> Dict:
         """Get severity level configuration"""
@@ -425,14 +463,13 @@ class MockDataService:
         }
     
     @staticmethod
-    def get_hydrograph(prediction_id: str) -> Dict:
+    def _build_hydrograph(prediction_id: str, now: datetime, rng: random.Random) -> Optional[Dict]:
         """Generate hydrograph time series data"""
         location = next((loc for loc in MockDataService.LOCATIONS if loc["id"] == prediction_id), None)
         if not location:
             return None
         
         base_discharge = MockDataService._calculate_discharge(location["risk"])
-        now = datetime.utcnow()
         
         # Generate forecast points (every 6 hours for 48 hours)
         forecast = []
@@ -456,7 +493,7 @@ class MockDataService:
         for i in range(4):
             hours = -3 + i
             timestamp = now + timedelta(hours=hours)
-            discharge = base_discharge * 0.7 + random.uniform(-2000, 2000)
+            discharge = base_discharge * 0.7 + rng.uniform(-2000, 2000)
             
             observed.append({
                 "timestamp": timestamp.isoformat() + "Z",
@@ -477,4 +514,43 @@ class MockDataService:
             }
         }
 
+    @staticmethod
+    def build_gauge_series(prediction_id: str, start: int, end: int) -> List[Tuple[int, float]]:
+        """
+        Synthetic 15-minute observed discharge for [start, end] (epoch seconds).
+        
+        Every value is a function of its timestamp alone (seasonal swell,
+        storm pulses every ~9 days, diurnal ripple and seeded noise), so a
+        series extended later continues exactly where it left off.
+        """
+        location = next((loc for loc in MockDataService.LOCATIONS if loc["id"] == prediction_id), None)
+        if not location:
+            return []
+        
+        base = MockDataService._calculate_discharge(location["risk"]) * 0.7
+        pulse_period = 9 * 86400
+        pulse_width = 1.5 * 86400
+        pulses: Dict[int, float] = {}
+        
+        def pulse_amplitude(k: int) -> float:
+            if k not in pulses:
+                pulses[k] = random.Random(f"{prediction_id}:pulse:{k}").uniform(0.1, 0.45)
+            return pulses[k]
+        
+        points = []
+        first = start - start % GAUGE_INTERVAL_SECONDS
+        if first < start:
+            first += GAUGE_INTERVAL_SECONDS
+        for ts in range(first, end + 1, GAUGE_INTERVAL_SECONDS):
+            seasonal = 0.75 + 0.2 * math.sin(2 * math.pi * (ts / (365 * 86400)) - 1.2)
+            k = ts // pulse_period
+            storm = sum(
+                pulse_amplitude(j) * math.exp(-((ts - (j * pulse_period + pulse_period / 2)) / pulse_width) ** 2)
+                for j in (k - 1, k, k + 1)
+            )
+            diurnal = 0.015 * math.sin(2 * math.pi * ts / 86400)
+            noise = random.Random(ts * 31 + location["lat"]).uniform(-0.02, 0.02)
+            points.append((ts, round(base * (seasonal + storm + diurnal + noise), 0)))
+        return points
+
 mock_service = MockDataService()
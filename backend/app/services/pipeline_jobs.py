@@ -0,0 +1,370 @@
+"""
+Pipeline Job Service
+Persistent queue of pipeline runs executed by a long-lived worker pool.
+
+`POST /api/flood/pipeline/run` only records a job in a SQLite queue
+(`STATE_DIR/pipeline_jobs.db`). Dispatcher tasks claim jobs and hand them to
+a pool of warm worker processes (pipeline/job_worker.py) that keep the
+orchestrator, stage modules and stage cache loaded between runs. No more
+than PIPELINE_MAX_CONCURRENT jobs run at once across all API workers, and
+a request identical to a queued or running job returns that job instead of
+starting another.
+
+A claimed job records its owner (INSTANCE_ID) and a lease that the owner
+renews while the run is in progress. Jobs whose lease expired (their API
+process died) are returned to the queue; process IDs alone are not trusted,
+since they are reused across restarts and containers.
+"""
+import asyncio
+import importlib
+import json
+import multiprocessing
+import os
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.services.alert_engine import alert_engine
+from app.services.shared_state import INSTANCE_ID
+
+PIPELINE_DIR = Path(__file__).resolve().parents[3] / "pipeline"
+
+ACTIVE_STATUSES = ("queued", "running")
+
+
+# ============================================================================
+# Persistent Queue
+# ============================================================================
+
+class PipelineJobQueue:
+    """
+    SQLite queue of pipeline jobs.
+
+    A job's dedupe key is its normalized request (suffix and options); a
+    partial unique index allows only one queued or running job per key.
+    """
+
+    def __init__(self, db_path: Path):
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(db_path), check_same_thread=False, isolation_level=None, timeout=30.0
+        )
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS pipeline_jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                run_id TEXT NOT NULL UNIQUE,
+                dedupe_key TEXT NOT NULL,
+                options TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'queued',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                worker_pid INTEGER,
+                error TEXT,
+                duration_seconds REAL,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL
+            );
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_pipeline_jobs_active
+                ON pipeline_jobs (dedupe_key) WHERE status IN ('queued', 'running');
+            CREATE INDEX IF NOT EXISTS idx_pipeline_jobs_status ON pipeline_jobs (status, id);
+        """)
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(pipeline_jobs)")}
+        if "owner" not in columns:
+            # Queues from before leases: running rows get no lease, i.e. expired
+            self._conn.execute("ALTER TABLE pipeline_jobs ADD COLUMN owner TEXT")
+            self._conn.execute("ALTER TABLE pipeline_jobs ADD COLUMN lease_expires_at REAL")
+
+    @contextmanager
+    def _transaction(self, mode: str = ""):
+        self._conn.execute(f"BEGIN {mode}")
+        try:
+            yield
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+
+    def enqueue(
+        self,
+        run_id: str,
+        dedupe_key: str,
+        options: Dict,
+        run_exists: Optional[Callable[[str], bool]] = None
+    ) -> Tuple[Dict, bool]:
+        """
+        Queue a job unless an identical one is already queued or running.
+
+        A run ID already used by an earlier job (or on disk, per run_exists)
+        gets a numeric suffix, so a repeat trigger within the same minute
+        never overwrites a finished run.
+
+        Returns:
+            (job, created): the new job, or the existing one with created=False
+        """
+        with self._lock, self._transaction("IMMEDIATE"):
+            row = self._conn.execute(
+                "SELECT * FROM pipeline_jobs WHERE dedupe_key = ? AND status IN ('queued', 'running')",
+                (dedupe_key,)
+            ).fetchone()
+            if row is not None:
+                return dict(row), False
+            base, n = run_id, 1
+            while self._conn.execute("SELECT 1 FROM pipeline_jobs WHERE run_id = ?", (run_id,)).fetchone() or \
+                    (run_exists is not None and run_exists(run_id)):
+                n += 1
+                run_id = f"{base}_{n}"
+            job_id = self._conn.execute(
+                "INSERT INTO pipeline_jobs (run_id, dedupe_key, options, created_at) VALUES (?, ?, ?, ?)",
+                (run_id, dedupe_key, json.dumps(options, sort_keys=True), time.time())
+            ).lastrowid
+            return dict(self._conn.execute("SELECT * FROM pipeline_jobs WHERE id = ?", (job_id,)).fetchone()), True
+
+    def claim(self, max_running: int, lease_seconds: float = 60.0) -> Optional[Dict]:
+        """Take the oldest queued job under a lease if fewer than max_running jobs are running"""
+        with self._lock, self._transaction("IMMEDIATE"):
+            running = self._conn.execute(
+                "SELECT COUNT(*) FROM pipeline_jobs WHERE status = 'running'"
+            ).fetchone()[0]
+            if running >= max_running:
+                return None
+            row = self._conn.execute(
+                "SELECT * FROM pipeline_jobs WHERE status = 'queued' ORDER BY id LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return None
+            now = time.time()
+            self._conn.execute(
+                "UPDATE pipeline_jobs SET status = 'running', attempts = attempts + 1, worker_pid = ?, "
+                "owner = ?, lease_expires_at = ?, started_at = ? WHERE id = ?",
+                (os.getpid(), INSTANCE_ID, now + lease_seconds, now, row["id"])
+            )
+        claimed = dict(row)
+        claimed.update(
+            status="running", attempts=row["attempts"] + 1, worker_pid=os.getpid(),
+            owner=INSTANCE_ID, lease_expires_at=now + lease_seconds, started_at=now
+        )
+        return claimed
+
+    def renew(self, job_id: int, lease_seconds: float) -> bool:
+        """Extend this process's lease on a job; False if it lost the job"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE pipeline_jobs SET lease_expires_at = ? "
+                "WHERE id = ? AND owner = ? AND status = 'running'",
+                (time.time() + lease_seconds, job_id, INSTANCE_ID)
+            )
+            return cursor.rowcount == 1
+
+    def finish(self, job_id: int, status: str, error: Optional[str], duration_seconds: Optional[float]) -> bool:
+        """Record the outcome; False if the lease expired and the job was re-queued"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE pipeline_jobs SET status = ?, error = ?, duration_seconds = ?, finished_at = ?, "
+                "lease_expires_at = NULL WHERE id = ? AND owner = ? AND status = 'running'",
+                (status, error, duration_seconds, time.time(), job_id, INSTANCE_ID)
+            )
+            return cursor.rowcount == 1
+
+    def recover(self) -> int:
+        """Re-queue running jobs whose owner stopped renewing its lease"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE pipeline_jobs SET status = 'queued', worker_pid = NULL, owner = NULL, "
+                "lease_expires_at = NULL, started_at = NULL WHERE status = 'running' "
+                "AND (lease_expires_at IS NULL OR lease_expires_at < ?)",
+                (time.time(),)
+            )
+            return cursor.rowcount
+
+    def get(self, job_id: int) -> Optional[Dict]:
+        """A job plus its position in the queue (1 = next) while queued"""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM pipeline_jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                return None
+            job = dict(row)
+            if job["status"] == "queued":
+                job["queue_position"] = self._conn.execute(
+                    "SELECT COUNT(*) FROM pipeline_jobs WHERE status = 'queued' AND id <= ?", (job_id,)
+                ).fetchone()[0]
+        return job
+
+    def get_by_run(self, run_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT id FROM pipeline_jobs WHERE run_id = ?", (run_id,)).fetchone()
+        return self.get(row["id"]) if row else None
+
+    def list_jobs(self, status: Optional[str] = None, limit: int = 50) -> List[Dict]:
+        """Most recent jobs first"""
+        with self._lock:
+            if status:
+                rows = self._conn.execute(
+                    "SELECT * FROM pipeline_jobs WHERE status = ? ORDER BY id DESC LIMIT ?", (status, limit)
+                ).fetchall()
+            else:
+                rows = self._conn.execute(
+                    "SELECT * FROM pipeline_jobs ORDER BY id DESC LIMIT ?", (limit,)
+                ).fetchall()
+        return [dict(row) for row in rows]
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT status, COUNT(*) AS n FROM pipeline_jobs GROUP BY status"
+            ).fetchall()
+        return {row["status"]: row["n"] for row in rows}
+
+
+# ============================================================================
+# Worker Pool
+# ============================================================================
+
+class PipelineJobService:
+    """
+    Dispatcher tasks feeding a pool of warm pipeline worker processes.
+
+    Worker processes are started with the spawn method (the API process
+    runs threads) on the first job and then reused, so interpreter start-up
+    and stage imports are paid once per worker rather than once per run.
+    """
+
+    def __init__(
+        self,
+        queue: PipelineJobQueue,
+        max_concurrent: int = 2,
+        poll_seconds: float = 2.0,
+        lease_seconds: float = 60.0
+    ):
+        self.queue = queue
+        self.max_concurrent = max(1, max_concurrent)
+        self.poll_seconds = poll_seconds
+        self.lease_seconds = lease_seconds
+        self._last_recover = 0.0
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+        self._stopping = False
+
+    async def submit(self, run_id: str, suffix: str, options: Dict) -> Tuple[Dict, bool]:
+        """Queue a run (or return the identical queued/running job)"""
+        dedupe_key = json.dumps({"suffix": suffix, **options}, sort_keys=True)
+        job, created = await asyncio.to_thread(
+            self.queue.enqueue,
+            run_id, dedupe_key, options, run_exists=lambda candidate: (Path(settings.RUNS_DIR) / candidate).exists()
+        )
+        if created and self._wakeup is not None:
+            self._wakeup.set()
+        return job, created
+
+    async def start(self):
+        """Recover orphaned jobs and start the dispatcher tasks"""
+        await self._recover()
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._dispatcher()) for _ in range(self.max_concurrent)]
+
+    async def stop(self):
+        """Stop claiming jobs; jobs already running finish and are recorded"""
+        # Cancelling would abandon a run that still completes in its worker
+        # process, leaving the job 'running' until recover() re-runs it
+        self._stopping = True
+        if self._wakeup is not None:
+            self._wakeup.set()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._pool is not None:
+            await asyncio.to_thread(self._pool.shutdown)
+            self._pool = None
+
+    async def process_next(self) -> bool:
+        """Run one queued job to completion; returns False when none was ready"""
+        job = await asyncio.to_thread(self.queue.claim, self.max_concurrent, self.lease_seconds)
+        if job is None:
+            return False
+
+        print(f"🏭 Pipeline job {job['id']} started: {job['run_id']}")
+        heartbeat = asyncio.create_task(self._renew_lease(job["id"]))
+        try:
+            pool, worker = self._executor()
+            result = await asyncio.get_running_loop().run_in_executor(
+                pool, worker.execute, job["run_id"], json.loads(job["options"])
+            )
+        except BrokenProcessPool as e:
+            # A worker died mid-run (e.g. killed for memory); start a fresh pool
+            self._pool = None
+            result = {"status": "failed", "error": f"Pipeline worker died: {e}", "duration_seconds": None}
+        except Exception as e:
+            result = {"status": "failed", "error": str(e), "duration_seconds": None}
+        finally:
+            heartbeat.cancel()
+
+        recorded = await asyncio.to_thread(
+            self.queue.finish, job["id"], result["status"], result.get("error"), result.get("duration_seconds")
+        )
+        if not recorded:
+            print(f"⚠️  Pipeline job {job['id']} lost its lease; result discarded")
+        elif result["status"] == "completed":
+            print(f"✅ Pipeline job {job['id']} completed in {result['duration_seconds']}s")
+            await asyncio.to_thread(alert_engine.sync)
+        else:
+            print(f"❌ Pipeline job {job['id']} failed: {result.get('error')}")
+        return True
+
+    async def _renew_lease(self, job_id: int):
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            await asyncio.to_thread(self.queue.renew, job_id, self.lease_seconds)
+
+    async def _recover(self):
+        """Re-queue jobs of API processes that died (at most once per lease period)"""
+        self._last_recover = time.monotonic()
+        recovered = await asyncio.to_thread(self.queue.recover)
+        if recovered:
+            print(f"🏭 Re-queued {recovered} interrupted pipeline job(s)")
+
+    def _executor(self):
+        if str(PIPELINE_DIR) not in sys.path:
+            sys.path.insert(0, str(PIPELINE_DIR))
+        worker = importlib.import_module("job_worker")
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_concurrent,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=worker.warm
+            )
+        return self._pool, worker
+
+    async def _dispatcher(self):
+        while not self._stopping:
+            try:
+                if not await self.process_next():
+                    if time.monotonic() - self._last_recover >= self.lease_seconds:
+                        await self._recover()
+                    self._wakeup.clear()
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_seconds)
+                    except asyncio.TimeoutError:
+                        pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Pipeline job dispatcher error: {e}")
+                await asyncio.sleep(self.poll_seconds)
+
+
+pipeline_jobs = PipelineJobService(
+    queue=PipelineJobQueue(Path(settings.STATE_DIR) / "pipeline_jobs.db"),
+    max_concurrent=settings.PIPELINE_MAX_CONCURRENT,
+    lease_seconds=settings.JOB_LEASE_SECONDS
+)
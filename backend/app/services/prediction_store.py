@@ -0,0 +1,392 @@
+"""
+Prediction Store Service
+Section-oriented storage for deep learning predictions with field projections.
+
+Each prediction is stored as one pre-serialized JSON fragment per top-level
+section (location, raster_data, model_info, ...). Projections only decode the
+sections they need and splice whole sections straight into the response, so
+unrequested sub-documents are never loaded or re-serialized.
+"""
+import json
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from fastapi.encoders import jsonable_encoder
+
+from app.config import settings
+
+# Top-level sections of DLPredictionIngest, in response order
+SECTIONS = [
+    "prediction_id",
+    "forecast_cycle",
+    "model_version",
+    "inference_timestamp",
+    "location",
+    "grid_shape",
+    "raster_data",
+    "aggregated_metrics",
+    "risk_assessment",
+    "input_features",
+    "model_info",
+    "data_sources",
+]
+
+# Named projections; None means the full document
+VIEWS: Dict[str, Optional[List[str]]] = {
+    "summary": [
+        "prediction_id",
+        "forecast_cycle",
+        "inference_timestamp",
+        "location.region",
+        "location.basin",
+        "risk_assessment.severity_class",
+        "risk_assessment.risk_score",
+        "aggregated_metrics.peak_depth_max",
+        "aggregated_metrics.affected_area_km2",
+    ],
+    "map": [
+        "prediction_id",
+        "inference_timestamp",
+        "location",
+        "grid_shape",
+        "raster_data.netcdf_crf_url",
+        "raster_data.arcgis_service_url",
+        "raster_data.preview_urls",
+        "risk_assessment.severity_class",
+        "risk_assessment.risk_score",
+    ],
+    "full": None,
+}
+
+
+class PredictionStore:
+    """
+    In-memory DL prediction store (replace with database in production).
+
+    Also keeps a per-basin index of the latest prediction so basin lookups
+    do not scan every stored document.
+    """
+
+    # Visible to other worker processes (see SQLitePredictionStore)
+    shared = False
+
+    def __init__(self):
+        self._docs: Dict[str, Dict[str, bytes]] = {}
+        self._timestamps: Dict[str, datetime] = {}
+        self._basins: Dict[str, str] = {}
+        self._latest_by_basin: Dict[str, str] = {}
+
+    def __contains__(self, prediction_id: str) -> bool:
+        return prediction_id in self._docs
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def ids(self) -> Iterator[str]:
+        return iter(list(self._docs))
+
+    def put(self, doc: Dict, trusted: bool = False) -> int:
+        """
+        Store a validated prediction document (``DLPredictionIngest.dict()``).
+
+        Args:
+            doc: Prediction document
+            trusted: Document already holds only JSON-native values
+                (skips jsonable_encoder, used for bulk synthetic loads)
+
+        Returns:
+            Number of stored predictions
+        """
+        prediction_id = doc["prediction_id"]
+        basin = doc["location"]["basin"].lower()
+        previous_basin = self._basins.get(prediction_id)
+
+        self._docs[prediction_id] = _encode_sections(doc, trusted)
+        self._timestamps[prediction_id] = _as_datetime(doc["inference_timestamp"])
+        self._basins[prediction_id] = basin
+
+        # A re-ingest may move the prediction to another basin or back in time
+        if previous_basin is not None and previous_basin != basin and \
+                self._latest_by_basin.get(previous_basin) == prediction_id:
+            self._reindex_basin(previous_basin)
+
+        current = self._latest_by_basin.get(basin)
+        if current == prediction_id:
+            self._reindex_basin(basin)
+        elif current is None or self._timestamps[prediction_id] >= self._timestamps[current]:
+            self._latest_by_basin[basin] = prediction_id
+
+        return len(self._docs)
+
+    def put_many(self, docs: Iterable[Dict], trusted: bool = False) -> int:
+        """Store many documents (one transaction for shared stores)"""
+        count = len(self)
+        for doc in docs:
+            count = self.put(doc, trusted)
+        return count
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def get(self, prediction_id: str, fields: Optional[List[str]] = None) -> Optional[Dict]:
+        """Projected prediction as a dict (only requested sections are decoded)"""
+        grouped = _group_fields(fields)
+        sections = self._sections(prediction_id, grouped)
+        if sections is None:
+            return None
+        return _decode(sections, grouped)
+
+    def get_json(self, prediction_id: str, fields: Optional[List[str]] = None) -> Optional[bytes]:
+        """
+        Projected prediction as JSON bytes.
+
+        Whole sections are spliced in from their stored fragments; only
+        sections with dotted sub-field selections are decoded.
+        """
+        grouped = _group_fields(fields)
+        sections = self._sections(prediction_id, grouped)
+        if sections is None:
+            return None
+
+        parts = []
+        for section, paths in grouped.items():
+            if section not in sections:
+                continue
+            fragment = sections[section]
+            if paths is not None:
+                fragment = json.dumps(
+                    _extract(json.loads(fragment), paths), separators=(",", ":")
+                ).encode("utf-8")
+            parts.append(b'"' + section.encode("utf-8") + b'":' + fragment)
+        return b"{" + b",".join(parts) + b"}"
+
+    def latest_id_for_basin(self, basin: str) -> Optional[str]:
+        """O(1) lookup of the most recent prediction for a basin"""
+        return self._latest_by_basin.get(basin.lower())
+
+    def _sections(self, prediction_id: str, grouped: Dict) -> Optional[Dict[str, bytes]]:
+        """Stored fragments of a prediction (may include unrequested sections)"""
+        return self._docs.get(prediction_id)
+
+    def _reindex_basin(self, basin: str):
+        candidates = [pid for pid, pid_basin in self._basins.items() if pid_basin == basin]
+        if candidates:
+            self._latest_by_basin[basin] = max(candidates, key=self._timestamps.__getitem__)
+        else:
+            self._latest_by_basin.pop(basin, None)
+
+
+class SQLitePredictionStore(PredictionStore):
+    """
+    Prediction store shared by every worker process (WORKERS > 1).
+
+    Same section layout as the in-memory store, one column per section in
+    a WAL-mode SQLite table, so projections only read the columns they
+    need. `seq` increases on every write, letting per-process indexes
+    catch up on documents ingested by other workers.
+    """
+
+    shared = True
+
+    def __init__(self, db_path: Path):
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(db_path), check_same_thread=False, isolation_level=None, timeout=30.0
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        columns = ", ".join(f"{section} BLOB" for section in SECTIONS if section != "prediction_id")
+        self._conn.executescript(f"""
+            CREATE TABLE IF NOT EXISTS predictions (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                prediction_id TEXT NOT NULL UNIQUE,
+                basin TEXT NOT NULL,
+                inference_ts REAL NOT NULL,
+                {columns}
+            );
+            CREATE INDEX IF NOT EXISTS idx_predictions_basin_ts ON predictions (basin, inference_ts, seq);
+        """)
+        self._insert = (
+            f"INSERT OR REPLACE INTO predictions (prediction_id, basin, inference_ts, "
+            f"{', '.join(SECTIONS[1:])}) VALUES ({', '.join('?' * (len(SECTIONS) + 2))})"
+        )
+
+    def __contains__(self, prediction_id: str) -> bool:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT 1 FROM predictions WHERE prediction_id = ?", (prediction_id,)
+            ).fetchone() is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM predictions").fetchone()[0]
+
+    def ids(self) -> Iterator[str]:
+        with self._lock:
+            rows = self._conn.execute("SELECT prediction_id FROM predictions ORDER BY seq").fetchall()
+        return iter([row[0] for row in rows])
+
+    def put(self, doc: Dict, trusted: bool = False) -> int:
+        return self.put_many([doc], trusted)
+
+    def put_many(self, docs: Iterable[Dict], trusted: bool = False) -> int:
+        rows = [self._row(doc, trusted) for doc in docs]
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(self._insert, rows)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+        return len(self)
+
+    def latest_id_for_basin(self, basin: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT prediction_id FROM predictions WHERE basin = ? "
+                "ORDER BY inference_ts DESC, seq DESC LIMIT 1",
+                (basin.lower(),)
+            ).fetchone()
+        return row[0] if row else None
+
+    def changes_since(self, seq: int, fields: Optional[List[str]] = None) -> List[Tuple[int, Dict]]:
+        """(seq, projected document) for every write after seq, oldest first"""
+        grouped = _group_fields(fields)
+        columns = [section for section in grouped if section != "prediction_id"]
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(['seq', 'prediction_id'] + columns)} FROM predictions "
+                "WHERE seq > ? ORDER BY seq",
+                (seq,)
+            ).fetchall()
+        changes = []
+        for row in rows:
+            sections = {"prediction_id": json.dumps(row[1]).encode("utf-8")}
+            sections.update((section, value) for section, value in zip(columns, row[2:]) if value is not None)
+            changes.append((row[0], _decode(sections, grouped)))
+        return changes
+
+    def _sections(self, prediction_id: str, grouped: Dict) -> Optional[Dict[str, bytes]]:
+        columns = [section for section in grouped if section != "prediction_id"]
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(['prediction_id'] + columns)} FROM predictions WHERE prediction_id = ?",
+                (prediction_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        sections = {"prediction_id": json.dumps(row[0]).encode("utf-8")}
+        sections.update((section, value) for section, value in zip(columns, row[1:]) if value is not None)
+        return sections
+
+    @staticmethod
+    def _row(doc: Dict, trusted: bool) -> Tuple:
+        sections = _encode_sections(doc, trusted)
+        return (
+            doc["prediction_id"],
+            doc["location"]["basin"].lower(),
+            _as_datetime(doc["inference_timestamp"]).timestamp(),
+            *(sections.get(section) for section in SECTIONS[1:])
+        )
+
+
+def resolve_fields(view: Optional[str] = None, fields: Optional[str] = None) -> Optional[List[str]]:
+    """
+    Turn ``?view=`` / ``?fields=`` query values into a field list.
+
+    Explicit fields take precedence over a view. Returns None for the full
+    document.
+
+    Raises:
+        ValueError: Unknown view or top-level section
+    """
+    if fields:
+        requested = [f.strip() for f in fields.split(",") if f.strip()]
+        unknown = sorted({f.split(".", 1)[0] for f in requested} - set(SECTIONS))
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+        return requested
+
+    if view is None:
+        return None
+    if view not in VIEWS:
+        raise ValueError(f"Unknown view: {view} (expected one of {', '.join(VIEWS)})")
+    return VIEWS[view]
+
+
+def _encode_sections(doc: Dict, trusted: bool) -> Dict[str, bytes]:
+    """One compact JSON fragment per top-level section"""
+    encoded = doc if trusted else jsonable_encoder(doc)
+    return {
+        section: json.dumps(encoded[section], separators=(",", ":")).encode("utf-8")
+        for section in SECTIONS
+        if section in encoded
+    }
+
+
+def _decode(sections: Dict[str, bytes], grouped: Dict[str, Optional[List[List[str]]]]) -> Dict:
+    """Decode only the requested sections, applying sub-field selections"""
+    result = {}
+    for section, paths in grouped.items():
+        if section not in sections:
+            continue
+        value = json.loads(sections[section])
+        result[section] = value if paths is None else _extract(value, paths)
+    return result
+
+
+def _group_fields(fields: Optional[List[str]]) -> Dict[str, Optional[List[List[str]]]]:
+    """Map each section to its requested sub-paths (None = whole section)"""
+    if fields is None:
+        return {section: None for section in SECTIONS}
+
+    grouped: Dict[str, Optional[List[List[str]]]] = {}
+    for field in fields:
+        section, _, rest = field.partition(".")
+        if not rest or grouped.get(section, []) is None:
+            grouped[section] = None
+        else:
+            grouped.setdefault(section, []).append(rest.split("."))
+
+    # Keep the canonical section order
+    return {section: grouped[section] for section in SECTIONS if section in grouped}
+
+
+def _extract(value: Any, paths: List[List[str]]) -> Any:
+    """Copy only the given nested key paths out of a decoded section"""
+    result: Dict[str, Any] = {}
+    for path in paths:
+        source, target = value, result
+        for i, key in enumerate(path):
+            if not isinstance(source, dict) or key not in source:
+                break
+            if i == len(path) - 1:
+                target[key] = source[key]
+            else:
+                source = source[key]
+                target = target.setdefault(key, {})
+    return result
+
+
+def _as_datetime(value: Any) -> datetime:
+    """Comparable timestamp (naive values are taken as UTC)"""
+    if not isinstance(value, datetime):
+        value = datetime.fromisoformat(str(value))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def _build_store() -> PredictionStore:
+    if settings.WORKERS > 1:
+        return SQLitePredictionStore(Path(settings.STATE_DIR) / "predictions.db")
+    return PredictionStore()
+
+
+prediction_store = _build_store()
@@ -0,0 +1,322 @@
+"""
+Response Cache Service
+Versioned cache of pre-serialized (and pre-compressed) JSON responses with
+strong ETags, shared by the read-only routers.
+"""
+import gzip
+import hashlib
+import sqlite3
+import sys
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, Type
+
+from fastapi import Request, Response
+from pydantic import BaseModel
+
+from app.config import settings
+from app.services.serialization import dumps
+from app.services.shared_state import shared_state
+
+PIPELINE_DIR = Path(__file__).resolve().parents[3] / "pipeline"
+if str(PIPELINE_DIR) not in sys.path:
+    sys.path.insert(0, str(PIPELINE_DIR))
+
+try:
+    from run_catalog import get_run_catalog
+except ImportError:
+    # Pipeline not available: only the runs directory mtime is tracked
+    get_run_catalog = None
+
+try:
+    import brotli
+except ImportError:
+    # Optional: without it only gzip is offered
+    brotli = None
+
+# Content-Encoding -> (ETag suffix, compressor); preferred first on equal q
+ENCODINGS: Dict[str, Tuple[str, Callable[[bytes], bytes]]] = {}
+if brotli is not None:
+    ENCODINGS["br"] = ("br", lambda body: brotli.compress(body, quality=settings.RESPONSE_CACHE_BROTLI_QUALITY))
+ENCODINGS["gzip"] = ("gz", lambda body: gzip.compress(body, compresslevel=6, mtime=0))
+
+
+class CachedPayload:
+    """
+    Serialized response body plus its validators.
+
+    Compressed variants are produced lazily, once per encoding, the first
+    time a client asks for them. A rebuild that yields the same body (e.g.
+    after TTL expiry) inherits them, so they live as long as the content.
+    """
+
+    __slots__ = ("version", "created", "body", "etag", "compressible", "encoded")
+
+    def __init__(self, version: str, body: bytes, compressible: bool):
+        self.version = version
+        self.created = time.monotonic()
+        self.body = body
+        self.etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+        self.compressible = compressible
+        self.encoded: Dict[str, bytes] = {}
+
+    def etag_for(self, encoding: Optional[str]) -> str:
+        if encoding is None:
+            return self.etag
+        return self.etag[:-1] + "-" + ENCODINGS[encoding][0] + '"'
+
+    def all_etags(self) -> Tuple[str, ...]:
+        return (self.etag,) + tuple(self.etag_for(encoding) for encoding in ENCODINGS)
+
+    def body_for(self, encoding: Optional[str]) -> bytes:
+        if encoding is None:
+            return self.body
+        body = self.encoded.get(encoding)
+        if body is None:
+            body = self.encoded[encoding] = ENCODINGS[encoding][1](self.body)
+        return body
+
+
+class ResponseCache:
+    """
+    Cache JSON responses per (route, query) until the data version changes.
+
+    The data version combines an ingest counter (kept in shared state when
+    several workers serve the API) with the modification time of the
+    pipeline runs directory and the run catalog's latest update, so an
+    ingest, a new run, or a run that finishes or resumes in place
+    invalidates everything.
+    Clients revalidate with If-None-Match and get a 304 when nothing changed.
+    """
+
+    def __init__(
+        self,
+        runs_dir: Path,
+        max_entries: int = 512,
+        ttl_seconds: float = 300.0,
+        min_compress_bytes: int = 1024
+    ):
+        self.runs_dir = runs_dir
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.min_compress_bytes = min_compress_bytes
+        self._entries: "OrderedDict[Tuple, CachedPayload]" = OrderedDict()
+        self._version = 0
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    # ------------------------------------------------------------------
+    # Versioning
+    # ------------------------------------------------------------------
+
+    def bump_version(self) -> int:
+        """Invalidate every cached response (e.g. after an ingest)"""
+        if shared_state is not None:
+            # Every worker reads the same counter, so an ingest on one
+            # invalidates the others' entries too
+            return shared_state.increment("response_cache")
+        self._version += 1
+        return self._version
+
+    def current_version(self) -> str:
+        """Data version: ingest counter, runs directory mtime and catalog stamp"""
+        try:
+            runs_stamp = self.runs_dir.stat().st_mtime_ns
+        except OSError:
+            runs_stamp = 0
+        version = shared_state.counter("response_cache") if shared_state is not None else self._version
+        return f"{version}.{runs_stamp}.{self._catalog_stamp()}"
+
+    @staticmethod
+    def _catalog_stamp() -> str:
+        """
+        Latest catalog update: the orchestrator records a run when it starts
+        and when its report is written, which the directory mtime misses
+        for files written inside an existing run directory
+        """
+        if get_run_catalog is None:
+            return ""
+        try:
+            return get_run_catalog().last_updated() or ""
+        except sqlite3.Error:
+            return ""
+
+    # ------------------------------------------------------------------
+    # Lookup
+    # ------------------------------------------------------------------
+
+    def respond(
+        self,
+        request: Request,
+        build: Callable[[], Any],
+        model: Optional[Type[BaseModel]] = None,
+        tag: str = ""
+    ) -> Response:
+        """
+        Serve a cached response for this request, building it on a miss.
+
+        Args:
+            request: Incoming request (route path and query form the key)
+            build: Zero-argument callable producing the response data
+                (or already-serialized JSON bytes)
+            model: Optional response model used to validate/serialize once
+            tag: Extra version component owned by the caller (e.g. the
+                forecast cycle of a snapshot); a new tag forces a rebuild
+
+        Returns:
+            304 when If-None-Match matches, otherwise the body in the best
+            encoding the client accepts
+        """
+        payload = self.get_payload(self._key(request), build, model, tag)
+        return self._to_response(request, payload)
+
+    async def respond_async(
+        self,
+        request: Request,
+        build: Callable[[], Awaitable[Any]],
+        model: Optional[Type[BaseModel]] = None,
+        tag: str = ""
+    ) -> Response:
+        """Same as respond() for builders that must be awaited"""
+        key = self._key(request)
+        version = self._version_for(tag)
+        payload = self._fresh(key, version)
+        if payload is None:
+            payload = self._store(key, version, dumps(await build(), model))
+        return self._to_response(request, payload)
+
+    def get_payload(
+        self,
+        key: Tuple,
+        build: Callable[[], Any],
+        model: Optional[Type[BaseModel]] = None,
+        tag: str = ""
+    ) -> CachedPayload:
+        """Return the cached payload for key, rebuilding it if stale"""
+        version = self._version_for(tag)
+        payload = self._fresh(key, version)
+        if payload is None:
+            payload = self._store(key, version, dumps(build(), model))
+        return payload
+
+    def stats(self) -> Dict:
+        """Cache counters for monitoring"""
+        return {
+            "entries": len(self._entries),
+            "version": self.current_version(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+            "encodings": list(ENCODINGS)
+        }
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _key(request: Request) -> Tuple:
+        return (request.url.path, tuple(sorted(request.query_params.multi_items())))
+
+    def _version_for(self, tag: str) -> str:
+        return f"{self.current_version()}:{tag}"
+
+    def _fresh(self, key: Tuple, version: str) -> Optional[CachedPayload]:
+        payload = self._entries.get(key)
+        if payload is not None and payload.version == version and not self._expired(payload):
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return payload
+        self.misses += 1
+        return None
+
+    def _store(self, key: Tuple, version: str, body: bytes) -> CachedPayload:
+        payload = CachedPayload(version, body, compressible=len(body) >= self.min_compress_bytes)
+        previous = self._entries.get(key)
+        if previous is not None and previous.etag == payload.etag:
+            payload.encoded = previous.encoded
+        self._entries[key] = payload
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return payload
+
+    def _expired(self, payload: CachedPayload) -> bool:
+        return self.ttl_seconds > 0 and time.monotonic() - payload.created > self.ttl_seconds
+
+    def _to_response(self, request: Request, payload: CachedPayload) -> Response:
+        encoding = negotiate_encoding(
+            request.headers.get("accept-encoding", ""), prefer_identity=not payload.compressible
+        )
+        headers = {
+            "ETag": payload.etag_for(encoding),
+            "Cache-Control": "no-cache",
+            "Vary": "Accept-Encoding"
+        }
+
+        if _etag_matches(request.headers.get("if-none-match"), payload.all_etags()):
+            self.not_modified += 1
+            return Response(status_code=304, headers=headers)
+
+        if encoding is not None:
+            headers["Content-Encoding"] = encoding
+        return Response(content=payload.body_for(encoding), media_type="application/json", headers=headers)
+
+
+def negotiate_encoding(accept_encoding: str, prefer_identity: bool = False) -> Optional[str]:
+    """
+    Pick the best supported Content-Encoding for an Accept-Encoding header.
+
+    Highest q-value wins; ties go to the order of ENCODINGS (br before gzip),
+    and an explicit identity q-value above every encoding's selects identity.
+    With prefer_identity (small bodies) an encoding is only used when the
+    client refuses identity (`identity;q=0`, or `*;q=0` without identity).
+    Returns None for identity.
+    """
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[coding] = q
+
+    best, best_q = None, 0.0
+    for encoding in ENCODINGS:
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+
+    identity_q = weights.get("identity", weights.get("*"))
+    if identity_q == 0.0:
+        # Identity refused: any acceptable encoding beats it (none: send identity anyway)
+        return best
+    if prefer_identity or (identity_q is not None and identity_q > best_q):
+        return None
+    return best
+
+
+def _etag_matches(if_none_match: Optional[str], etags: Tuple[str, ...]) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return any(tag in candidates for tag in etags)
+
+
+response_cache = ResponseCache(
+    runs_dir=Path(settings.RUNS_DIR),
+    max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.RESPONSE_CACHE_TTL_SECONDS,
+    min_compress_bytes=settings.RESPONSE_CACHE_MIN_COMPRESS_BYTES
+)
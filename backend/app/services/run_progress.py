@@ -0,0 +1,80 @@
+"""
+Run Progress Service
+Incremental reader for the per-run progress log written by the pipeline
+(`<run>/events.jsonl`, see pipeline/run_events.py).
+
+Each poll reads only the bytes appended since the previous one, so
+following a live run costs one small read per interval and never
+rescans the runs directory or re-parses the report.
+"""
+import json
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+PIPELINE_DIR = Path(__file__).resolve().parents[3] / "pipeline"
+if str(PIPELINE_DIR) not in sys.path:
+    sys.path.insert(0, str(PIPELINE_DIR))
+
+from run_events import EVENTS_FILE  # noqa: E402  (defined by the writer)
+START_EVENT = "run_started"
+TERMINAL_EVENT = "run_finished"
+
+
+class RunEventReader:
+    """Tail one run's events.jsonl, returning complete new events"""
+
+    def __init__(self, run_dir: Path):
+        self.path = run_dir / EVENTS_FILE
+        self._offset = 0
+        self._partial = b""
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def read_new(self) -> List[Dict]:
+        """Events appended since the last call (a half-written line waits)"""
+        try:
+            with open(self.path, 'rb') as f:
+                f.seek(self._offset)
+                data = f.read()
+        except FileNotFoundError:
+            return []
+        if not data:
+            return []
+        self._offset += len(data)
+
+        *lines, self._partial = (self._partial + data).split(b"\n")
+        events = []
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                events.append(json.loads(line))
+            except ValueError:
+                continue
+        return events
+
+
+def summary_event(run_dir: Path) -> Dict:
+    """
+    A run_finished event built from pipeline_report.json, for runs that
+    finished before progress events existed (status "unknown" without one)
+    """
+    try:
+        with open(run_dir / "pipeline_report.json", 'r') as f:
+            report = json.load(f)
+    except (OSError, ValueError):
+        report = {}
+    return {
+        "seq": 1,
+        "type": TERMINAL_EVENT,
+        "time": report.get("end_time"),
+        "status": report.get("status", "unknown"),
+        "failed_stage": report.get("failed_stage"),
+        "error": report.get("error"),
+        "stages": {
+            name: {"status": record.get("status"), "duration_seconds": record.get("duration_seconds")}
+            for name, record in report.get("stages", {}).items()
+        }
+    }
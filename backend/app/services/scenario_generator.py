@@ -0,0 +1,487 @@
+"""
+Synthetic Scenario Generator
+NumPy-vectorized generation of large synthetic flood scenarios for load testing.
+
+Produces 10k-100k locations with realistic risk, hydrograph and simulation
+distributions in the same shapes as the mock API (PredictionsResponse,
+SimulationResponse, HydrographResponse) and as DL prediction documents that
+can be loaded straight into the prediction store.
+"""
+import argparse
+import gc
+import json
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+
+# Eastern India (West Bengal, Odisha, Bihar, Jharkhand, Assam) in EPSG:4326
+EASTERN_INDIA_BOUNDS = {"west": 82.0, "south": 19.0, "east": 96.0, "north": 28.5}
+
+BASINS = np.array([
+    "Ganges-Hooghly", "Teesta", "Damodar", "Torsa", "Bhagirathi", "Coastal",
+    "Mahananda", "Rupnarayan", "Mahanadi", "Brahmaputra", "Kosi", "Subarnarekha",
+])
+
+SEVERITIES = np.array(["LOW", "MODERATE", "HIGH", "CRITICAL"])
+
+# Driving factor ranges per severity code (LOW, MODERATE, HIGH, CRITICAL)
+RAINFALL_RANGE = np.array([(20, 60), (60, 120), (120, 200), (200, 350)], dtype=float)
+DISCHARGE_RANGE = np.array([(5000, 15000), (15000, 30000), (30000, 50000), (50000, 80000)], dtype=float)
+SATURATION_RANGE = np.array([(0.3, 0.5), (0.5, 0.7), (0.7, 0.9), (0.9, 0.99)], dtype=float)
+
+# Same horizons / frames / forecast steps as MockDataService
+HORIZON_OFFSETS = {"6h": -0.22, "12h": -0.09, "24h": 0.0, "72h": -0.35}
+FRAME_OFFSETS = np.array([0, 6, 12, 18, 24, 36, 48])
+FORECAST_HOURS = np.arange(9) * 6
+OBSERVED_HOURS = np.arange(-3, 1)
+
+DEPTH_LEGEND = [
+    {"depth": 0.0, "color": "#FFFFFF00", "label": "No flood"},
+    {"depth": 0.5, "color": "#B3E5FC", "label": "0.5m"},
+    {"depth": 1.0, "color": "#4FC3F7", "label": "1m"},
+    {"depth": 2.0, "color": "#0288D1", "label": "2m"},
+    {"depth": 3.0, "color": "#01579B", "label": "3m"},
+    {"depth": 5.0, "color": "#1A237E", "label": "5m+"},
+]
+
+
+def risk_to_severity_codes(risk: np.ndarray) -> np.ndarray:
+    """Vectorized MockDataService._risk_to_severity (0=LOW .. 3=CRITICAL)"""
+    return np.searchsorted(np.array([0.3, 0.6, 0.85]), risk, side="right")
+
+
+class Scenario:
+    """Column-oriented synthetic scenario; rows are materialized on demand"""
+
+    def __init__(self, count: int, seed: int = 0, now: Optional[datetime] = None):
+        rng = np.random.default_rng(seed)
+        self.count = count
+        self.seed = seed
+        self.now = now or datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+        b = EASTERN_INDIA_BOUNDS
+
+        # Locations cluster along river corridors: draw around basin centroids
+        n_basins = len(BASINS)
+        centroid_lat = rng.uniform(b["south"] + 1, b["north"] - 1, n_basins)
+        centroid_lon = rng.uniform(b["west"] + 1, b["east"] - 1, n_basins)
+        self.basin_idx = rng.integers(0, n_basins, count)
+        self.lat = np.clip(centroid_lat[self.basin_idx] + rng.normal(0, 1.2, count), b["south"], b["north"])
+        self.lon = np.clip(centroid_lon[self.basin_idx] + rng.normal(0, 1.2, count), b["west"], b["east"])
+
+        # Right-skewed risk with a flooding hotspot in a few basins
+        hotspot = np.isin(self.basin_idx, rng.choice(n_basins, 3, replace=False))
+        self.risk = np.round(np.clip(
+            np.where(hotspot, rng.beta(5, 2, count), rng.beta(2, 4, count)), 0.01, 0.99
+        ), 2)
+        self.severity = risk_to_severity_codes(self.risk)
+
+        self.confidence = np.round(rng.uniform(0.82, 0.95, count), 2)
+        self.has_history = rng.random(count) < 0.5
+
+        # Derived fields (same formulas as MockDataService)
+        self.radius = np.round(3000 + self.risk * 10000, 0)
+        self.time_to_peak = (24 - self.risk * 18).astype(int)
+        self.discharge = np.round(10000 + self.risk * 70000, 0)
+        self.max_depth = np.round(self.risk * 6.0, 1)
+        self.affected_area = np.round(self.risk * 250.0, 1)
+        self.flood_duration = (self.risk * 60).astype(int)
+
+        # Driving factors drawn within each location's severity range
+        self.rainfall = np.round(_uniform_in(rng, RAINFALL_RANGE[self.severity]), 1)
+        self.upstream = np.round(_uniform_in(rng, DISCHARGE_RANGE[self.severity]), 0)
+        self.saturation = np.round(_uniform_in(rng, SATURATION_RANGE[self.severity]), 2)
+        self.tide = np.where(rng.random(count) > 0.7, np.round(rng.uniform(1.5, 3.2, count), 1), np.nan)
+        self.reservoir = np.where(rng.random(count) > 0.8, np.round(rng.uniform(200, 800, count), 0), np.nan)
+        self.slope = (self.severity >= 2) & (rng.random(count) > 0.6)
+
+        # Hydrographs: N x 9 forecast rising to a peak at 18h, N x 4 observed
+        hours = FORECAST_HOURS[None, :]
+        base = self.discharge[:, None]
+        self.forecast_discharge = np.round(np.where(
+            hours <= 18,
+            base * 0.7 + base * 0.3 * (hours / 18),
+            base - base * 0.3 * ((hours - 18) / 30)
+        ), 0)
+        self.observed_discharge = np.round(
+            base * 0.7 + rng.uniform(-2000, 2000, (count, len(OBSERVED_HOURS))), 0
+        )
+
+        # Simulation frames: shared water-level curve scaled per location
+        levels = np.where(FRAME_OFFSETS <= 18, FRAME_OFFSETS / 18, np.maximum(0, 1 - (FRAME_OFFSETS - 18) / 30))
+        self.water_level = np.round(levels, 2)
+        self.frame_depth = np.round(levels[None, :] * self.max_depth[:, None], 1)
+        self.frame_area = np.round(levels[None, :] * self.affected_area[:, None], 1)
+
+        self.ids = [f"syn_{BASINS[i].lower().replace('-', '_')}_{n:06d}" for n, i in enumerate(self.basin_idx.tolist())]
+
+    # ------------------------------------------------------------------
+    # Mock API shapes
+    # ------------------------------------------------------------------
+
+    def predictions_response(self, limit: Optional[int] = None) -> Dict:
+        """PredictionsResponse-shaped payload for the first `limit` locations"""
+        return self._predictions_response(self.count if limit is None else min(limit, self.count))
+
+    def _predictions_response(self, n: int) -> Dict:
+        cols = self._columns(n)
+        horizons = {}
+        for label, offset in HORIZON_OFFSETS.items():
+            risk = np.round(np.maximum(0.0, self.risk[:n] + offset), 2)
+            if label == "6h":
+                peak = self.time_to_peak[:n] + 6
+            elif label == "12h":
+                peak = self.time_to_peak[:n]
+            elif label == "24h":
+                peak = np.maximum(-6, self.time_to_peak[:n] - 12)
+            else:
+                peak = np.maximum(-54, self.time_to_peak[:n] - 60)
+            horizons[label] = (
+                risk.tolist(),
+                SEVERITIES[risk_to_severity_codes(self.risk[:n] + offset)].tolist(),
+                peak.tolist()
+            )
+
+        factors = [
+            _driving_factors(rain, up, sat, tide, res, slope)
+            for rain, up, sat, tide, res, slope in zip(
+                cols["rainfall"], cols["upstream"], cols["saturation"],
+                cols["tide"], cols["reservoir"], cols["slope"]
+            )
+        ]
+        h6, h12, h24, h72 = (horizons[label] for label in HORIZON_OFFSETS)
+
+        predictions = [
+            {
+                "id": pid,
+                "location": {
+                    "name": f"Synthetic Location {i}",
+                    "basin": basin,
+                    "center": {"lat": lat, "lon": lon}
+                },
+                "current": {
+                    "riskScore": risk,
+                    "severityClass": severity,
+                    "influenceRadius": radius,
+                    "timeToPeak": peak,
+                    "confidence": confidence
+                },
+                "forecast": {
+                    "peakDischarge": discharge,
+                    "maxWaterDepth": depth,
+                    "affectedAreaEstimate": area,
+                    "floodDuration": duration
+                },
+                "timeHorizons": {
+                    "6h": {"riskScore": h6[0][i], "severityClass": h6[1][i], "timeToPeak": h6[2][i]},
+                    "12h": {"riskScore": h12[0][i], "severityClass": h12[1][i], "timeToPeak": h12[2][i]},
+                    "24h": {"riskScore": h24[0][i], "severityClass": h24[1][i], "timeToPeak": h24[2][i]},
+                    "72h": {"riskScore": h72[0][i], "severityClass": h72[1][i], "timeToPeak": h72[2][i]}
+                },
+                "drivingFactors": factors[i],
+                "simulationAvailable": True,
+                "hasHistoricalData": history
+            }
+            for i, (pid, basin, lat, lon, risk, severity, radius, peak, confidence,
+                    discharge, depth, area, duration, history) in enumerate(zip(
+                cols["id"], cols["basin"], cols["lat"], cols["lon"], cols["risk"],
+                cols["severity"], cols["radius"], cols["time_to_peak"], cols["confidence"],
+                cols["discharge"], cols["max_depth"], cols["affected_area"],
+                cols["flood_duration"], cols["has_history"]
+            ))
+        ]
+
+        return {
+            "metadata": {
+                "modelVersion": "synthetic",
+                "lastUpdated": _iso(self.now),
+                "nextUpdate": _iso(self.now + timedelta(hours=6)),
+                "forecastCycle": f"SYN_{self.now.strftime('%Y%m%d_%H')}_{self.seed}",
+                "coverageArea": "Eastern India (synthetic)",
+                "totalLocations": n
+            },
+            "predictions": predictions
+        }
+
+    def simulation_response(self, index: int) -> Dict:
+        """SimulationResponse-shaped payload for one location"""
+        pid = self.ids[index]
+        depths = self.frame_depth[index].tolist()
+        areas = self.frame_area[index].tolist()
+        levels = self.water_level.tolist()
+        lat, lon = float(self.lat[index]), float(self.lon[index])
+
+        frames = []
+        for k, offset in enumerate(FRAME_OFFSETS.tolist()):
+            frame = {
+                "timeOffset": offset,
+                "timeLabel": f"T+{offset}h" if offset > 0 else "T+0h (Now)",
+                "timestamp": _iso(self.now + timedelta(hours=offset)),
+                "waterLevel": levels[k],
+                "depth": depths[k],
+                "affectedArea": areas[k],
+                "imageUrl": f"https://cdn.yourapp.com/simulations/{pid}/frame_{offset:02d}.png",
+                "thumbnailUrl": f"https://cdn.yourapp.com/simulations/{pid}/thumb_{offset:02d}.png",
+            }
+            if offset == 18:
+                frame["isPeak"] = True
+                frame["timeLabel"] += " (Peak)"
+            frames.append(frame)
+
+        basin = str(BASINS[self.basin_idx[index]])
+        return {
+            "predictionId": pid,
+            "location": {"name": f"Synthetic Location {index}", "basin": basin},
+            "simulation": {
+                "source": f"SYNTHETIC_{basin.lower().replace('-', '_')}_{self.now.strftime('%Y%m%d')}",
+                "resolution": "500m",
+                "totalDuration": 48,
+                "frameCount": len(frames),
+                "recommendedFPS": 1
+            },
+            "bounds": _bounds(lat, lon),
+            "frames": frames,
+            "legend": {"depthScale": DEPTH_LEGEND},
+            "metadata": {
+                "peakFrame": 3,
+                "peakDepth": float(self.max_depth[index]),
+                "peakArea": float(self.affected_area[index]),
+                "recessionTime": 30
+            }
+        }
+
+    def hydrograph_response(self, index: int) -> Dict:
+        """HydrographResponse-shaped payload for one location"""
+        base = float(self.discharge[index])
+        forecast_times = [_iso(self.now + timedelta(hours=int(h))) for h in FORECAST_HOURS]
+        observed_times = [_iso(self.now + timedelta(hours=int(h))) for h in OBSERVED_HOURS]
+        basin = str(BASINS[self.basin_idx[index]])
+        return {
+            "predictionId": self.ids[index],
+            "gaugeStation": f"Synthetic Location {index}_Station",
+            "river": basin.split("-")[0],
+            "forecast": [
+                {"timestamp": t, "discharge": d}
+                for t, d in zip(forecast_times, self.forecast_discharge[index].tolist())
+            ],
+            "observed": [
+                {"timestamp": t, "discharge": d}
+                for t, d in zip(observed_times, self.observed_discharge[index].tolist())
+            ],
+            "warningLevels": {
+                "low": round(base * 0.5, 0),
+                "medium": round(base * 0.7, 0),
+                "high": round(base * 0.85, 0),
+                "critical": round(base * 1.0, 0)
+            }
+        }
+
+    # ------------------------------------------------------------------
+    # DL prediction documents
+    # ------------------------------------------------------------------
+
+    def dl_predictions(self, timesteps: int = 3) -> Iterator[Dict]:
+        """DLPredictionIngest-shaped documents (JSON-native values)"""
+        cols = self._columns(self.count)
+        inference = _iso(self.now)
+        cycle = f"SYN_{self.now.strftime('%Y%m%d_%H')}"
+        step_times = [_iso(self.now + timedelta(hours=t)) for t in range(timesteps)]
+
+        for i in range(self.count):
+            pid = cols["id"][i]
+            lat, lon = cols["lat"][i], cols["lon"][i]
+            base_url = f"https://cdn.yourapp.com/dl/{pid}"
+            yield {
+                "prediction_id": pid,
+                "forecast_cycle": cycle,
+                "model_version": "synthetic",
+                "inference_timestamp": inference,
+                "location": {
+                    "basin": cols["basin"][i],
+                    "region": f"Synthetic Location {i}",
+                    "center": {"lat": lat, "lon": lon},
+                    "bounds": _bounds(lat, lon),
+                    "spatial_reference": "EPSG:4326",
+                    "ground_resolution_m": 30.0
+                },
+                "grid_shape": {"height": 1024, "width": 1024, "timesteps": timesteps},
+                "raster_data": {
+                    "netcdf_url": f"{base_url}/forecast.nc",
+                    "netcdf_crf_url": f"{base_url}/forecast.crf",
+                    "arcgis_service_url": None,
+                    "geotiff_urls": [
+                        {"timestep": t, "time_offset_hours": t, "timestamp": step_times[t],
+                         "depth_url": f"{base_url}/depth_{t:03d}.tif",
+                         "velocity_x_url": None, "velocity_y_url": None}
+                        for t in range(timesteps)
+                    ],
+                    "preview_urls": [
+                        {"timestep": t, "timestamp": step_times[t],
+                         "png_url": f"{base_url}/preview_{t:03d}.png",
+                         "thumbnail_url": f"{base_url}/thumb_{t:03d}.png"}
+                        for t in range(timesteps)
+                    ]
+                },
+                "aggregated_metrics": {
+                    "peak_timestep": min(1, timesteps - 1),
+                    "peak_timestamp": step_times[min(1, timesteps - 1)],
+                    "peak_depth_max": cols["max_depth"][i],
+                    "peak_depth_mean": round(cols["max_depth"][i] / 3, 2),
+                    "peak_velocity_max": None,
+                    "affected_area_km2": cols["affected_area"][i],
+                    "flooded_pixel_count": int(cols["affected_area"][i] * 1111),
+                    "total_water_volume_m3": round(cols["affected_area"][i] * cols["max_depth"][i] * 1e6 / 3, 0),
+                    "flood_onset_time": 2,
+                    "flood_duration_hours": cols["flood_duration"][i],
+                    "recession_time": 30,
+                    "estimated_discharge_peak": cols["discharge"][i],
+                    "estimated_discharge_mean": None
+                },
+                "risk_assessment": {
+                    "risk_score": cols["risk"][i],
+                    "severity_class": cols["severity"][i],
+                    "confidence": cols["confidence"][i],
+                    "uncertainty_std": None,
+                    "buildings_at_risk": None,
+                    "road_segments_flooded": None,
+                    "population_exposed": None
+                },
+                "input_features": {
+                    "rainfall_24h_max_mm": cols["rainfall"][i],
+                    "rainfall_7day_forecast_mm": round(cols["rainfall"][i] * 2.5, 1),
+                    "upstream_discharge_m3s": cols["upstream"][i],
+                    "soil_saturation_mean": cols["saturation"][i],
+                    "antecedent_moisture_index": None,
+                    "tide_level_m": cols["tide"][i]
+                },
+                "model_info": {
+                    "architecture": "UNet-ConvLSTM",
+                    "model_version": "synthetic",
+                    "training_date": "2025-01-01",
+                    "training_rmse_m": None,
+                    "inference_time_seconds": 0.0,
+                    "gpu_device": None,
+                    "ensemble_size": None
+                },
+                "data_sources": {
+                    "lisflood_run_id": f"synthetic_{self.seed}",
+                    "weather_forecast_source": "synthetic",
+                    "gauge_data_timestamp": None,
+                    "dem_version": None
+                }
+            }
+
+    def load_into(self, store, index=None) -> int:
+        """Bulk-load the DL documents into a prediction store (and spatial index)"""
+        docs = list(self.dl_predictions())
+        store.put_many(docs, trusted=True)
+        if index is not None:
+            for doc in docs:
+                index.add(doc)
+        return self.count
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+
+    def _columns(self, n: int) -> Dict[str, List]:
+        """Python-native column lists for fast row materialization"""
+        return {
+            "id": self.ids[:n],
+            "basin": BASINS[self.basin_idx[:n]].tolist(),
+            "lat": np.round(self.lat[:n], 4).tolist(),
+            "lon": np.round(self.lon[:n], 4).tolist(),
+            "risk": self.risk[:n].tolist(),
+            "severity": SEVERITIES[self.severity[:n]].tolist(),
+            "radius": self.radius[:n].tolist(),
+            "time_to_peak": self.time_to_peak[:n].tolist(),
+            "confidence": self.confidence[:n].tolist(),
+            "discharge": self.discharge[:n].tolist(),
+            "max_depth": self.max_depth[:n].tolist(),
+            "affected_area": self.affected_area[:n].tolist(),
+            "flood_duration": self.flood_duration[:n].tolist(),
+            "has_history": self.has_history[:n].tolist(),
+            "rainfall": self.rainfall[:n].tolist(),
+            "upstream": self.upstream[:n].tolist(),
+            "saturation": self.saturation[:n].tolist(),
+            "tide": [None if np.isnan(v) else v for v in self.tide[:n].tolist()],
+            "reservoir": [None if np.isnan(v) else v for v in self.reservoir[:n].tolist()],
+            "slope": self.slope[:n].tolist(),
+        }
+
+
+@contextmanager
+def gc_paused():
+    """
+    Suspend the cyclic GC while building millions of small dicts.
+
+    None of them form reference cycles, and collections triggered by the
+    allocation count alone roughly double materialization time at 100k rows.
+    The switch is process-wide, so only standalone tools (this CLI, the
+    benchmarks) use it; the API server never does.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _uniform_in(rng: np.random.Generator, ranges: np.ndarray) -> np.ndarray:
+    """One uniform draw per row within that row's (low, high) range"""
+    return ranges[:, 0] + rng.random(len(ranges)) * (ranges[:, 1] - ranges[:, 0])
+
+
+def _driving_factors(rainfall, upstream, saturation, tide, reservoir, slope) -> Dict:
+    factors = {
+        "rainfall24h": rainfall,
+        "upstreamDischarge": upstream,
+        "soilSaturation": saturation
+    }
+    if tide is not None:
+        factors["tideLevel"] = tide
+    if reservoir is not None:
+        factors["reservoirRelease"] = reservoir
+    if slope:
+        factors["slopeInstability"] = True
+    return factors
+
+
+def _bounds(lat: float, lon: float) -> Dict:
+    return {
+        "west": round(lon - 0.15, 4),
+        "south": round(lat - 0.15, 4),
+        "east": round(lon + 0.15, 4),
+        "north": round(lat + 0.15, 4)
+    }
+
+
+def _iso(value: datetime) -> str:
+    return value.isoformat() + "Z"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic flood scenario")
+    parser.add_argument("--count", type=int, default=10000, help="Number of locations")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    parser.add_argument("--output", type=str, default=None, help="Write PredictionsResponse JSON here")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    scenario = Scenario(args.count, seed=args.seed)
+    generated = time.perf_counter()
+    with gc_paused():
+        payload = scenario.predictions_response()
+    materialized = time.perf_counter()
+
+    print(f"Generated {args.count} locations in {(generated - start) * 1000:.1f} ms")
+    print(f"Materialized PredictionsResponse in {(materialized - generated) * 1000:.1f} ms")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(payload, f)
+        print(f"Saved to {args.output}")
@@ -0,0 +1,69 @@
+"""
+Serialization Service
+Single-pass JSON encoding for response bodies.
+
+By default response data is validated against its response model (the same
+check FastAPI's `response_model` performs) before being encoded. With
+FAST_RESPONSES enabled, trusted internal data is encoded once by the compiled
+pydantic-core serializer and validation is left to the ingest boundaries.
+"""
+import json
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from pydantic_core import to_json
+
+from app.config import settings
+
+
+def dumps(data: Any, model: Optional[Any] = None, by_alias: bool = True) -> bytes:
+    """
+    Encode response data as compact JSON bytes.
+
+    Args:
+        data: Dicts/lists/models/datetimes (anything FastAPI could return)
+        model: Optional response type (model class or e.g. ``List[Shelter]``);
+            ignored in fast mode
+        by_alias: Emit aliased field names (``class`` for ``class_``), as
+            FastAPI's response_model_by_alias does
+
+    Returns:
+        UTF-8 JSON bytes
+    """
+    if isinstance(data, bytes):
+        return data
+    if settings.FAST_RESPONSES:
+        return to_json(data, by_alias=by_alias)
+    if model is not None:
+        adapter = _adapter(model)
+        return adapter.dump_json(adapter.validate_python(data), by_alias=by_alias)
+    # Same flags as Starlette's JSONResponse: UTF-8 output, NaN/Infinity rejected
+    return json.dumps(
+        jsonable_encoder(data, by_alias=by_alias), ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def json_response(
+    data: Any,
+    model: Optional[Any] = None,
+    status_code: int = 200,
+    headers: Optional[Dict[str, str]] = None
+) -> Response:
+    """
+    Response for a route, bypassing FastAPI's response_model revalidation
+    and jsonable_encoder pass (the route's response_model stays in OpenAPI).
+    """
+    return Response(
+        content=dumps(data, model),
+        status_code=status_code,
+        media_type="application/json",
+        headers=headers
+    )
+
+
+@lru_cache(maxsize=None)
+def _adapter(model: Any) -> TypeAdapter:
+    return TypeAdapter(model)
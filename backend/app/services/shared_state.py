@@ -0,0 +1,144 @@
+"""
+Shared State Service
+Cross-process state for multi-worker deployments (WORKERS > 1).
+
+Every uvicorn/gunicorn worker opens the same SQLite database in WAL mode
+(`STATE_DIR/shared.db`), so readers never block the writer and no external
+service is needed. It holds monotonic counters (cache versions), versioned
+JSON blobs (materialized alert state) and an append-only event log that
+each worker relays to its own SSE clients.
+"""
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, List, Optional, Tuple
+
+from app.config import settings
+
+# Events kept in the log for relaying; older rows are pruned on append
+EVENT_LOG_RETENTION = 10000
+
+# Identifies this process as the owner of claimed queue jobs. Unlike a pid
+# it is never reused by a restarted server (containers restart as pid 1).
+INSTANCE_ID = f"{os.getpid()}-{uuid.uuid4().hex[:12]}"
+
+
+class SharedState:
+    """SQLite WAL store opened by every worker process"""
+
+    def __init__(self, db_path: Path):
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.db_path = db_path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(
+            str(db_path), check_same_thread=False, isolation_level=None, timeout=30.0
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS counters (
+                name TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS blobs (
+                name TEXT PRIMARY KEY,
+                version INTEGER NOT NULL,
+                data TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                event_type TEXT NOT NULL,
+                data TEXT NOT NULL
+            );
+        """)
+
+    @contextmanager
+    def transaction(self):
+        """
+        Exclusive read-modify-write section across all workers.
+
+        Holds the database write lock (BEGIN IMMEDIATE) for the duration of
+        the block; calls made on this object inside the block join it.
+        """
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    # ------------------------------------------------------------------
+    # Counters
+    # ------------------------------------------------------------------
+
+    def counter(self, name: str) -> int:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM counters WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else 0
+
+    def increment(self, name: str) -> int:
+        """Atomically add one to a counter and return the new value"""
+        with self._lock:
+            return self._conn.execute(
+                "INSERT INTO counters (name, value) VALUES (?, 1) "
+                "ON CONFLICT(name) DO UPDATE SET value = value + 1 RETURNING value",
+                (name,)
+            ).fetchone()[0]
+
+    # ------------------------------------------------------------------
+    # Versioned blobs
+    # ------------------------------------------------------------------
+
+    def blob_version(self, name: str) -> int:
+        with self._lock:
+            row = self._conn.execute("SELECT version FROM blobs WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else 0
+
+    def load_blob(self, name: str) -> Tuple[int, Optional[Any]]:
+        """(version, decoded data) of a blob; (0, None) when absent"""
+        with self._lock:
+            row = self._conn.execute("SELECT version, data FROM blobs WHERE name = ?", (name,)).fetchone()
+        return (row[0], json.loads(row[1])) if row else (0, None)
+
+    def save_blob(self, name: str, version: int, data: Any):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO blobs (name, version, data) VALUES (?, ?, ?)",
+                (name, version, json.dumps(data, separators=(",", ":")))
+            )
+
+    # ------------------------------------------------------------------
+    # Event log
+    # ------------------------------------------------------------------
+
+    def append_event(self, event_type: str, data: str) -> int:
+        """Append a pre-serialized event; returns its global id"""
+        with self._lock:
+            event_id = self._conn.execute(
+                "INSERT INTO events (event_type, data) VALUES (?, ?)", (event_type, data)
+            ).lastrowid
+            if event_id % 1000 == 0:
+                self._conn.execute("DELETE FROM events WHERE id <= ?", (event_id - EVENT_LOG_RETENTION,))
+        return event_id
+
+    def events_since(self, event_id: int, limit: int = 500) -> List[Tuple[int, str, str]]:
+        """(id, event_type, data) rows after event_id, oldest first"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT id, event_type, data FROM events WHERE id > ? ORDER BY id LIMIT ?",
+                (event_id, limit)
+            ).fetchall()
+
+    def last_event_id(self) -> int:
+        with self._lock:
+            row = self._conn.execute("SELECT MAX(id) FROM events").fetchone()
+        return row[0] or 0
+
+
+shared_state = SharedState(Path(settings.STATE_DIR) / "shared.db") if settings.WORKERS > 1 else None
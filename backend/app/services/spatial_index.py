@@ -0,0 +1,385 @@
+"""
+Spatial Index Service
+Bounding-box index over prediction extents for viewport and point queries.
+
+The default backend is an in-memory R-tree maintained on ingest. When
+SPATIAL_INDEX_BACKEND=postgis, queries go to the dl_predictions table and
+its GIST index instead.
+"""
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.services.prediction_store import _as_datetime
+
+BBox = Tuple[float, float, float, float]  # (west, south, east, north)
+
+# Projection needed to index a stored prediction
+INDEX_FIELDS = ["prediction_id", "inference_timestamp", "location.bounds"]
+
+
+# ============================================================================
+# R-tree
+# ============================================================================
+
+class _Node:
+    __slots__ = ("leaf", "entries", "parent")
+
+    def __init__(self, leaf: bool):
+        self.leaf = leaf
+        self.entries: List[list] = []  # [bbox, prediction_id | _Node]
+        self.parent: Optional["_Node"] = None
+
+
+def _union(a: BBox, b: BBox) -> BBox:
+    return (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+
+
+def _area(b: BBox) -> float:
+    return (b[2] - b[0]) * (b[3] - b[1])
+
+
+def _intersects(a: BBox, b: BBox) -> bool:
+    return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
+
+
+def _mbr(entries: List[list]) -> BBox:
+    west, south, east, north = entries[0][0]
+    for bbox, _ in entries[1:]:
+        west, south = min(west, bbox[0]), min(south, bbox[1])
+        east, north = max(east, bbox[2]), max(north, bbox[3])
+    return (west, south, east, north)
+
+
+class RTree:
+    """
+    Guttman R-tree with quadratic split.
+
+    Supports insert, delete and intersection search over (west, south,
+    east, north) boxes keyed by prediction id.
+    """
+
+    def __init__(self, max_entries: int = 16):
+        self.max_entries = max_entries
+        self.min_entries = max(2, max_entries * 2 // 5)
+        self._root = _Node(leaf=True)
+        self._leaf_of: Dict[str, _Node] = {}
+
+    def __len__(self) -> int:
+        return len(self._leaf_of)
+
+    def __contains__(self, item_id: str) -> bool:
+        return item_id in self._leaf_of
+
+    def insert(self, item_id: str, bbox: BBox):
+        if item_id in self._leaf_of:
+            self.delete(item_id)
+        leaf = self._choose_leaf(bbox)
+        leaf.entries.append([bbox, item_id])
+        self._leaf_of[item_id] = leaf
+        self._adjust(leaf)
+
+    def delete(self, item_id: str) -> bool:
+        leaf = self._leaf_of.pop(item_id, None)
+        if leaf is None:
+            return False
+        leaf.entries = [e for e in leaf.entries if e[1] != item_id]
+        self._condense(leaf)
+        return True
+
+    def search(self, bbox: BBox) -> List[str]:
+        """Ids of all boxes intersecting bbox"""
+        results = []
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            for entry_bbox, item in node.entries:
+                if _intersects(entry_bbox, bbox):
+                    if node.leaf:
+                        results.append(item)
+                    else:
+                        stack.append(item)
+        return results
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _choose_leaf(self, bbox: BBox) -> _Node:
+        node = self._root
+        while not node.leaf:
+            best = min(
+                node.entries,
+                key=lambda e: (_area(_union(e[0], bbox)) - _area(e[0]), _area(e[0]))
+            )
+            node = best[1]
+        return node
+
+    def _adjust(self, node: _Node):
+        """Propagate bounding boxes (and splits) from node up to the root"""
+        while True:
+            split = self._split(node) if len(node.entries) > self.max_entries else None
+            parent = node.parent
+
+            if parent is None:
+                if split is not None:
+                    root = _Node(leaf=False)
+                    for child in (node, split):
+                        child.parent = root
+                        root.entries.append([_mbr(child.entries), child])
+                    self._root = root
+                return
+
+            for entry in parent.entries:
+                if entry[1] is node:
+                    entry[0] = _mbr(node.entries)
+                    break
+            if split is not None:
+                split.parent = parent
+                parent.entries.append([_mbr(split.entries), split])
+            node = parent
+
+    def _split(self, node: _Node) -> _Node:
+        """Quadratic split: move roughly half of node's entries to a new sibling"""
+        entries = node.entries
+        worst, seeds = -1.0, (0, 1)
+        for i in range(len(entries)):
+            for j in range(i + 1, len(entries)):
+                waste = _area(_union(entries[i][0], entries[j][0])) - _area(entries[i][0]) - _area(entries[j][0])
+                if waste > worst:
+                    worst, seeds = waste, (i, j)
+
+        group_a, group_b = [entries[seeds[0]]], [entries[seeds[1]]]
+        box_a, box_b = entries[seeds[0]][0], entries[seeds[1]][0]
+        remaining = [e for k, e in enumerate(entries) if k not in seeds]
+
+        while remaining:
+            # Make sure both groups end up with at least min_entries
+            if len(group_a) + len(remaining) == self.min_entries:
+                group_a.extend(remaining)
+                break
+            if len(group_b) + len(remaining) == self.min_entries:
+                group_b.extend(remaining)
+                break
+
+            entry = max(
+                remaining,
+                key=lambda e: abs(
+                    (_area(_union(box_a, e[0])) - _area(box_a)) - (_area(_union(box_b, e[0])) - _area(box_b))
+                )
+            )
+            remaining.remove(entry)
+            grow_a = _area(_union(box_a, entry[0])) - _area(box_a)
+            grow_b = _area(_union(box_b, entry[0])) - _area(box_b)
+            if (grow_a, _area(box_a), len(group_a)) <= (grow_b, _area(box_b), len(group_b)):
+                group_a.append(entry)
+                box_a = _union(box_a, entry[0])
+            else:
+                group_b.append(entry)
+                box_b = _union(box_b, entry[0])
+
+        sibling = _Node(leaf=node.leaf)
+        node.entries, sibling.entries = group_a, group_b
+        for _, item in sibling.entries:
+            if node.leaf:
+                self._leaf_of[item] = sibling
+            else:
+                item.parent = sibling
+        return sibling
+
+    def _condense(self, node: _Node):
+        """Remove underfull nodes after a delete and reinsert their items"""
+        orphans: List[list] = []
+        while node.parent is not None:
+            parent = node.parent
+            if len(node.entries) < self.min_entries:
+                parent.entries = [e for e in parent.entries if e[1] is not node]
+                orphans.extend(self._leaf_entries(node))
+            else:
+                for entry in parent.entries:
+                    if entry[1] is node:
+                        entry[0] = _mbr(node.entries)
+                        break
+            node = parent
+
+        # Shrink the tree when the root is left with a single child
+        while not self._root.leaf and len(self._root.entries) == 1:
+            self._root = self._root.entries[0][1]
+            self._root.parent = None
+        if not self._root.leaf and not self._root.entries:
+            self._root = _Node(leaf=True)
+
+        for bbox, item_id in orphans:
+            del self._leaf_of[item_id]
+            self.insert(item_id, bbox)
+
+    def _leaf_entries(self, node: _Node) -> List[list]:
+        if node.leaf:
+            return list(node.entries)
+        entries = []
+        for _, child in node.entries:
+            entries.extend(self._leaf_entries(child))
+        return entries
+
+
+# ============================================================================
+# Index backends
+# ============================================================================
+
+class MemorySpatialIndex:
+    """R-tree of prediction bounds plus inference timestamps for time filters"""
+
+    blocking = False
+
+    def __init__(self):
+        self._tree = RTree()
+        self._timestamps: Dict[str, datetime] = {}
+        self._lock = threading.Lock()
+        self._catch_up_lock = threading.Lock()
+        self._seen_seq = 0
+
+    def __len__(self) -> int:
+        return len(self._tree)
+
+    def add(self, prediction: Dict):
+        """Index (or re-index) an ingested prediction document"""
+        bounds = prediction["location"]["bounds"]
+        bbox = (bounds["west"], bounds["south"], bounds["east"], bounds["north"])
+        with self._lock:
+            self._tree.insert(prediction["prediction_id"], bbox)
+            self._timestamps[prediction["prediction_id"]] = _as_datetime(prediction["inference_timestamp"])
+
+    def catch_up(self, store) -> int:
+        """
+        Index predictions other workers wrote to a shared store since the
+        last call. Returns the number of documents (re-)indexed.
+        """
+        with self._catch_up_lock:
+            changes = store.changes_since(self._seen_seq, INDEX_FIELDS)
+            for seq, prediction in changes:
+                self.add(prediction)
+                self._seen_seq = seq
+        return len(changes)
+
+    def query_bbox(
+        self,
+        bbox: BBox,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None
+    ) -> List[str]:
+        """Prediction ids whose bounds intersect bbox, newest first"""
+        with self._lock:
+            ids = self._tree.search(bbox)
+            timestamps = {pid: self._timestamps[pid] for pid in ids}
+
+        since = None if since is None else _as_datetime(since)
+        until = None if until is None else _as_datetime(until)
+        ids = [
+            pid for pid in ids
+            if (since is None or timestamps[pid] >= since) and (until is None or timestamps[pid] <= until)
+        ]
+        ids.sort(key=timestamps.__getitem__, reverse=True)
+        return ids
+
+
+class PostGISSpatialIndex:
+    """
+    Spatial queries against dl_predictions (GIST index on bounds).
+
+    Ingested predictions are upserted into the table so the database stays
+    the source of truth for spatial lookups.
+    """
+
+    blocking = True
+
+    def __init__(self, database_url: str):
+        from sqlalchemy import create_engine
+        self._engine = create_engine(database_url, pool_pre_ping=True)
+
+    def catch_up(self, store) -> int:
+        """Nothing to do: every worker queries the same table"""
+        return 0
+
+    def add(self, prediction: Dict):
+        from sqlalchemy import text
+
+        loc = prediction["location"]
+        bounds = loc["bounds"]
+        grid = prediction["grid_shape"]
+        risk = prediction["risk_assessment"]
+        raster = prediction["raster_data"]
+        with self._engine.begin() as conn:
+            conn.execute(text("""
+                INSERT INTO dl_predictions (
+                    prediction_id, forecast_cycle, model_version, inference_timestamp,
+                    basin, region, center, bounds, ground_resolution_m,
+                    grid_height, grid_width, grid_timesteps,
+                    risk_score, severity_class, confidence, netcdf_url, netcdf_crf_url
+                ) VALUES (
+                    :prediction_id, :forecast_cycle, :model_version, :inference_timestamp,
+                    :basin, :region,
+                    ST_SetSRID(ST_MakePoint(:lon, :lat), 4326)::geography,
+                    ST_MakeEnvelope(:west, :south, :east, :north, 4326)::geography,
+                    :ground_resolution_m, :grid_height, :grid_width, :grid_timesteps,
+                    :risk_score, :severity_class, :confidence, :netcdf_url, :netcdf_crf_url
+                )
+                ON CONFLICT (prediction_id) DO UPDATE SET
+                    inference_timestamp = EXCLUDED.inference_timestamp,
+                    bounds = EXCLUDED.bounds,
+                    center = EXCLUDED.center,
+                    risk_score = EXCLUDED.risk_score,
+                    severity_class = EXCLUDED.severity_class
+            """), {
+                "prediction_id": prediction["prediction_id"],
+                "forecast_cycle": prediction["forecast_cycle"],
+                "model_version": prediction["model_version"],
+                "inference_timestamp": prediction["inference_timestamp"],
+                "basin": loc["basin"],
+                "region": loc["region"],
+                "lat": loc["center"]["lat"],
+                "lon": loc["center"]["lon"],
+                "west": bounds["west"],
+                "south": bounds["south"],
+                "east": bounds["east"],
+                "north": bounds["north"],
+                "ground_resolution_m": loc["ground_resolution_m"],
+                "grid_height": grid["height"],
+                "grid_width": grid["width"],
+                "grid_timesteps": grid["timesteps"],
+                "risk_score": risk["risk_score"],
+                "severity_class": risk["severity_class"],
+                "confidence": risk["confidence"],
+                "netcdf_url": raster["netcdf_url"],
+                "netcdf_crf_url": raster["netcdf_crf_url"],
+            })
+
+    def query_bbox(
+        self,
+        bbox: BBox,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None
+    ) -> List[str]:
+        from sqlalchemy import text
+
+        with self._engine.connect() as conn:
+            rows = conn.execute(text("""
+                SELECT prediction_id FROM dl_predictions
+                WHERE ST_Intersects(bounds, ST_MakeEnvelope(:west, :south, :east, :north, 4326)::geography)
+                  AND (CAST(:since AS TIMESTAMP) IS NULL OR inference_timestamp >= :since)
+                  AND (CAST(:until AS TIMESTAMP) IS NULL OR inference_timestamp <= :until)
+                ORDER BY inference_timestamp DESC
+            """), {
+                "west": bbox[0], "south": bbox[1], "east": bbox[2], "north": bbox[3],
+                "since": since, "until": until
+            })
+            return [row[0] for row in rows]
+
+
+def _build_index():
+    if settings.SPATIAL_INDEX_BACKEND == "postgis" and settings.DATABASE_URL:
+        return PostGISSpatialIndex(settings.DATABASE_URL)
+    return MemorySpatialIndex()
+
+
+spatial_index = _build_index()
@@ -0,0 +1,238 @@
+"""
+Time Series Store Service
+Dense gauge series for hydrographs with range queries, rollups and LTTB.
+
+Points are kept in a SQLite table shaped like `hydrograph_data` in
+database/schema.sql (one row per series, data type and timestamp). Hourly
+and daily min/max/mean rollups are maintained on every write, and long
+ranges are downsampled with Largest-Triangle-Three-Buckets so charts get a
+bounded number of points that still preserve peaks and troughs.
+"""
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from app.config import settings
+
+# Rollup resolution -> bucket width in seconds (buckets are UTC-aligned)
+RESOLUTIONS = {"hour": 3600, "day": 86400}
+
+Point = Tuple[int, float]
+
+
+class TimeSeriesStore:
+    """SQLite-backed gauge series (replace with TimescaleDB in production)"""
+
+    def __init__(self, db_path: Path):
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False, isolation_level=None, timeout=30.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS hydrograph_points (
+                series_key TEXT NOT NULL,
+                data_type TEXT NOT NULL,
+                ts INTEGER NOT NULL,
+                discharge REAL NOT NULL,
+                PRIMARY KEY (series_key, data_type, ts)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS hydrograph_rollups (
+                series_key TEXT NOT NULL,
+                data_type TEXT NOT NULL,
+                resolution TEXT NOT NULL,
+                bucket_start INTEGER NOT NULL,
+                count INTEGER NOT NULL,
+                min REAL NOT NULL,
+                max REAL NOT NULL,
+                sum REAL NOT NULL,
+                PRIMARY KEY (series_key, data_type, resolution, bucket_start)
+            ) WITHOUT ROWID;
+        """)
+
+    @contextmanager
+    def _transaction(self):
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def write(self, series_key: str, data_type: str, points: Iterable[Tuple]) -> int:
+        """
+        Upsert points and refresh the rollups of every bucket they touch.
+
+        Args:
+            series_key: Gauge / prediction identifier
+            data_type: "observed" or "forecast"
+            points: (timestamp, discharge) pairs; timestamps are datetimes
+                or epoch seconds
+
+        Returns:
+            Number of points written
+        """
+        rows = [(series_key, data_type, to_epoch(ts), float(value)) for ts, value in points]
+        if not rows:
+            return 0
+
+        first = min(row[2] for row in rows)
+        last = max(row[2] for row in rows)
+
+        with self._lock, self._transaction():
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO hydrograph_points (series_key, data_type, ts, discharge) "
+                "VALUES (?, ?, ?, ?)",
+                rows
+            )
+            # Recompute touched buckets from raw points so overwrites stay exact
+            for resolution, width in RESOLUTIONS.items():
+                start = first - first % width
+                end = last - last % width + width
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO hydrograph_rollups "
+                    "(series_key, data_type, resolution, bucket_start, count, min, max, sum) "
+                    "SELECT series_key, data_type, ?, ts - ts % ?, COUNT(*), MIN(discharge), "
+                    "MAX(discharge), SUM(discharge) FROM hydrograph_points "
+                    "WHERE series_key = ? AND data_type = ? AND ts >= ? AND ts < ? "
+                    "GROUP BY ts - ts % ?",
+                    (resolution, width, series_key, data_type, start, end, width)
+                )
+        return len(rows)
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def query(
+        self,
+        series_key: str,
+        data_type: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None
+    ) -> List[Point]:
+        """Raw points in [start, end], oldest first"""
+        sql, params = self._range_sql(
+            "SELECT ts, discharge FROM hydrograph_points WHERE series_key = ? AND data_type = ?",
+            [series_key, data_type], "ts", start, end
+        )
+        with self._lock:
+            return self._conn.execute(sql + " ORDER BY ts", params).fetchall()
+
+    def rollups(
+        self,
+        series_key: str,
+        data_type: str,
+        resolution: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None
+    ) -> List[Dict]:
+        """Pre-aggregated min/max/mean buckets in [start, end], oldest first"""
+        if resolution not in RESOLUTIONS:
+            raise ValueError(f"Unknown resolution: {resolution} (expected one of {', '.join(RESOLUTIONS)})")
+
+        sql, params = self._range_sql(
+            "SELECT bucket_start, count, min, max, sum FROM hydrograph_rollups "
+            "WHERE series_key = ? AND data_type = ? AND resolution = ?",
+            [series_key, data_type, resolution], "bucket_start", start, end
+        )
+        with self._lock:
+            rows = self._conn.execute(sql + " ORDER BY bucket_start", params).fetchall()
+        return [
+            {
+                "timestamp": from_epoch(bucket_start),
+                "count": count,
+                "min": minimum,
+                "max": maximum,
+                "mean": round(total / count, 2)
+            }
+            for bucket_start, count, minimum, maximum, total in rows
+        ]
+
+    def last_timestamp(self, series_key: str, data_type: str) -> Optional[int]:
+        """Epoch seconds of the newest point, or None for an empty series"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT MAX(ts) FROM hydrograph_points WHERE series_key = ? AND data_type = ?",
+                (series_key, data_type)
+            ).fetchone()
+        return row[0]
+
+    @staticmethod
+    def _range_sql(sql: str, params: List, column: str, start, end):
+        if start is not None:
+            sql += f" AND {column} >= ?"
+            params.append(to_epoch(start))
+        if end is not None:
+            sql += f" AND {column} <= ?"
+            params.append(to_epoch(end))
+        return sql, params
+
+
+def lttb(points: Sequence[Point], threshold: int) -> List[Point]:
+    """
+    Largest-Triangle-Three-Buckets downsampling.
+
+    Keeps the first and last points and, from each of `threshold - 2` equal
+    buckets in between, the point forming the largest triangle with the
+    previously kept point and the average of the next bucket.
+    """
+    n = len(points)
+    if threshold >= n or threshold < 3:
+        return list(points)
+
+    sampled = [points[0]]
+    every = (n - 2) / (threshold - 2)
+    a = 0
+
+    for i in range(threshold - 2):
+        # Average of the next bucket (the last point for the final bucket)
+        next_start = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        span = next_end - next_start
+        if span > 0:
+            avg_x = sum(points[j][0] for j in range(next_start, next_end)) / span
+            avg_y = sum(points[j][1] for j in range(next_start, next_end)) / span
+        else:
+            avg_x, avg_y = points[-1]
+
+        ax, ay = points[a]
+        best, best_area = None, -1.0
+        for j in range(int(i * every) + 1, int((i + 1) * every) + 1):
+            x, y = points[j]
+            area = abs((ax - avg_x) * (y - ay) - (ax - x) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = j, area
+
+        sampled.append(points[best])
+        a = best
+
+    sampled.append(points[-1])
+    return sampled
+
+
+def to_epoch(value) -> int:
+    """Epoch seconds from a datetime (naive = UTC), ISO string or number"""
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp())
+
+
+def from_epoch(value: int) -> str:
+    """ISO-8601 UTC timestamp in the API's `...Z` format"""
+    return datetime.fromtimestamp(value, tz=timezone.utc).replace(tzinfo=None).isoformat() + "Z"
+
+
+timeseries_store = TimeSeriesStore(Path(settings.STATE_DIR) / "timeseries.db")
@@ -0,0 +1,9 @@
+"""
+API benchmarks
+
+Drives the FastAPI app in-process through an ASGI client and reports
+latency percentiles, throughput and allocations per scenario.
+
+Usage (from backend/):
+    python -m benchmarks.run
+"""
@@ -0,0 +1,132 @@
+"""
+Benchmark harness: concurrent request driver, percentiles and allocations.
+"""
+import asyncio
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from typing import Dict, List
+
+import httpx
+
+from benchmarks.scenarios import Scenario
+
+
+@dataclass
+class Result:
+    name: str
+    router: str
+    requests: int
+    errors: int
+    concurrency: int
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    mean_ms: float
+    throughput_rps: float
+    bytes_per_request: float
+    retained_kib_per_request: float
+    peak_alloc_kib: float
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100.0 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    scenario: Scenario,
+    requests: int,
+    concurrency: int,
+    warmup: int,
+    alloc_samples: int
+) -> Result:
+    """
+    Run one scenario.
+
+    Latency is measured with `concurrency` workers sharing a request counter.
+    Allocations are measured separately on `alloc_samples` sequential requests
+    with tracemalloc enabled, so tracing overhead does not skew latency.
+    """
+    for i in range(warmup):
+        await _send(client, scenario.requests(i))
+
+    latencies: List[float] = []
+    errors = 0
+    total_bytes = 0
+    counter = iter(range(warmup, warmup + requests))
+
+    async def worker():
+        nonlocal errors, total_bytes
+        for i in counter:
+            request = scenario.requests(i)
+            start = time.perf_counter()
+            response = await _send(client, request)
+            latencies.append((time.perf_counter() - start) * 1000)
+            total_bytes += len(response.content)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    retained_per_request, peak = await _measure_allocations(
+        client, scenario, alloc_samples, offset=warmup + requests
+    )
+
+    latencies.sort()
+    return Result(
+        name=scenario.name,
+        router=scenario.router,
+        requests=requests,
+        errors=errors,
+        concurrency=concurrency,
+        p50_ms=round(percentile(latencies, 50), 3),
+        p95_ms=round(percentile(latencies, 95), 3),
+        p99_ms=round(percentile(latencies, 99), 3),
+        mean_ms=round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+        throughput_rps=round(requests / elapsed, 1) if elapsed > 0 else 0.0,
+        bytes_per_request=round(total_bytes / requests, 1) if requests else 0.0,
+        retained_kib_per_request=round(retained_per_request / 1024, 1),
+        peak_alloc_kib=round(peak / 1024, 1)
+    )
+
+
+async def _measure_allocations(client, scenario: Scenario, samples: int, offset: int):
+    """Bytes retained per request and the traced allocation peak"""
+    if samples <= 0:
+        return 0.0, 0.0
+
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        before = tracemalloc.take_snapshot()
+        for i in range(samples):
+            await _send(client, scenario.requests(offset + i))
+        after = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    # Positive size deltas per allocation site: memory the requests kept
+    # (store growth, cache entries, leaks), averaged per request
+    retained = sum(max(0, stat.size_diff) for stat in after.compare_to(before, "lineno"))
+    return retained / samples, peak
+
+
+async def _send(client: httpx.AsyncClient, request: Dict) -> httpx.Response:
+    return await client.request(
+        request["method"],
+        request["url"],
+        params=request.get("params"),
+        json=request.get("json"),
+        headers={"Accept-Encoding": "gzip"}
+    )
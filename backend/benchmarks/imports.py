@@ -0,0 +1,107 @@
+"""
+Import-time budget
+
+Usage (from backend/):
+    python -m benchmarks.imports
+    python -m benchmarks.imports --api-budget-ms 1500 --repeat 7
+
+Imports each entry point in fresh interpreters and reports the median wall
+time. Exits with status 1 when a target exceeds its budget or loads a heavy
+library it never uses (numpy, PIL, rasterio), which is what cold starts of
+autoscaled containers pay for.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+BACKEND_DIR = Path(__file__).parent.parent
+PIPELINE_DIR = BACKEND_DIR.parent / "pipeline"
+
+HEAVY_MODULES = ("numpy", "PIL", "rasterio")
+
+# Run in the child interpreter: time the import, then report what it loaded
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - started
+print(json.dumps({{
+    "ms": elapsed * 1000,
+    "heavy": sorted(m for m in {heavy!r} if m in sys.modules),
+    "extra": {extra}
+}}))
+"""
+
+# name -> (working directory, import statement, extra JSON-able expression)
+TARGETS = {
+    "api": (BACKEND_DIR, "import main", "None"),
+    "pipeline": (PIPELINE_DIR, "import orchestrator", "len(orchestrator._stage_modules)"),
+}
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Cold import-time budget")
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per target (median is reported)")
+    parser.add_argument("--api-budget-ms", type=float, default=2000.0, help="Budget for importing main")
+    parser.add_argument("--pipeline-budget-ms", type=float, default=250.0, help="Budget for importing the orchestrator")
+    return parser.parse_args(argv)
+
+
+def measure(name: str, repeat: int) -> Dict:
+    """Median import time plus heavy modules loaded, over `repeat` interpreters"""
+    cwd, statement, extra = TARGETS[name]
+    code = PROBE.format(statement=statement, heavy=HEAVY_MODULES, extra=extra)
+    env = {**os.environ, "PYTHONPATH": str(cwd)}
+    samples: List[Dict] = []
+    for _ in range(repeat):
+        completed = subprocess.run(
+            [sys.executable, "-W", "ignore", "-c", code],
+            cwd=cwd, capture_output=True, text=True, env=env
+        )
+        if completed.returncode != 0:
+            raise RuntimeError(f"{name}: import failed\n{completed.stderr.strip()}")
+        samples.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+    return {
+        "ms": statistics.median(sample["ms"] for sample in samples),
+        "heavy": samples[-1]["heavy"],
+        "extra": samples[-1]["extra"]
+    }
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    budgets = {"api": args.api_budget_ms, "pipeline": args.pipeline_budget_ms}
+
+    failures = []
+    for name in TARGETS:
+        try:
+            result = measure(name, args.repeat)
+        except RuntimeError as e:
+            failures.append(str(e))
+            continue
+        print(f"{name:<10} {result['ms']:8.1f}ms  (budget {budgets[name]:.0f}ms)  "
+              f"heavy: {', '.join(result['heavy']) or '-'}")
+        if result["ms"] > budgets[name]:
+            failures.append(f"{name}: {result['ms']:.1f}ms over the {budgets[name]:.0f}ms budget")
+        if result["heavy"]:
+            failures.append(f"{name}: imports {', '.join(result['heavy'])} at start-up")
+        if name == "pipeline" and result["extra"]:
+            failures.append(f"pipeline: {result['extra']} stage modules loaded by importing the orchestrator")
+
+    if failures:
+        print("\n❌ Import budget exceeded:")
+        for failure in failures:
+            print(f"   {failure}")
+        return 1
+
+    print("\n✅ Within import budget")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
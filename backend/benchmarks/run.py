@@ -0,0 +1,184 @@
+"""
+Benchmark runner
+
+Usage (from backend/):
+    python -m benchmarks.run                          # all scenarios, compare to baseline
+    python -m benchmarks.run --only dl_predictions --locations 50000 --concurrency 32
+    python -m benchmarks.run --update-baseline        # record current results
+
+Exits with status 1 when a scenario regresses beyond --tolerance against the
+stored baseline (p95 latency up, or throughput down), returns errors, or when
+there is no baseline to compare against.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+BASELINE_FILE = Path(__file__).parent / "baseline.json"
+
+# Keep benchmark side effects (alert queue, local state) out of data_store
+os.environ.setdefault("STATE_DIR", tempfile.mkdtemp(prefix="flowz-bench-"))
+
+import httpx  # noqa: E402
+
+from main import app  # noqa: E402
+from app.services.prediction_store import prediction_store  # noqa: E402
+from app.services.scenario_generator import Scenario as SyntheticScenario, gc_paused  # noqa: E402
+from app.services.spatial_index import spatial_index  # noqa: E402
+from benchmarks.harness import Result, run_scenario  # noqa: E402
+from benchmarks.scenarios import BenchData, build_scenarios, select  # noqa: E402
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="In-process API benchmarks")
+    parser.add_argument("--only", nargs="*", help="Scenario or router names to run")
+    parser.add_argument("--requests", type=int, default=200, help="Measured requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent in-flight requests")
+    parser.add_argument("--warmup", type=int, default=10, help="Unmeasured requests per scenario")
+    parser.add_argument("--alloc-samples", type=int, default=20, help="Requests traced with tracemalloc (0 = off)")
+    parser.add_argument("--locations", type=int, default=10000, help="Synthetic DL predictions preloaded into the store")
+    parser.add_argument("--seed", type=int, default=0, help="Synthetic data seed")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_FILE, help="Baseline results file")
+    parser.add_argument("--update-baseline", action="store_true", help="Write results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative regression (0.25 = 25%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0,
+                        help="Ignore p95 increases smaller than this (sub-millisecond noise)")
+    parser.add_argument("--output", type=Path, help="Also write results JSON here")
+    parser.add_argument("--verbose", action="store_true", help="Keep the app's own logging")
+    return parser.parse_args(argv)
+
+
+def prepare_data(locations: int, seed: int) -> BenchData:
+    """Preload synthetic predictions and keep a separate batch for ingest"""
+    stored = SyntheticScenario(locations, seed=seed)
+    with gc_paused():
+        stored.load_into(prediction_store, spatial_index)
+    ingest = SyntheticScenario(min(locations, 1000), seed=seed + 1)
+    return BenchData(
+        locations=locations,
+        stored_ids=list(stored.ids),
+        ingest_docs=list(ingest.dl_predictions()),
+        basins=sorted({doc["location"]["basin"] for doc in ingest.dl_predictions()})
+    )
+
+
+async def run(args: argparse.Namespace) -> List[Result]:
+    started = time.perf_counter()
+    data = prepare_data(args.locations, args.seed)
+    print(f"Prepared {args.locations} synthetic predictions in {time.perf_counter() - started:.1f}s")
+
+    scenarios = select(build_scenarios(data), args.only)
+    quiet = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(open(os.devnull, "w"))
+
+    results = []
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        # Start-up seeding competes for the GIL; measure the steady state
+        await app.state.gauges_seeded
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for scenario in scenarios:
+                with quiet:
+                    result = await run_scenario(
+                        client, scenario,
+                        requests=args.requests,
+                        concurrency=args.concurrency,
+                        warmup=args.warmup,
+                        alloc_samples=args.alloc_samples
+                    )
+                results.append(result)
+                print(_format_row(result))
+    return results
+
+
+def compare(
+    results: List[Result],
+    baseline: Dict[str, Dict],
+    tolerance: float,
+    min_delta_ms: float = 0.0
+) -> List[str]:
+    """Regression messages for results worse than the baseline"""
+    failures = []
+    for result in results:
+        if result.errors:
+            failures.append(f"{result.name}: {result.errors} error responses")
+        reference = baseline.get(result.name)
+        if not reference:
+            continue
+        slower = result.p95_ms - reference["p95_ms"]
+        if result.p95_ms > reference["p95_ms"] * (1 + tolerance) and slower >= min_delta_ms:
+            failures.append(
+                f"{result.name}: p95 {result.p95_ms:.2f}ms vs baseline {reference['p95_ms']:.2f}ms"
+            )
+        if result.throughput_rps < reference["throughput_rps"] * (1 - tolerance):
+            failures.append(
+                f"{result.name}: {result.throughput_rps:.0f} req/s vs baseline {reference['throughput_rps']:.0f} req/s"
+            )
+    return failures
+
+
+def _format_row(result: Result) -> str:
+    return (
+        f"{result.name:<24} {result.router:<18} "
+        f"p50 {result.p50_ms:8.2f}ms  p95 {result.p95_ms:8.2f}ms  p99 {result.p99_ms:8.2f}ms  "
+        f"{result.throughput_rps:8.1f} req/s  {result.bytes_per_request / 1024:8.1f} KiB/resp  "
+        f"peak {result.peak_alloc_kib:8.1f} KiB  retained {result.retained_kib_per_request:6.1f} KiB/req"
+        + (f"  errors {result.errors}" if result.errors else "")
+    )
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    try:
+        results = asyncio.run(run(args))
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 2
+    report = {
+        "config": {
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "locations": args.locations,
+            "seed": args.seed
+        },
+        "results": {result.name: result.to_dict() for result in results}
+    }
+
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+
+    if args.update_baseline:
+        existing = json.loads(args.baseline.read_text()) if args.baseline.exists() else {"results": {}}
+        existing["config"] = report["config"]
+        existing["results"].update(report["results"])
+        args.baseline.write_text(json.dumps(existing, indent=2))
+        print(f"\n📌 Baseline updated: {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        print(f"\n❌ No baseline at {args.baseline} (run with --update-baseline)")
+        return 1
+
+    baseline = json.loads(args.baseline.read_text())
+    if baseline.get("config") != report["config"]:
+        print(f"\n⚠️  Baseline was recorded with {baseline.get('config')}; comparing anyway")
+
+    failures = compare(results, baseline.get("results", {}), args.tolerance, args.min_delta_ms)
+    if failures:
+        print("\n❌ Regressions:")
+        for failure in failures:
+            print(f"   {failure}")
+        return 1
+
+    print(f"\n✅ No regressions beyond {args.tolerance:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
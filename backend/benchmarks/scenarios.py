@@ -0,0 +1,92 @@
+"""
+Benchmark scenarios: one or more request shapes per router.
+"""
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from app.services.mock_data import MockDataService
+
+MOCK_IDS = [location["id"] for location in MockDataService.LOCATIONS]
+
+
+@dataclass
+class Scenario:
+    """A named request stream; `requests(i)` builds the i-th request"""
+    name: str
+    router: str
+    requests: Callable[[int], Dict]
+    tags: List[str] = field(default_factory=list)
+
+
+@dataclass
+class BenchData:
+    """Synthetic data shared by the scenarios (sized by --locations)"""
+    locations: int
+    stored_ids: List[str]
+    ingest_docs: List[Dict]
+    basins: List[str]
+
+
+def build_scenarios(data: BenchData) -> List[Scenario]:
+    def get(path: str, **params) -> Dict:
+        return {"method": "GET", "url": path, "params": params or None}
+
+    def pick(items: List, i: int):
+        return items[i % len(items)]
+
+    return [
+        Scenario("predictions_current", "predictions",
+                 lambda i: get("/api/predictions/current")),
+        Scenario("simulation", "simulation",
+                 lambda i: get(f"/api/simulation/{pick(MOCK_IDS, i)}")),
+        Scenario("timeseries_hydrograph", "timeseries",
+                 lambda i: get(f"/api/timeseries/{pick(MOCK_IDS, i)}/hydrograph")),
+        Scenario("alerts_generate", "alerts",
+                 lambda i: get("/api/alerts/generate")),
+        Scenario("config_severity", "config",
+                 lambda i: get("/api/config/severity-levels")),
+        Scenario("arcgis_frame", "arcgis",
+                 lambda i: get(f"/api/arcgis/simulations/{pick(MOCK_IDS, i)}/frame",
+                               time_offset=pick([0, 6, 12, 18, 24, 36, 48], i),
+                               width=512, height=384),
+                 tags=["render"]),
+        Scenario("arcgis_tile", "arcgis",
+                 lambda i: get(f"/api/arcgis/tiles/8/{180 + i % 16}/{110 + i % 8}"),
+                 tags=["render"]),
+        Scenario("dl_ingest", "dl_predictions",
+                 lambda i: {"method": "POST", "url": "/api/predictions/ingest",
+                            "json": _unique_doc(pick(data.ingest_docs, i), i)},
+                 tags=["write"]),
+        Scenario("dl_summary", "dl_predictions",
+                 lambda i: get("/api/predictions/dl/summary")),
+        Scenario("dl_by_id", "dl_predictions",
+                 lambda i: get(f"/api/predictions/dl/{pick(data.stored_ids, i * 7919)}", view="map")),
+        Scenario("dl_latest_basin", "dl_predictions",
+                 lambda i: get(f"/api/predictions/dl/latest/{pick(data.basins, i)}")),
+        Scenario("dl_spatial_bbox", "dl_predictions",
+                 lambda i: get("/api/predictions/dl/spatial/bbox",
+                               west=84 + i % 6, south=20 + i % 5, east=86 + i % 6, north=22 + i % 5,
+                               limit=200)),
+        Scenario("flood_runs_list", "flood_integration",
+                 lambda i: get("/api/flood/runs/list")),
+        Scenario("flood_latest", "flood_integration",
+                 lambda i: get("/api/flood/predictions/latest")),
+    ]
+
+
+def select(scenarios: List[Scenario], names: Optional[List[str]]) -> List[Scenario]:
+    """Filter by scenario or router name (None keeps everything)"""
+    if not names:
+        return scenarios
+    wanted = set(names)
+    chosen = [s for s in scenarios if s.name in wanted or s.router in wanted]
+    unknown = wanted - {s.name for s in chosen} - {s.router for s in chosen}
+    if unknown:
+        raise ValueError(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+    return chosen
+
+
+def _unique_doc(doc: Dict, i: int) -> Dict:
+    """Give each ingest its own prediction ID so the store keeps growing"""
+    return {**doc, "prediction_id": f"{doc['prediction_id']}_bench{i}"}
+
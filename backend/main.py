@@ -1,18 +1,55 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from contextlib import asynccontextmanager
+import asyncio
+import os
+import time
 import uvicorn
 
 from app.config import settings
-from app.routers import predictions, simulation, alerts, history, timeseries, config, dl_predictions, evacuation, arcgis
+from app.services.alert_dispatch import alert_dispatcher
+from app.services.alert_engine import alert_engine
+from app.services.event_hub import event_hub
+from app.services.metrics import (
+    MetricsMiddleware, http_requests_in_flight, multiprocess_metrics, registry, render_metrics
+)
+from app.services.pipeline_jobs import pipeline_jobs
+from app.routers import predictions, simulation, alerts, history, timeseries, config, dl_predictions, evacuation, arcgis, events, scenarios, flood_integration, artifacts
+
+
+def _report_seeding(task: asyncio.Task):
+    """Surface a failed background gauge seeding as soon as it happens"""
+    if not task.cancelled() and task.exception() is not None:
+        print(f"⚠️  Mock gauge seeding failed: {task.exception()!r}")
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Startup and shutdown events"""
     print("🚀 Flood Prediction API Starting...")
     print(f"📍 Mode: {'MOCK DATA' if settings.MOCK_MODE else 'PRODUCTION'}")
+    if settings.WORKERS > 1:
+        print(f"🧵 Worker {os.getpid()} of {settings.WORKERS} (shared state in {settings.STATE_DIR})")
+    await alert_dispatcher.start()
+    await event_hub.start()
+    await pipeline_jobs.start()
+    if multiprocess_metrics is not None:
+        await multiprocess_metrics.start(registry)
+    alert_engine.sync()
+    # Mock gauge history in the background: the API is up meanwhile
+    # (exposed so tooling such as the benchmarks can wait for it)
+    app.state.gauges_seeded = asyncio.create_task(asyncio.to_thread(timeseries.seed_mock_gauges))
+    app.state.gauges_seeded.add_done_callback(_report_seeding)
     yield
     print("👋 Shutting down...")
+    # A seeding failure was already reported by _report_seeding
+    await asyncio.gather(app.state.gauges_seeded, return_exceptions=True)
+    if multiprocess_metrics is not None:
+        await multiprocess_metrics.stop()
+    await pipeline_jobs.stop()
+    await event_hub.stop()
+    await alert_dispatcher.stop()
 
 app = FastAPI(
     title="West Bengal Flood Prediction API",
@@ -30,6 +67,11 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request timing (outermost, so CORS preflights and errors are measured too)
+app.add_middleware(MetricsMiddleware)
+
+STARTED_AT = time.time()
+
 # Register routers
 app.include_router(predictions.router, prefix="/api", tags=["Predictions"])
 app.include_router(simulation.router, prefix="/api", tags=["Simulation"])
@@ -40,6 +82,10 @@ app.include_router(config.router, prefix="/api", tags=["Configuration"])
 app.include_router(dl_predictions.router, prefix="/api", tags=["Deep Learning Predictions"])
 app.include_router(evacuation.router, prefix="/api", tags=["Evacuation"])
 app.include_router(arcgis.router, prefix="/api", tags=["ArcGIS Integration"])
+app.include_router(events.router, prefix="/api", tags=["Live Events"])
+app.include_router(scenarios.router, prefix="/api", tags=["Synthetic Scenarios"])
+app.include_router(artifacts.router, prefix="/api", tags=["Run Artifacts"])
+app.include_router(flood_integration.router)
 
 @app.get("/")
 async def root():
@@ -52,12 +98,33 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "mode": "mock" if settings.MOCK_MODE else "production"}
+    return {
+        "status": "healthy",
+        "mode": "mock" if settings.MOCK_MODE else "production",
+        "uptime_seconds": round(time.time() - STARTED_AT, 1),
+        "workers": settings.WORKERS,
+        "pid": os.getpid(),
+        "in_flight": int(sum(value for _, _, value in http_requests_in_flight.samples()))
+    }
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint (text exposition format 0.0.4), merged across workers"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
 
 if __name__ == "__main__":
-    uvicorn.run(
-        "main:app",
-        host=settings.HOST,
-        port=settings.PORT,
-        reload=True
-    )
+    if settings.WORKERS > 1:
+        # One process per worker; reload cannot be combined with workers
+        uvicorn.run(
+            "main:app",
+            host=settings.HOST,
+            port=settings.PORT,
+            workers=settings.WORKERS
+        )
+    else:
+        uvicorn.run(
+            "main:app",
+            host=settings.HOST,
+            port=settings.PORT,
+            reload=True
+        )
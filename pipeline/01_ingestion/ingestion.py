@@ -39,7 +39,43 @@ def run_ingestion(run_id):
     print(f"   Data ingestion complete")
     return output_dir
 
+def run_static_preprocessing(run_id, output_dir=None):
+    """
+    Prepare static model layers (DEM, channel network, Manning friction)
+    Independent of the weather/gauge ingestion, so both run concurrently
+    
+    Multi-basin cycles pass output_dir to build the layers once in the
+    cycle's shared directory instead of once per basin run
+    """
+    output_dir = str(output_dir or Config.get_stage_dir(run_id, 1))
+    os.makedirs(output_dir, exist_ok=True)
+    
+    print(f"Stage 01: Static Layer Preprocessing for {run_id}")
+    print(f"   Preparing DEM and friction layers...")
+    
+    static_layers = {
+        "stage": "01_static_layers",
+        "status": "completed",
+        "grid": {
+            "width": Config.FLOOD_MAP_WIDTH,
+            "height": Config.FLOOD_MAP_HEIGHT,
+            "pixel_size_degrees": Config.PIXEL_SIZE
+        },
+        "layers": {
+            "dem": "generated",
+            "channel_network": "generated",
+            "manning_friction": "generated"
+        }
+    }
+    
+    with open(os.path.join(output_dir, "static_layers.json"), 'w') as f:
+        json.dump(static_layers, f, indent=2)
+    
+    print(f"   Static layer preprocessing complete")
+    return output_dir
+
 if __name__ == "__main__":
     run_id = Config.get_run_id("TEST")
     Config.ensure_run_structure(run_id)
     run_ingestion(run_id)
+    run_static_preprocessing(run_id)
@@ -19,9 +19,9 @@ def run_ai_inference(run_id):
     # Generate mock prediction data
     risk_summary = {
         "id": f"pred_{run_id}",
-        "location": "West Bengal Test Region",
-        "latitude": 22.5726,
-        "longitude": 88.3639,
+        "location": Config.LOCATION_NAME,
+        "latitude": Config.LAT_CENTER,
+        "longitude": Config.LON_CENTER,
         "riskScore": round(random.uniform(0.3, 0.9), 2),
         "severityLevel": random.choice(["LOW", "MODERATE", "HIGH", "CRITICAL"]),
         "waterLevel": round(random.uniform(0.5, 2.5), 2),
@@ -39,14 +39,16 @@ def run_ai_inference(run_id):
         json.dump(risk_summary, f, indent=2)
     
     # Create a simple mock GeoTIFF metadata (without actual rasterio)
+    half_width = Config.FLOOD_MAP_WIDTH * Config.PIXEL_SIZE / 2
+    half_height = Config.FLOOD_MAP_HEIGHT * Config.PIXEL_SIZE / 2
     mock_geotiff_info = {
         "filename": "final_map.tif",
         "created": datetime.now().isoformat(),
         "bounds": {
-            "west": 88.0,
-            "east": 89.0,
-            "north": 23.0,
-            "south": 22.0
+            "west": round(Config.LON_CENTER - half_width, 4),
+            "east": round(Config.LON_CENTER + half_width, 4),
+            "north": round(Config.LAT_CENTER + half_height, 4),
+            "south": round(Config.LAT_CENTER - half_height, 4)
         },
         "resolution": "30m",
         "crs": "EPSG:4326",
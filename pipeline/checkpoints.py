@@ -0,0 +1,93 @@
+"""
+Stage Checkpoints
+Per-stage completion markers, so a failed run can resume where it stopped
+
+When a stage completes, the scheduler writes <run>/.checkpoints/<stage>.json
+with the SHA-256 and size of every declared output, the checksums of the
+inputs it consumed and its parameters. The marker is removed before the
+stage executes again, so a crash mid-stage never leaves a stale one.
+
+On resume, a stage is reused only if its marker verifies: outputs are
+present and unchanged, and its inputs and parameters still match what it
+ran with. Anything else (and everything downstream of it) runs again.
+"""
+import json
+import os
+from datetime import datetime
+
+from stage_cache import file_sha256
+
+CHECKPOINT_DIR = ".checkpoints"
+
+
+def marker_path(run_dir, stage_name):
+    return run_dir / CHECKPOINT_DIR / f"{stage_name}.json"
+
+
+def clear_marker(run_dir, stage_name):
+    try:
+        os.remove(marker_path(run_dir, stage_name))
+    except FileNotFoundError:
+        pass
+
+
+def write_marker(stage, run_dir, record, file_hash=file_sha256):
+    """Record a completed stage (written atomically)"""
+    marker = {
+        "stage": stage.name,
+        "completed_at": record.get("end_time") or datetime.now().isoformat(),
+        "duration_seconds": record.get("duration_seconds"),
+        "output_dir": record.get("output_dir"),
+        "params": stage.params() if stage.params else {},
+        "inputs": {path: file_hash(run_dir / path) for path in sorted(stage.inputs)},
+        "outputs": {
+            path: {"sha256": file_hash(run_dir / path), "size": (run_dir / path).stat().st_size}
+            for path in sorted(stage.outputs)
+        }
+    }
+    path = marker_path(run_dir, stage.name)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    staging = path.with_name(f".{path.name}.tmp")
+    with open(staging, 'w') as f:
+        json.dump(marker, f, indent=2, default=str)
+    os.replace(staging, path)
+    return marker
+
+
+def verify_marker(stage, run_dir, file_hash=file_sha256):
+    """
+    Check a stage's marker against the run directory
+
+    Returns:
+        tuple: (marker or None, reason it cannot be reused or None)
+    """
+    try:
+        with open(marker_path(run_dir, stage.name), 'r') as f:
+            marker = json.load(f)
+    except FileNotFoundError:
+        return None, "no checkpoint"
+    except (OSError, ValueError) as e:
+        return None, f"unreadable checkpoint: {e}"
+
+    if sorted(marker.get("outputs", {})) != sorted(stage.outputs):
+        return None, "declared outputs changed"
+    params = json.loads(json.dumps(stage.params() if stage.params else {}, default=str))
+    if marker.get("params") != params:
+        return None, "parameters changed"
+
+    for path, expected in marker["outputs"].items():
+        try:
+            size = (run_dir / path).stat().st_size
+        except FileNotFoundError:
+            return None, f"{path} missing"
+        # Size first: a truncated output fails without being hashed
+        if size != expected["size"] or file_hash(run_dir / path) != expected["sha256"]:
+            return None, f"{path} changed"
+
+    if sorted(marker.get("inputs", {})) != sorted(stage.inputs):
+        return None, "declared inputs changed"
+    for path, digest in marker["inputs"].items():
+        if file_hash(run_dir / path) != digest:
+            return None, f"input {path} changed"
+
+    return marker, None
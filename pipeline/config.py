@@ -1,3 +1,4 @@
+import json
 import os
 from pathlib import Path
 from datetime import datetime
@@ -7,6 +8,19 @@ FLOWZ_BASE = Path(__file__).parent.parent.absolute()
 PIPELINE_DIR = FLOWZ_BASE / "pipeline"
 DATA_STORE_DIR = FLOWZ_BASE / "data_store"
 RUNS_DIR = DATA_STORE_DIR / "runs"
+CYCLES_DIR = DATA_STORE_DIR / "cycles"
+CACHE_DIR = DATA_STORE_DIR / "cache"
+ARCHIVE_DIR = DATA_STORE_DIR / "archive"
+RUN_CATALOG_DB = DATA_STORE_DIR / "state" / "run_catalog.db"
+BASINS_FILE = PIPELINE_DIR / "basins.json"
+
+
+def _total_memory_mb():
+    """Physical memory in MB (4096 when the platform does not report it)"""
+    try:
+        return os.sysconf("SC_PHYS_PAGES") * os.sysconf("SC_PAGE_SIZE") // (1024 * 1024)
+    except (AttributeError, ValueError, OSError):
+        return 4096
 
 # Configuration Settings
 class Config:
@@ -15,6 +29,11 @@ class Config:
     PIPELINE_DIR = PIPELINE_DIR
     DATA_STORE_DIR = DATA_STORE_DIR
     RUNS_DIR = RUNS_DIR
+    CYCLES_DIR = CYCLES_DIR
+    CACHE_DIR = CACHE_DIR
+    ARCHIVE_DIR = ARCHIVE_DIR
+    RUN_CATALOG_DB = RUN_CATALOG_DB
+    BASINS_FILE = BASINS_FILE
     
     # Default location for flood predictions (Kolkata Region)
     LAT_CENTER = 22.5726
@@ -26,6 +45,26 @@ class Config:
     FLOOD_MAP_HEIGHT = 100
     PIXEL_SIZE = 0.01  # degrees
     
+    # Stage scheduler budgets shared by concurrently running stages
+    MAX_CPUS = int(os.environ.get("PIPELINE_MAX_CPUS", os.cpu_count() or 1))
+    MAX_MEMORY_MB = int(os.environ.get("PIPELINE_MAX_MEMORY_MB", _total_memory_mb()))
+    
+    # Content-addressed stage cache (set PIPELINE_STAGE_CACHE=0 to always recompute)
+    STAGE_CACHE = os.environ.get("PIPELINE_STAGE_CACHE", "1").lower() not in ("0", "false", "no")
+    
+    # Parsed run documents kept in memory by DataBridge.get_run_data
+    RUN_DATA_CACHE_ENTRIES = int(os.environ.get("PIPELINE_RUN_DATA_CACHE_ENTRIES", "64"))
+    
+    # Retention (retention.py): runs stay as directories for RETENTION_HOT_DAYS
+    # (the newest RETENTION_KEEP_LATEST always do), are then packed into
+    # data_store/archive/<run_id>.zip, and are deleted after
+    # RETENTION_MAX_AGE_DAYS (0 keeps them forever). Stage cache entries not
+    # used for CACHE_MAX_AGE_DAYS are deleted as well.
+    RETENTION_HOT_DAYS = float(os.environ.get("PIPELINE_RETENTION_HOT_DAYS", "14"))
+    RETENTION_KEEP_LATEST = int(os.environ.get("PIPELINE_RETENTION_KEEP_LATEST", "10"))
+    RETENTION_MAX_AGE_DAYS = float(os.environ.get("PIPELINE_RETENTION_MAX_AGE_DAYS", "180"))
+    CACHE_MAX_AGE_DAYS = float(os.environ.get("PIPELINE_CACHE_MAX_AGE_DAYS", "30"))
+    
     @staticmethod
     def get_run_id(custom_suffix=None):
         """Generate a unique run ID based on timestamp"""
@@ -33,12 +72,43 @@ class Config:
         suffix = custom_suffix if custom_suffix else "AUTO"
         return f"run_{timestamp}_{suffix}"
     
+    @staticmethod
+    def get_cycle_id(custom_suffix=None):
+        """Generate a multi-basin cycle ID (its basin runs share the timestamp)"""
+        return Config.get_run_id(custom_suffix).replace("run_", "cycle_", 1)
+    
+    @staticmethod
+    def get_cycle_dir(cycle_id):
+        """Get the directory holding a cycle's shared inputs and report"""
+        return CYCLES_DIR / cycle_id
+    
+    @staticmethod
+    def load_basins(path=None):
+        """Basin definitions (id, name, basin, lat, lon) for multi-basin cycles"""
+        with open(path or BASINS_FILE, 'r') as f:
+            return json.load(f)
+    
+    @staticmethod
+    def use_basin(basin):
+        """
+        Point the stage location settings at one basin
+        Only used inside multi-basin worker processes, which each own a Config
+        """
+        Config.LAT_CENTER = basin["lat"]
+        Config.LON_CENTER = basin["lon"]
+        Config.LOCATION_NAME = basin["name"]
+    
     @staticmethod
     def get_run_dir(run_id):
         """Get the directory for a specific run"""
         run_path = RUNS_DIR / run_id
         return run_path
     
+    @staticmethod
+    def get_archive_path(run_id):
+        """Get the archive file of a run moved out of the runs directory"""
+        return ARCHIVE_DIR / f"{run_id}.zip"
+    
     @staticmethod
     def get_stage_dir(run_id, stage_number):
         """Get the directory for a specific pipeline stage within a run"""
@@ -4,8 +4,100 @@ Connects the pipeline output with the backend API
 """
 import json
 import os
+import threading
+from collections import OrderedDict
 from pathlib import Path
 from config import Config
+from run_archive import open_run_archive
+from run_catalog import get_run_catalog
+
+# Files that make up a run document: key in run_data -> path in the run
+RUN_DATA_FILES = (
+    ("ingestion", Path("01_ingestion") / "ingestion_metadata.json"),
+    ("lisflood_os", Path("02_lisflood_os") / "lisflood_os_results.json"),
+    ("lisflood_fp", Path("03_lisflood_fp") / "lisflood_fp_results.json"),
+    ("risk_summary", Path("04_predictions") / "risk_summary.json"),
+    ("pipeline_report", Path("pipeline_report.json")),
+)
+
+
+class RunDataCache:
+    """
+    LRU cache of parsed run documents, keyed by run ID.
+    
+    An entry is reused only while every source file still has the
+    (mtime, size) it was parsed with (or is still missing), so a run that
+    is written again is re-read on the next call. Checking costs one
+    stat() per file instead of opening and parsing up to five JSON files.
+    """
+    
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def signature(run_dir):
+        """
+        (mtime_ns, size) of each run document file, None when missing;
+        for an archived run, of the archive file (None when not archived)
+        """
+        if not run_dir.exists():
+            try:
+                stat = os.stat(Config.get_archive_path(run_dir.name))
+            except FileNotFoundError:
+                return None
+            return ("archive", stat.st_mtime_ns, stat.st_size)
+        stamps = []
+        for _, relative in RUN_DATA_FILES:
+            try:
+                stat = os.stat(run_dir / relative)
+                stamps.append((stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                stamps.append(None)
+        return tuple(stamps)
+    
+    def get(self, run_id, signature):
+        with self._lock:
+            entry = self._entries.get(run_id)
+            if entry is None or entry[0] != signature:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(run_id)
+            self.hits += 1
+            return entry[1]
+    
+    def put(self, run_id, signature, run_data):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[run_id] = (signature, run_data)
+            self._entries.move_to_end(run_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def discard(self, run_id):
+        with self._lock:
+            self._entries.pop(run_id, None)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+run_data_cache = RunDataCache(Config.RUN_DATA_CACHE_ENTRIES)
+
+
+def _load_json(path):
+    with open(path, 'r') as f:
+        return json.load(f)
+
 
 class DataBridge:
     """Bridge between pipeline outputs and backend API"""
@@ -15,12 +107,21 @@ class DataBridge:
         """
         Retrieve all data from a completed run
         Returns: Complete run data including all predictions
+        
+        Parsed documents are cached (see RunDataCache) and shared between
+        callers, so treat the result as read-only.
         """
         run_dir = Config.get_run_dir(run_id)
+        signature = RunDataCache.signature(run_dir)
         
-        if not run_dir.exists():
+        if signature is None:
+            run_data_cache.discard(run_id)
             raise ValueError(f"Run {run_id} not found")
         
+        cached = run_data_cache.get(run_id, signature)
+        if cached is not None:
+            return cached
+        
         run_data = {
             "run_id": run_id,
             "metadata": {},
@@ -28,75 +129,79 @@ class DataBridge:
             "simulations": {}
         }
         
-        # Load ingestion metadata
-        ingestion_file = run_dir / "01_ingestion" / "ingestion_metadata.json"
-        if ingestion_file.exists():
-            with open(ingestion_file, 'r') as f:
-                run_data["metadata"]["ingestion"] = json.load(f)
-        
-        # Load LISFLOOD-OS results
-        os_file = run_dir / "02_lisflood_os" / "lisflood_os_results.json"
-        if os_file.exists():
-            with open(os_file, 'r') as f:
-                run_data["simulations"]["lisflood_os"] = json.load(f)
-        
-        # Load LISFLOOD-FP results
-        fp_file = run_dir / "03_lisflood_fp" / "lisflood_fp_results.json"
-        if fp_file.exists():
-            with open(fp_file, 'r') as f:
-                run_data["simulations"]["lisflood_fp"] = json.load(f)
-        
-        # Load AI predictions (risk summary)
-        risk_summary_file = run_dir / "04_predictions" / "risk_summary.json"
-        if risk_summary_file.exists():
-            with open(risk_summary_file, 'r') as f:
-                risk_data = json.load(f)
-                run_data["predictions"]["risk_summary"] = risk_data[0] if isinstance(risk_data, list) else risk_data
-        
-        # Load pipeline report if available
-        report_file = run_dir / "pipeline_report.json"
-        if report_file.exists():
-            with open(report_file, 'r') as f:
-                run_data["pipeline_report"] = json.load(f)
+        # Hot runs are read from their directory, archived runs from their zip
+        archive = None
+        if signature[0] == "archive":
+            archive = open_run_archive(run_id)
+            if archive is None:
+                raise ValueError(f"Run {run_id} not found")
+        try:
+            for index, (key, relative) in enumerate(RUN_DATA_FILES):
+                try:
+                    if archive is not None:
+                        data = archive.read_json(relative)
+                    elif signature[index] is not None:
+                        data = _load_json(run_dir / relative)
+                    else:
+                        continue
+                except FileNotFoundError:
+                    # Not part of this run, or removed since the stat (the
+                    # changed signature refreshes the entry next time)
+                    continue
+                
+                if key == "ingestion":
+                    run_data["metadata"]["ingestion"] = data
+                elif key == "risk_summary":
+                    run_data["predictions"]["risk_summary"] = data[0] if isinstance(data, list) else data
+                elif key == "pipeline_report":
+                    run_data["pipeline_report"] = data
+                else:
+                    run_data["simulations"][key] = data
+        finally:
+            if archive is not None:
+                archive.close()
         
+        run_data_cache.put(run_id, signature, run_data)
         return run_data
     
     @staticmethod
-    def get_latest_run_data():
-        """Get data from the most recent run"""
-        runs = sorted([d.name for d in Config.RUNS_DIR.iterdir() if d.is_dir()], reverse=True)
-        if not runs:
+    def get_latest_run_id(with_predictions=False):
+        """ID of the most recent run (optionally the newest with predictions), or None"""
+        latest = get_run_catalog().latest(with_predictions=with_predictions)
+        return latest["run_id"] if latest else None
+    
+    @staticmethod
+    def get_latest_run_data(with_predictions=False):
+        """Get data from the most recent run (optionally the newest with predictions)"""
+        run_id = DataBridge.get_latest_run_id(with_predictions)
+        if run_id is None:
             raise ValueError("No runs found in data_store")
-        return DataBridge.get_run_data(runs[0])
+        return DataBridge.get_run_data(run_id)
     
     @staticmethod
-    def list_all_runs():
-        """List all available runs with their metadata"""
-        runs_info = []
-        
-        if Config.RUNS_DIR.exists():
-            for run_dir in sorted(Config.RUNS_DIR.iterdir(), reverse=True):
-                if run_dir.is_dir():
-                    # Check for pipeline report
-                    report_file = run_dir / "pipeline_report.json"
-                    if report_file.exists():
-                        with open(report_file, 'r') as f:
-                            report = json.load(f)
-                            runs_info.append({
-                                "run_id": run_dir.name,
-                                "status": report.get("status", "unknown"),
-                                "start_time": report.get("start_time", "unknown"),
-                                "end_time": report.get("end_time", "unknown")
-                            })
-                    else:
-                        runs_info.append({
-                            "run_id": run_dir.name,
-                            "status": "unknown",
-                            "start_time": "unknown",
-                            "end_time": "unknown"
-                        })
-        
-        return runs_info
+    def list_all_runs(status=None, limit=None, offset=0):
+        """
+        List runs with their metadata, newest first
+        Served from the run catalog, so no run directory is opened
+        """
+        return [
+            {
+                "run_id": run["run_id"],
+                "status": run["status"],
+                "start_time": run["start_time"],
+                "end_time": run["end_time"],
+                "location": run["location"],
+                "severityLevel": run["severity_level"],
+                "riskScore": run["risk_score"],
+                "storage": run["storage"]
+            }
+            for run in get_run_catalog().list_runs(status=status, limit=limit, offset=offset)
+        ]
+    
+    @staticmethod
+    def count_runs(status=None):
+        """Number of runs (optionally with a given status)"""
+        return get_run_catalog().count(status)
     
     @staticmethod
     def export_run_as_geojson(run_id):
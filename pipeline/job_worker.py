@@ -0,0 +1,56 @@
+"""
+Pipeline Job Worker
+Entry points for long-lived worker processes that execute queued runs
+
+The backend's pipeline job service keeps a pool of these processes alive.
+warm() runs once per process and imports the orchestrator and every stage
+(and with them their numerical/raster libraries). It also creates the stage
+cache, whose file hashes stay memoized between jobs. After that, execute()
+only pays for the stages themselves.
+"""
+import contextlib
+import time
+
+from config import Config
+
+
+def warm():
+    """Pool initializer: import the stages and build the stage cache"""
+    import orchestrator
+    orchestrator.load_stages()
+    orchestrator.get_stage_cache()
+
+
+def execute(run_id, options=None):
+    """
+    Run the pipeline for run_id, logging to <run>/pipeline.log
+
+    Args:
+        run_id (str): Run ID assigned when the job was queued
+        options (dict, optional): max_cpus, max_memory_mb, use_cache
+
+    Returns:
+        dict: status ("completed" / "failed"), error, duration_seconds
+    """
+    from orchestrator import run_pipeline
+
+    options = options or {}
+    started = time.perf_counter()
+    run_dir = Config.ensure_run_structure(run_id)
+    result = {"run_id": run_id, "status": "completed", "error": None}
+
+    with open(run_dir / "pipeline.log", 'w') as log, \
+            contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+        try:
+            run_pipeline(
+                run_id=run_id,
+                max_cpus=options.get("max_cpus"),
+                max_memory_mb=options.get("max_memory_mb"),
+                use_cache=options.get("use_cache")
+            )
+        except Exception as e:
+            result["status"] = "failed"
+            result["error"] = str(e)
+
+    result["duration_seconds"] = round(time.perf_counter() - started, 3)
+    return result
@@ -0,0 +1,215 @@
+"""
+Multi-Basin Pipeline Cycles
+Runs the pipeline for many basins at once on a process pool
+
+Each basin becomes an ordinary run (run_<timestamp>_<suffix>_<basin id>) so
+the data bridge, artifact server and alerting pick it up unchanged. Read-only
+inputs that do not depend on the basin (DEM, channel network and friction
+layers) are built once per cycle in data_store/cycles/<cycle_id>/shared and
+hard-linked into every run. Workers are separate processes with their own
+Config and an address-space cap, so one runaway basin cannot starve the rest,
+and a cycle takes about as long as its slowest basin.
+"""
+import contextlib
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+
+from config import Config
+from stage_cache import link_or_copy
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows: workers then run without a memory cap
+    resource = None
+
+# Shared inputs built once per cycle: file name -> path inside each run
+SHARED_INPUTS = {"static_layers.json": "01_ingestion/static_layers.json"}
+
+
+def select_basins(selection="all", path=None):
+    """
+    Basins from basins.json: "all" or a comma-separated list of basin IDs
+
+    Raises:
+        ValueError: Unknown basin ID
+    """
+    basins = Config.load_basins(path)
+    if selection in (None, "", "all"):
+        return basins
+    by_id = {basin["id"]: basin for basin in basins}
+    wanted = [basin_id.strip() for basin_id in selection.split(",") if basin_id.strip()]
+    unknown = [basin_id for basin_id in wanted if basin_id not in by_id]
+    if unknown:
+        raise ValueError(f"Unknown basin(s): {', '.join(unknown)} (known: {', '.join(by_id)})")
+    return [by_id[basin_id] for basin_id in wanted]
+
+
+def _limit_memory(memory_mb):
+    """Pool initializer: cap the worker's address space"""
+    if resource is None or not memory_mb:
+        return
+    limit = memory_mb * 1024 * 1024
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+
+
+def _run_basin(run_id, basin, shared_dir, max_cpus, max_memory_mb, use_cache=None):
+    """Worker: run one basin's pipeline, logging to <run>/pipeline.log"""
+    from orchestrator import BASIN_GRAPH, run_pipeline
+
+    started = time.perf_counter()
+    Config.use_basin(basin)
+    run_dir = Config.ensure_run_structure(run_id)
+    summary = {"basin_id": basin["id"], "name": basin["name"], "run_id": run_id}
+
+    with open(run_dir / "pipeline.log", 'w') as log, \
+            contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+        try:
+            for name, relative in SHARED_INPUTS.items():
+                link_or_copy(os.path.join(shared_dir, name), run_dir / relative)
+            run_pipeline(run_id=run_id, max_cpus=max_cpus, max_memory_mb=max_memory_mb,
+                         graph=BASIN_GRAPH, use_cache=use_cache)
+            summary["status"] = "completed"
+        except MemoryError:
+            summary["status"] = "failed"
+            summary["error"] = f"Exceeded the worker memory cap ({max_memory_mb} MB)"
+        except Exception as e:
+            summary["status"] = "failed"
+            summary["error"] = str(e)
+
+    risk_file = run_dir / "04_predictions" / "risk_summary.json"
+    if risk_file.exists():
+        with open(risk_file, 'r') as f:
+            risk = json.load(f)
+        summary["severityLevel"] = risk.get("severityLevel")
+        summary["riskScore"] = risk.get("riskScore")
+    summary["duration_seconds"] = round(time.perf_counter() - started, 3)
+    return summary
+
+
+def run_multi_basin(basins, workers=None, worker_memory_mb=None, custom_suffix="AUTO", use_cache=None):
+    """
+    Run one pipeline cycle across several basins concurrently
+
+    Args:
+        basins (list): Basin dicts (id, name, lat, lon), e.g. from select_basins()
+        workers (int, optional): Worker processes (default: one per basin, up to the CPU count)
+        worker_memory_mb (int, optional): Address space cap per worker
+            (default: MAX_MEMORY_MB split evenly across workers)
+        custom_suffix (str): Suffix shared by the cycle and its basin run IDs
+        use_cache (bool, optional): Reuse cached stage outputs (default: Config.STAGE_CACHE)
+
+    Returns:
+        dict: Combined cycle report (also saved as cycle_report.json)
+    """
+    if not basins:
+        raise ValueError("No basins selected")
+
+    workers = max(1, min(workers or os.cpu_count() or 1, len(basins)))
+    worker_memory_mb = worker_memory_mb or max(256, Config.MAX_MEMORY_MB // workers)
+    stage_cpus = max(1, Config.MAX_CPUS // workers)
+
+    cycle_id = Config.get_cycle_id(custom_suffix)
+    cycle_dir = Config.get_cycle_dir(cycle_id)
+    shared_dir = cycle_dir / "shared"
+    shared_dir.mkdir(parents=True, exist_ok=True)
+    run_prefix = cycle_id.replace("cycle_", "run_", 1)
+
+    print("\n" + "="*70)
+    print(f"MULTI-BASIN CYCLE STARTED")
+    print(f"   Cycle ID: {cycle_id}")
+    print(f"   Basins: {len(basins)}")
+    print(f"   Workers: {workers} x ({stage_cpus} CPUs, {worker_memory_mb} MB)")
+    print("="*70 + "\n")
+
+    report = {
+        "cycle_id": cycle_id,
+        "start_time": datetime.now().isoformat(),
+        "status": "in_progress",
+        "workers": workers,
+        "worker_memory_mb": worker_memory_mb,
+        "stage_cpus_per_worker": stage_cpus,
+        "shared_inputs": [],
+        "basins": []
+    }
+    started = time.perf_counter()
+
+    # Basin-independent read-only inputs: built once, linked into every run
+    from orchestrator import run_static_preprocessing
+    run_static_preprocessing(cycle_id, output_dir=shared_dir)
+    report["shared_inputs"] = [str(shared_dir / name) for name in SHARED_INPUTS]
+
+    results = {}
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             initializer=_limit_memory, initargs=(worker_memory_mb,)) as pool:
+        futures = {
+            pool.submit(
+                _run_basin, f"{run_prefix}_{basin['id']}", basin, str(shared_dir),
+                stage_cpus, worker_memory_mb, use_cache
+            ): basin
+            for basin in basins
+        }
+        for future in as_completed(futures):
+            basin = futures[future]
+            try:
+                summary = future.result()
+            except BrokenProcessPool as e:
+                # The worker died (e.g. killed by the OS) instead of raising
+                summary = {"basin_id": basin["id"], "name": basin["name"],
+                           "run_id": f"{run_prefix}_{basin['id']}", "status": "failed",
+                           "error": f"Worker process died: {e}"}
+            results[basin["id"]] = summary
+            detail = summary.get("severityLevel") or summary.get("error", "")
+            print(f"[{basin['id']}] {summary['status']} in {summary.get('duration_seconds', '-')}s {detail}")
+
+    wall_seconds = time.perf_counter() - started
+    report["basins"] = [results[basin["id"]] for basin in basins]
+    failed = [basin for basin in report["basins"] if basin["status"] != "completed"]
+    report["status"] = "completed" if not failed else "failed" if len(failed) == len(basins) else "partial"
+    report["end_time"] = datetime.now().isoformat()
+    report["wall_seconds"] = round(wall_seconds, 3)
+    basin_seconds = sum(basin.get("duration_seconds") or 0 for basin in report["basins"])
+    report["basin_seconds_total"] = round(basin_seconds, 3)
+    report["slowest_basin_seconds"] = max((basin.get("duration_seconds") or 0 for basin in report["basins"]), default=0)
+    report["speedup"] = round(basin_seconds / wall_seconds, 2) if wall_seconds else None
+
+    report_path = cycle_dir / "cycle_report.json"
+    with open(report_path, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print("\n" + "="*70)
+    print(f"MULTI-BASIN CYCLE {report['status'].upper()}")
+    print(f"   Cycle ID: {cycle_id}")
+    print(f"   Basins completed: {len(basins) - len(failed)}/{len(basins)}")
+    print(f"   Wall time: {report['wall_seconds']}s (slowest basin {report['slowest_basin_seconds']}s, "
+          f"sum {report['basin_seconds_total']}s)")
+    print(f"   Report: {report_path}")
+    print("="*70 + "\n")
+
+    return report
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Multi-basin pipeline cycle')
+    parser.add_argument('--basins', type=str, default='all', help='"all" or comma-separated basin IDs')
+    parser.add_argument('--workers', type=int, default=None, help='Basin worker processes')
+    parser.add_argument('--worker-memory-mb', type=int, default=None, help='Address space cap (MB) per worker')
+    parser.add_argument('--suffix', type=str, default='AUTO', help='Custom suffix for the cycle and run IDs')
+    parser.add_argument('--no-cache', action='store_true', help='Recompute every stage instead of reusing cached outputs')
+    args = parser.parse_args()
+
+    cycle = run_multi_basin(select_basins(args.basins), args.workers, args.worker_memory_mb, args.suffix,
+                            use_cache=False if args.no_cache else None)
+    sys.exit(0 if cycle["status"] == "completed" else 1)
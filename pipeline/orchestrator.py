@@ -1,18 +1,22 @@
 """
 Flood Prediction Pipeline Orchestrator
 Manages the complete workflow: Ingestion -> LISFLOOD-OS -> LISFLOOD-FP -> AI Model -> Export
+
+Stages are declared as a dependency graph (see STAGES) and run by
+scheduler.Scheduler, which starts independent stages concurrently within
+the CPU/memory budget.
 """
 import os
 import sys
 import json
+import time
 from pathlib import Path
 from datetime import datetime
 
 # Import configuration and pipeline stages
 from config import Config
 import importlib.util
-import sys
-from pathlib import Path
+import threading
 
 # Import modules with numeric prefixes using importlib
 def import_stage_module(stage_dir, module_name):
@@ -23,24 +27,137 @@ def import_stage_module(stage_dir, module_name):
     spec.loader.exec_module(module)
     return module
 
-# Import stage modules
-ingestion_module = import_stage_module("01_ingestion", "ingestion")
-lisflood_os_module = import_stage_module("02_lisflood_os", "lisflood_os")
-lisflood_fp_module = import_stage_module("03_lisflood_fp", "lisflood_fp")
-ai_model_module = import_stage_module("04_ai_model", "inference_simple")
+_stage_modules = {}
+_stage_modules_lock = threading.Lock()
+
+class StageFunction:
+    """
+    Stage entry point whose module is imported on the first call.
+    
+    Importing the orchestrator (for --list, --summary, the backend's
+    catalog reads) therefore never loads a stage or its numerical/raster
+    libraries. The source file is known up front, so the stage cache can
+    key a stage without importing it either.
+    """
+    
+    def __init__(self, stage_dir, module_name, func_name):
+        self.stage_dir = stage_dir
+        self.module_name = module_name
+        self.func_name = func_name
+        self.source_file = str(Path(__file__).parent / stage_dir / f"{module_name}.py")
+        self.__name__ = self.__qualname__ = func_name
+    
+    def resolve(self):
+        """Import the stage module (once per process) and return the function"""
+        key = (self.stage_dir, self.module_name)
+        # Stages run on scheduler threads; two may share a module
+        with _stage_modules_lock:
+            module = _stage_modules.get(key)
+            if module is None:
+                module = _stage_modules[key] = import_stage_module(self.stage_dir, self.module_name)
+        return getattr(module, self.func_name)
+    
+    def __call__(self, *args, **kwargs):
+        return self.resolve()(*args, **kwargs)
+    
+    def __repr__(self):
+        return f"StageFunction({self.stage_dir}/{self.module_name}.{self.func_name})"
+
+# Stage registry: resolved on first use
+run_ingestion = StageFunction("01_ingestion", "ingestion", "run_ingestion")
+run_static_preprocessing = StageFunction("01_ingestion", "ingestion", "run_static_preprocessing")
+run_lisflood_os = StageFunction("02_lisflood_os", "lisflood_os", "run_lisflood_os")
+run_lisflood_fp = StageFunction("03_lisflood_fp", "lisflood_fp", "run_lisflood_fp")
+run_ai_inference = StageFunction("04_ai_model", "inference_simple", "run_ai_inference")
+
+from run_archive import open_run_archive
+from run_catalog import get_run_catalog
+from run_events import RunEventLog, process_peak_rss_mb
+from scheduler import Scheduler, Stage, StageError, StageGraph
+from stage_cache import StageCache
+
+
+def grid_params():
+    """Model grid settings the static layers depend on"""
+    return {
+        "width": Config.FLOOD_MAP_WIDTH,
+        "height": Config.FLOOD_MAP_HEIGHT,
+        "pixel_size": Config.PIXEL_SIZE
+    }
 
-run_ingestion = ingestion_module.run_ingestion
-run_lisflood_os = lisflood_os_module.run_lisflood_os
-run_lisflood_fp = lisflood_fp_module.run_lisflood_fp
-run_ai_inference = ai_model_module.run_ai_inference
 
-def run_pipeline(run_id=None, custom_suffix="AUTO"):
+def location_params():
+    """Grid plus the simulated location, for the hydrodynamic stages"""
+    return {
+        **grid_params(),
+        "location": Config.LOCATION_NAME,
+        "latitude": Config.LAT_CENTER,
+        "longitude": Config.LON_CENTER
+    }
+
+# Stage graph: dependencies follow from the declared inputs/outputs
+# (paths relative to the run directory)
+STAGES = [
+    Stage(
+        "01_ingestion", run_ingestion,
+        outputs=["01_ingestion/ingestion_metadata.json"],
+        cpus=1, memory_mb=512,
+        description="Weather, gauge and remote sensing ingestion",
+        cacheable=False  # fetches live data; downstream stages key on its output
+    ),
+    Stage(
+        "01_static_layers", run_static_preprocessing,
+        outputs=["01_ingestion/static_layers.json"],
+        cpus=2, memory_mb=1024,
+        description="DEM, channel network and friction preprocessing",
+        params=grid_params
+    ),
+    Stage(
+        "02_lisflood_os", run_lisflood_os,
+        inputs=["01_ingestion/ingestion_metadata.json", "01_ingestion/static_layers.json"],
+        outputs=["02_lisflood_os/lisflood_os_results.json"],
+        cpus=4, memory_mb=2048,
+        description="LISFLOOD-OS (1D Hydrodynamic)",
+        params=location_params
+    ),
+    Stage(
+        "03_lisflood_fp", run_lisflood_fp,
+        inputs=["02_lisflood_os/lisflood_os_results.json", "01_ingestion/static_layers.json"],
+        outputs=["03_lisflood_fp/lisflood_fp_results.json"],
+        cpus=8, memory_mb=4096,
+        description="LISFLOOD-FP (2D Floodplain)",
+        params=location_params
+    ),
+    Stage(
+        "04_ai_model", run_ai_inference,
+        inputs=["03_lisflood_fp/lisflood_fp_results.json"],
+        outputs=["04_predictions/risk_summary.json", "04_predictions/final_map.tif"],
+        cpus=2, memory_mb=2048,
+        description="AI Model & Risk Assessment",
+        cacheable=False  # stamps the run ID and issue time into the prediction
+    ),
+]
+
+PIPELINE_GRAPH = StageGraph(STAGES)
+
+# Multi-basin cycles build the static layers once per cycle and link them
+# into every basin run, so there static_layers.json is an external input
+BASIN_GRAPH = StageGraph([stage for stage in STAGES if stage.name != "01_static_layers"])
+
+def run_pipeline(run_id=None, custom_suffix="AUTO", max_cpus=None, max_memory_mb=None, graph=None,
+                 use_cache=None, resume=False):
     """
     Execute the complete flood prediction pipeline
     
     Args:
         run_id (str, optional): Custom run ID. If None, generates from timestamp
         custom_suffix (str): Custom suffix for run ID (default: "AUTO")
+        max_cpus (int, optional): CPU budget shared by concurrent stages
+        max_memory_mb (int, optional): Memory budget shared by concurrent stages
+        graph (StageGraph, optional): Stages to run (default: PIPELINE_GRAPH)
+        use_cache (bool, optional): Reuse cached stage outputs (default: Config.STAGE_CACHE)
+        resume (bool): Continue run_id from its first incomplete stage, reusing
+            stages whose checkpoints verify
     
     Returns:
         dict: Results from all pipeline stages
@@ -49,68 +166,55 @@ def run_pipeline(run_id=None, custom_suffix="AUTO"):
     # Generate run ID if not provided
     if run_id is None:
         run_id = Config.get_run_id(custom_suffix)
+    if resume and not Config.get_run_dir(run_id).exists():
+        print(f"   Nothing to resume for {run_id}: starting from the first stage")
+        resume = False
+    
+    if use_cache is None:
+        use_cache = Config.STAGE_CACHE
+    cache = get_stage_cache() if use_cache else None
+    scheduler = Scheduler(graph or PIPELINE_GRAPH, max_cpus=max_cpus, max_memory_mb=max_memory_mb, cache=cache)
     
     print("\n" + "="*70)
     print(f"FLOOD PREDICTION PIPELINE STARTED")
     print(f"   Run ID: {run_id}")
     print(f"   Run-specific data will be saved to:")
     print(f"   {Config.get_run_dir(run_id)}")
+    print(f"   Budget: {scheduler.max_cpus} CPUs, {scheduler.max_memory_mb} MB")
+    if resume:
+        print(f"   Resuming from the first incomplete stage")
     print("="*70 + "\n")
     
     # Create the directory structure for this run
     Config.ensure_run_structure(run_id)
+    events = RunEventLog(Config.get_run_dir(run_id))
+    started = time.perf_counter()
     
     pipeline_results = {
         "run_id": run_id,
         "start_time": datetime.now().isoformat(),
         "status": "in_progress",
+        "location": {
+            "name": Config.LOCATION_NAME,
+            "latitude": Config.LAT_CENTER,
+            "longitude": Config.LON_CENTER
+        },
+        "scheduler": {
+            "max_cpus": scheduler.max_cpus,
+            "max_memory_mb": scheduler.max_memory_mb
+        },
+        "cache": {"enabled": cache is not None},
+        "resumed": resume,
         "stages": {}
     }
+    report_path = os.path.join(str(Config.get_run_dir(run_id)), "pipeline_report.json")
+    _catalog_record(run_id, pipeline_results)
+    events.emit("run_started", run_id=run_id, stages=scheduler.graph.order,
+                max_cpus=scheduler.max_cpus, max_memory_mb=scheduler.max_memory_mb, resume=resume)
     
     try:
-        # ====================
-        # Stage 1: Ingestion
-        # ====================
-        print("\n[Stage 1/4] Data Ingestion")
-        print("-" * 70)
-        stage1_dir = run_ingestion(run_id)
-        pipeline_results["stages"]["01_ingestion"] = {
-            "status": "completed",
-            "output_dir": stage1_dir
-        }
-        
-        # ====================
-        # Stage 2: LISFLOOD-OS
-        # ====================
-        print("\n[Stage 2/4] LISFLOOD-OS (1D Hydrodynamic)")
-        print("-" * 70)
-        stage2_dir = run_lisflood_os(run_id)
-        pipeline_results["stages"]["02_lisflood_os"] = {
-            "status": "completed",
-            "output_dir": stage2_dir
-        }
-        
-        # ====================
-        # Stage 3: LISFLOOD-FP
-        # ====================
-        print("\n[Stage 3/4] LISFLOOD-FP (2D Floodplain)")
-        print("-" * 70)
-        stage3_dir = run_lisflood_fp(run_id)
-        pipeline_results["stages"]["03_lisflood_fp"] = {
-            "status": "completed",
-            "output_dir": stage3_dir
-        }
-        
-        # ====================
-        # Stage 4: AI Inference
-        # ====================
-        print("\n[Stage 4/4] AI Model & Risk Assessment")
-        print("-" * 70)
-        stage4_dir = run_ai_inference(run_id)
-        pipeline_results["stages"]["04_ai_model"] = {
-            "status": "completed",
-            "output_dir": stage4_dir
-        }
+        pipeline_results["stages"] = scheduler.run(run_id, on_event=events.emit, resume=resume)
+        pipeline_results["cache"].update(_cache_summary(pipeline_results["stages"]))
         
         # ====================
         # Pipeline Complete
@@ -119,9 +223,11 @@ def run_pipeline(run_id=None, custom_suffix="AUTO"):
         pipeline_results["end_time"] = datetime.now().isoformat()
         
         # Save pipeline execution report
-        report_path = os.path.join(str(Config.get_run_dir(run_id)), "pipeline_report.json")
         with open(report_path, 'w') as f:
             json.dump(pipeline_results, f, indent=2)
+        _catalog_record(run_id, pipeline_results)
+        events.emit("run_finished", status="completed", duration_seconds=round(time.perf_counter() - started, 3),
+                    process_peak_rss_mb=process_peak_rss_mb())
         
         print("\n" + "="*70)
         print(f"PIPELINE COMPLETED SUCCESSFULLY")
@@ -133,14 +239,20 @@ def run_pipeline(run_id=None, custom_suffix="AUTO"):
         return pipeline_results
     
     except Exception as e:
+        if isinstance(e, StageError):
+            pipeline_results["stages"] = e.records
+            pipeline_results["cache"].update(_cache_summary(e.records))
+            pipeline_results["failed_stage"] = e.stage
         pipeline_results["status"] = "failed"
         pipeline_results["error"] = str(e)
         pipeline_results["end_time"] = datetime.now().isoformat()
         
         # Save error report
-        report_path = os.path.join(str(Config.get_run_dir(run_id)), "pipeline_report.json")
         with open(report_path, 'w') as f:
             json.dump(pipeline_results, f, indent=2)
+        _catalog_record(run_id, pipeline_results)
+        events.emit("run_finished", status="failed", duration_seconds=round(time.perf_counter() - started, 3),
+                    process_peak_rss_mb=process_peak_rss_mb(), failed_stage=pipeline_results.get("failed_stage"), error=str(e))
         
         print("\n" + "="*70)
         print(f"PIPELINE FAILED")
@@ -150,12 +262,38 @@ def run_pipeline(run_id=None, custom_suffix="AUTO"):
         
         raise
 
+def _catalog_record(run_id, report):
+    """Index the run in the run catalog (never fails the run)"""
+    try:
+        get_run_catalog().record(run_id, report)
+    except Exception as e:
+        print(f"   Warning: run catalog not updated: {e}")
+
+def load_stages():
+    """Import every stage module now (warm workers pay for it once)"""
+    for stage in STAGES:
+        if isinstance(stage.func, StageFunction):
+            stage.func.resolve()
+
+_stage_cache = None
+
+def get_stage_cache():
+    """Process-wide stage cache (its file hashes stay memoized across runs)"""
+    global _stage_cache
+    if _stage_cache is None:
+        _stage_cache = StageCache(Config.CACHE_DIR)
+    return _stage_cache
+
+def _cache_summary(records):
+    """Stage names by cache outcome for the report"""
+    return {
+        "hits": [name for name, record in records.items() if record.get("cache") == "hit"],
+        "misses": [name for name, record in records.items() if record.get("cache") == "miss"]
+    }
+
 def list_runs():
-    """List all existing runs in the data_store"""
-    if Config.RUNS_DIR.exists():
-        runs = sorted([d.name for d in Config.RUNS_DIR.iterdir() if d.is_dir()])
-        return runs
-    return []
+    """List all existing runs in the data_store (oldest first)"""
+    return [run["run_id"] for run in get_run_catalog().list_runs(newest_first=False)]
 
 def get_run_summary(run_id):
     """Get summary of a specific run"""
@@ -163,6 +301,13 @@ def get_run_summary(run_id):
     if report_path.exists():
         with open(report_path, 'r') as f:
             return json.load(f)
+    archive = open_run_archive(run_id)
+    if archive is not None:
+        with archive:
+            try:
+                return archive.read_json("pipeline_report.json")
+            except FileNotFoundError:
+                return None
     return None
 
 if __name__ == "__main__":
@@ -173,10 +318,27 @@ if __name__ == "__main__":
     parser.add_argument('--summary', type=str, help='Get summary of a specific run')
     parser.add_argument('--suffix', type=str, default='AUTO', help='Custom suffix for run ID')
     parser.add_argument('--run-id', type=str, default=None, help='Use a specific run ID')
+    parser.add_argument('--max-cpus', type=int, default=None, help='CPU budget for concurrent stages')
+    parser.add_argument('--max-memory-mb', type=int, default=None, help='Memory budget (MB) for concurrent stages')
+    parser.add_argument('--graph', action='store_true', help='Print the stage graph and exit')
+    parser.add_argument('--no-cache', action='store_true', help='Recompute every stage instead of reusing cached outputs')
+    parser.add_argument('--resume', action='store_true',
+                        help='With --run-id: continue a failed run from its first incomplete stage')
+    parser.add_argument('--basins', type=str, default=None,
+                        help='Run a multi-basin cycle: "all" or comma-separated basin IDs from basins.json')
+    parser.add_argument('--workers', type=int, default=None, help='Basin worker processes (default: one per basin, up to the CPU count)')
+    parser.add_argument('--worker-memory-mb', type=int, default=None, help='Address space cap (MB) per basin worker')
     
     args = parser.parse_args()
     
-    if args.list:
+    if args.graph:
+        print("\nStage Graph:")
+        for name in PIPELINE_GRAPH.order:
+            stage = PIPELINE_GRAPH.stages[name]
+            deps = ", ".join(PIPELINE_GRAPH.dependencies[name]) or "-"
+            print(f"  {name:<18} after: {deps:<34} {stage.cpus} CPU, {stage.memory_mb} MB")
+    
+    elif args.list:
         runs = list_runs()
         print("\nExisting Runs:")
         for run in runs:
@@ -190,6 +352,28 @@ if __name__ == "__main__":
         else:
             print(f"Run {args.summary} not found")
     
+    elif args.basins:
+        from multi_basin import run_multi_basin, select_basins
+        report = run_multi_basin(
+            select_basins(args.basins),
+            workers=args.workers,
+            worker_memory_mb=args.worker_memory_mb,
+            custom_suffix=args.suffix,
+            use_cache=False if args.no_cache else None
+        )
+        if report["status"] != "completed":
+            sys.exit(1)
+    
+    elif args.resume and not args.run_id:
+        parser.error("--resume needs the --run-id of the run to continue")
+    
     else:
         # Run the pipeline
-        run_pipeline(run_id=args.run_id, custom_suffix=args.suffix)
+        run_pipeline(
+            run_id=args.run_id,
+            custom_suffix=args.suffix,
+            max_cpus=args.max_cpus,
+            max_memory_mb=args.max_memory_mb,
+            use_cache=False if args.no_cache else None,
+            resume=args.resume
+        )
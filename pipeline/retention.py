@@ -0,0 +1,177 @@
+"""
+Run Retention
+Tiered retention for data_store so it stops growing without bound
+
+    hot       run directory in data_store/runs (artifacts served over HTTP)
+    archived  one zip per run in data_store/archive (see run_archive.py),
+              still listed by the run catalog and read by DataBridge
+    pruned    deleted, with its catalog entry
+
+The newest RETENTION_KEEP_LATEST runs always stay hot. Older runs are
+archived once they are RETENTION_HOT_DAYS old and pruned after
+RETENTION_MAX_AGE_DAYS. Runs still in progress are never archived. Stage
+cache entries unused for CACHE_MAX_AGE_DAYS and cycle directories past
+the horizon are removed in the same pass.
+
+Usage:
+    python retention.py --dry-run
+    python retention.py --hot-days 7 --max-age-days 90
+"""
+import os
+import shutil
+import time
+from dataclasses import dataclass
+from datetime import datetime
+
+from config import Config
+from run_archive import pack_run
+from run_catalog import get_run_catalog
+from stage_cache import StageCache
+
+
+@dataclass
+class RetentionPolicy:
+    """Ages are in days; max_age_days <= 0 keeps runs forever"""
+    hot_days: float = Config.RETENTION_HOT_DAYS
+    keep_latest: int = Config.RETENTION_KEEP_LATEST
+    max_age_days: float = Config.RETENTION_MAX_AGE_DAYS
+    cache_max_age_days: float = Config.CACHE_MAX_AGE_DAYS
+
+
+def _age_days(run, now):
+    """Age from the run's start time (file mtime when it has none)"""
+    try:
+        started = datetime.fromisoformat(run["start_time"]).timestamp()
+    except (TypeError, ValueError):
+        path = Config.get_run_dir(run["run_id"])
+        if run["storage"] == "archived":
+            path = Config.get_archive_path(run["run_id"])
+        try:
+            started = os.stat(path).st_mtime
+        except OSError:
+            return 0.0
+    return max(0.0, (now - started) / 86400)
+
+
+def plan_retention(policy, now=None):
+    """
+    Decide what happens to every run, newest first
+
+    Returns:
+        list: (run_id, action, age_days) with action "keep", "archive" or "prune"
+    """
+    now = now or time.time()
+    actions = []
+    for index, run in enumerate(get_run_catalog().list_runs()):
+        age = _age_days(run, now)
+        protected = index < policy.keep_latest
+        if not protected and policy.max_age_days > 0 and age > policy.max_age_days:
+            action = "prune"
+        elif (not protected and age > policy.hot_days and run["storage"] == "hot"
+              and run["status"] != "in_progress"):
+            action = "archive"
+        else:
+            action = "keep"
+        actions.append((run["run_id"], action, round(age, 1)))
+    return actions
+
+
+def prune_run(run_id):
+    """Delete a run (directory and/or archive) and its catalog entry"""
+    run_dir = Config.get_run_dir(run_id)
+    if run_dir.is_dir():
+        shutil.rmtree(run_dir)
+    archive = Config.get_archive_path(run_id)
+    if archive.exists():
+        archive.unlink()
+    get_run_catalog().remove(run_id)
+
+
+def _prune_cycles(max_age_days, now, dry_run):
+    """Cycle directories (shared static layers, cycle reports) past the horizon"""
+    if max_age_days <= 0 or not Config.CYCLES_DIR.exists():
+        return []
+    cutoff = now - max_age_days * 86400
+    pruned = []
+    for entry in Config.CYCLES_DIR.iterdir():
+        if entry.is_dir() and entry.stat().st_mtime < cutoff:
+            pruned.append(entry.name)
+            if not dry_run:
+                shutil.rmtree(entry, ignore_errors=True)
+    return pruned
+
+
+def apply_retention(policy=None, dry_run=False):
+    """
+    Archive and prune runs according to policy, then trim the stage cache
+
+    Returns:
+        dict: archived / pruned run IDs, bytes before and after archiving,
+        pruned cycles and stage cache entries removed
+    """
+    policy = policy or RetentionPolicy()
+    now = time.time()
+    report = {
+        "dry_run": dry_run,
+        "archived": [],
+        "pruned": [],
+        "original_bytes": 0,
+        "archive_bytes": 0,
+        "errors": {}
+    }
+
+    for run_id, action, age in plan_retention(policy, now):
+        if action == "keep":
+            continue
+        print(f"   {action:<8} {run_id} ({age} days)")
+        if dry_run:
+            report["archived" if action == "archive" else "pruned"].append(run_id)
+            continue
+        try:
+            if action == "archive":
+                packed = pack_run(run_id)
+                get_run_catalog().record(run_id)
+                report["archived"].append(run_id)
+                report["original_bytes"] += packed["original_bytes"]
+                report["archive_bytes"] += packed["archive_bytes"]
+            else:
+                prune_run(run_id)
+                report["pruned"].append(run_id)
+        except (OSError, ValueError) as e:
+            # One unreadable run must not stop the rest of the pass
+            print(f"   Warning: {action} failed for {run_id}: {e}")
+            report["errors"][run_id] = str(e)
+
+    report["cycles_pruned"] = _prune_cycles(policy.max_age_days, now, dry_run)
+    report["cache"] = StageCache(Config.CACHE_DIR).prune(policy.cache_max_age_days, dry_run=dry_run)
+    return report
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    import sys
+
+    parser = argparse.ArgumentParser(description='Archive and prune pipeline runs')
+    parser.add_argument('--dry-run', action='store_true', help='Show what would be archived or pruned')
+    parser.add_argument('--hot-days', type=float, default=Config.RETENTION_HOT_DAYS,
+                        help='Archive runs older than this many days')
+    parser.add_argument('--keep-latest', type=int, default=Config.RETENTION_KEEP_LATEST,
+                        help='Newest runs that always stay hot')
+    parser.add_argument('--max-age-days', type=float, default=Config.RETENTION_MAX_AGE_DAYS,
+                        help='Delete runs older than this many days (0 = never)')
+    parser.add_argument('--cache-max-age-days', type=float, default=Config.CACHE_MAX_AGE_DAYS,
+                        help='Delete stage cache entries unused for this many days')
+    args = parser.parse_args()
+
+    print(f"\nRetention{' (dry run)' if args.dry_run else ''}: hot {args.hot_days} days "
+          f"(newest {args.keep_latest} always), keep {args.max_age_days or 'forever'} days")
+    result = apply_retention(RetentionPolicy(
+        hot_days=args.hot_days,
+        keep_latest=args.keep_latest,
+        max_age_days=args.max_age_days,
+        cache_max_age_days=args.cache_max_age_days
+    ), dry_run=args.dry_run)
+    print(json.dumps(result, indent=2))
+    if result["errors"]:
+        sys.exit(1)
@@ -0,0 +1,110 @@
+"""
+Run Archives
+Packs a finished run directory into a single compressed file
+
+data_store/archive/<run_id>.zip holds every file of the run under its
+run-relative path. The zip central directory is the index: a reader
+opens one file and seeks straight to the member it wants, so DataBridge
+and the run catalog read archived runs without unpacking them. One file
+per run replaces a directory of small JSON files and rasters, which keeps
+inode counts and directory walks flat as runs age.
+"""
+import json
+import os
+import shutil
+import uuid
+import zipfile
+
+from config import Config
+
+
+class RunArchive:
+    """Read-only view of an archived run"""
+
+    def __init__(self, path):
+        self.path = path
+        self._zip = zipfile.ZipFile(path, 'r')
+        self._names = set(self._zip.namelist())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._zip.close()
+
+    def exists(self, relative):
+        return str(relative).replace(os.sep, "/") in self._names
+
+    def read_bytes(self, relative):
+        """Contents of one member (FileNotFoundError when absent)"""
+        name = str(relative).replace(os.sep, "/")
+        if name not in self._names:
+            raise FileNotFoundError(f"{self.path}:{name}")
+        return self._zip.read(name)
+
+    def read_json(self, relative):
+        return json.loads(self.read_bytes(relative))
+
+    def namelist(self):
+        return sorted(self._names)
+
+
+def open_run_archive(run_id):
+    """RunArchive for run_id, or None when the run is not archived"""
+    path = Config.get_archive_path(run_id)
+    try:
+        return RunArchive(path)
+    except FileNotFoundError:
+        return None
+
+
+def pack_run(run_id, remove=True):
+    """
+    Archive a run directory and (by default) delete it
+
+    The archive is written under a temporary name, checked and then
+    renamed into place, so a crash never leaves a partial archive next
+    to a deleted run.
+
+    Returns:
+        dict: archive path, files packed, bytes before and after
+    """
+    run_dir = Config.get_run_dir(run_id)
+    if not run_dir.is_dir():
+        raise ValueError(f"Run {run_id} not found")
+
+    archive_path = Config.get_archive_path(run_id)
+    archive_path.parent.mkdir(parents=True, exist_ok=True)
+    staging = archive_path.with_name(f".tmp-{uuid.uuid4().hex}.zip")
+
+    files, original_bytes = 0, 0
+    try:
+        with zipfile.ZipFile(staging, 'w', compression=zipfile.ZIP_DEFLATED, compresslevel=6) as archive:
+            for root, _, names in os.walk(run_dir):
+                for name in sorted(names):
+                    path = os.path.join(root, name)
+                    archive.write(path, os.path.relpath(path, run_dir).replace(os.sep, "/"))
+                    files += 1
+                    original_bytes += os.path.getsize(path)
+        with zipfile.ZipFile(staging, 'r') as archive:
+            bad = archive.testzip()
+            if bad is not None:
+                raise ValueError(f"Archive check failed for {run_id}: {bad}")
+        os.replace(staging, archive_path)
+    finally:
+        if staging.exists():
+            staging.unlink()
+
+    if remove:
+        shutil.rmtree(run_dir)
+
+    return {
+        "run_id": run_id,
+        "archive": str(archive_path),
+        "files": files,
+        "original_bytes": original_bytes,
+        "archive_bytes": archive_path.stat().st_size
+    }
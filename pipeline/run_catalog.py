@@ -0,0 +1,279 @@
+"""
+Run Catalog
+SQLite index of pipeline runs, so listing runs and finding the latest one
+no longer scans data_store/runs and opens every pipeline_report.json
+
+The orchestrator records each run when it starts and again when its report
+is written. Readers call sync() first: it compares the mtimes of the runs
+and archive directories with the ones seen last time and, only when they
+changed (a run was created, archived or deleted outside the orchestrator),
+lists names to add, drop or re-tier the difference. rebuild() re-indexes
+everything from disk. Archived runs (run_archive.py) stay listed with
+storage "archived".
+"""
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+from config import Config
+from run_archive import open_run_archive
+
+CATALOG_COLUMNS = (
+    "run_id", "status", "start_time", "end_time", "location",
+    "severity_level", "risk_score", "has_predictions", "storage", "updated_at"
+)
+
+RISK_SUMMARY = "04_predictions/risk_summary.json"
+
+
+def _report_row(run_id, report=None):
+    """Catalog row for a run from its report (read from disk when not given)"""
+    run_dir = Config.get_run_dir(run_id)
+    archive = None if run_dir.exists() else open_run_archive(run_id)
+
+    def read_json(relative):
+        try:
+            if archive is not None:
+                return archive.read_json(relative)
+            with open(run_dir / relative, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    try:
+        if report is None:
+            report = read_json("pipeline_report.json") or {}
+        data = read_json(RISK_SUMMARY)
+    finally:
+        if archive is not None:
+            archive.close()
+    risk_summary = (data[0] if isinstance(data, list) else data) or {}
+
+    location = report.get("location", {}).get("name") if isinstance(report.get("location"), dict) else None
+    return {
+        "run_id": run_id,
+        "status": report.get("status", "unknown"),
+        "start_time": report.get("start_time", "unknown"),
+        "end_time": report.get("end_time", "unknown"),
+        "location": location or risk_summary.get("location"),
+        "severity_level": risk_summary.get("severityLevel"),
+        "risk_score": risk_summary.get("riskScore"),
+        "has_predictions": 1 if risk_summary else 0,
+        "storage": "archived" if archive is not None else "hot",
+        "updated_at": datetime.now().isoformat()
+    }
+
+
+class RunCatalog:
+    """Runs indexed by ID (newest first), status and prediction availability"""
+
+    def __init__(self, db_path=None, runs_dir=None, archive_dir=None):
+        self.db_path = str(db_path or Config.RUN_CATALOG_DB)
+        self.runs_dir = runs_dir or Config.RUNS_DIR
+        self.archive_dir = archive_dir or Config.ARCHIVE_DIR
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None, timeout=30.0)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS runs (
+                run_id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                start_time TEXT,
+                end_time TEXT,
+                location TEXT,
+                severity_level TEXT,
+                risk_score REAL,
+                has_predictions INTEGER NOT NULL DEFAULT 0,
+                storage TEXT NOT NULL DEFAULT 'hot',
+                updated_at TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_runs_status ON runs (status, run_id);
+            CREATE INDEX IF NOT EXISTS idx_runs_predictions ON runs (has_predictions, run_id);
+            CREATE INDEX IF NOT EXISTS idx_runs_updated ON runs (updated_at);
+            CREATE TABLE IF NOT EXISTS catalog_meta (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+        """)
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(runs)")}
+        if "storage" not in columns:
+            # Catalogs from before archiving: add the column and re-index on next sync
+            self._conn.execute("ALTER TABLE runs ADD COLUMN storage TEXT NOT NULL DEFAULT 'hot'")
+            self._conn.execute("DELETE FROM catalog_meta")
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def record(self, run_id, report=None):
+        """Insert or refresh one run (report dict, or read from disk)"""
+        row = _report_row(run_id, report)
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO runs ({', '.join(CATALOG_COLUMNS)}) "
+                f"VALUES ({', '.join('?' for _ in CATALOG_COLUMNS)})",
+                tuple(row[column] for column in CATALOG_COLUMNS)
+            )
+
+    def remove(self, run_id):
+        with self._lock:
+            self._conn.execute("DELETE FROM runs WHERE run_id = ?", (run_id,))
+
+    def rebuild(self):
+        """Re-index every run directory from disk; returns the run count"""
+        names = self._run_names()
+        rows = [_report_row(name) for name in names]
+        stamp = self._disk_stamp()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute("DELETE FROM runs")
+                self._conn.executemany(
+                    f"INSERT INTO runs ({', '.join(CATALOG_COLUMNS)}) "
+                    f"VALUES ({', '.join('?' for _ in CATALOG_COLUMNS)})",
+                    [tuple(row[column] for column in CATALOG_COLUMNS) for row in rows]
+                )
+                self._set_meta("disk_stamp", stamp)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return len(rows)
+
+    def sync(self):
+        """
+        Pick up runs created, archived or deleted outside the orchestrator.
+
+        Costs two stat() calls when nothing changed; otherwise one listing
+        of each directory, reading reports only for runs the catalog does
+        not know or whose storage tier changed.
+        """
+        stamp = self._disk_stamp()
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM catalog_meta WHERE key = 'disk_stamp'").fetchone()
+        if row is not None and row["value"] == stamp:
+            return
+        if row is None:
+            self.rebuild()
+            return
+
+        on_disk = self._run_storage()
+        with self._lock:
+            known = {r["run_id"]: r["storage"] for r in self._conn.execute("SELECT run_id, storage FROM runs")}
+        for run_id, storage in on_disk.items():
+            if known.get(run_id) != storage:
+                self.record(run_id)
+        with self._lock:
+            self._conn.executemany("DELETE FROM runs WHERE run_id = ?", [(r,) for r in known.keys() - on_disk.keys()])
+            self._set_meta("disk_stamp", stamp)
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def list_runs(self, status=None, limit=None, offset=0, newest_first=True):
+        """Runs sorted by run ID (i.e. start time), optionally filtered by status"""
+        self.sync()
+        query = "SELECT * FROM runs"
+        params = []
+        if status:
+            query += " WHERE status = ?"
+            params.append(status)
+        query += f" ORDER BY run_id {'DESC' if newest_first else 'ASC'} LIMIT ? OFFSET ?"
+        params += [-1 if limit is None else limit, offset]
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(query, params)]
+
+    def count(self, status=None):
+        self.sync()
+        with self._lock:
+            if status:
+                return self._conn.execute("SELECT COUNT(*) FROM runs WHERE status = ?", (status,)).fetchone()[0]
+            return self._conn.execute("SELECT COUNT(*) FROM runs").fetchone()[0]
+
+    def last_updated(self):
+        """updated_at of the most recently recorded run (None when empty)"""
+        with self._lock:
+            return self._conn.execute("SELECT MAX(updated_at) FROM runs").fetchone()[0]
+
+    def latest(self, status=None, with_predictions=False):
+        """Newest run (one index probe), optionally completed / with predictions"""
+        self.sync()
+        query = "SELECT * FROM runs"
+        clauses, params = [], []
+        if status:
+            clauses.append("status = ?")
+            params.append(status)
+        if with_predictions:
+            clauses.append("has_predictions = 1")
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        with self._lock:
+            row = self._conn.execute(query + " ORDER BY run_id DESC LIMIT 1", params).fetchone()
+        return dict(row) if row else None
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+
+    def _run_storage(self):
+        """run ID -> "hot" (directory) or "archived" (zip only)"""
+        storage = {}
+        try:
+            for entry in os.scandir(self.archive_dir):
+                if entry.name.endswith(".zip") and not entry.name.startswith("."):
+                    storage[entry.name[:-len(".zip")]] = "archived"
+        except FileNotFoundError:
+            pass
+        try:
+            storage.update((entry.name, "hot") for entry in os.scandir(self.runs_dir) if entry.is_dir())
+        except FileNotFoundError:
+            pass
+        return storage
+
+    def _run_names(self):
+        return list(self._run_storage())
+
+    def _disk_stamp(self):
+        """mtimes of the runs and archive directories"""
+        stamps = []
+        for directory in (self.runs_dir, self.archive_dir):
+            try:
+                stamps.append(str(os.stat(directory).st_mtime_ns))
+            except FileNotFoundError:
+                stamps.append("0")
+        return ":".join(stamps)
+
+    def _set_meta(self, key, value):
+        self._conn.execute("INSERT OR REPLACE INTO catalog_meta (key, value) VALUES (?, ?)", (key, value))
+
+
+_catalog = None
+
+def get_run_catalog():
+    """Process-wide catalog instance"""
+    global _catalog
+    if _catalog is None:
+        _catalog = RunCatalog()
+    return _catalog
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Pipeline run catalog')
+    parser.add_argument('--rebuild', action='store_true', help='Re-index every run directory from disk')
+    parser.add_argument('--status', type=str, default=None, help='Only list runs with this status')
+    parser.add_argument('--limit', type=int, default=20, help='Number of runs to list')
+    args = parser.parse_args()
+
+    catalog = get_run_catalog()
+    if args.rebuild:
+        print(f"Indexed {catalog.rebuild()} runs into {catalog.db_path}")
+    for run in catalog.list_runs(status=args.status, limit=args.limit):
+        print(f"  {run['run_id']:<48} {run['status']:<12} {run['storage']:<9} {run['severity_level'] or '-'}")
@@ -0,0 +1,62 @@
+"""
+Run Progress Events
+Structured, append-only progress log for a pipeline run
+
+Every run gets <run>/events.jsonl with one JSON object per line:
+run_started, stage_started, stage_finished (status, duration, cache outcome,
+bytes written, process peak RSS) and run_finished. Lines are flushed as they are
+written, so the backend can stream a live run by tailing the file instead
+of rescanning run directories.
+"""
+import json
+import os
+import threading
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows: events then omit peak RSS
+    resource = None
+
+EVENTS_FILE = "events.jsonl"
+
+
+def process_peak_rss_mb():
+    """
+    Lifetime peak resident set size of this process and its children (MB)
+
+    ru_maxrss never decreases, so this is not a per-stage measurement: it
+    covers every stage (and, in a warm job worker, every run) so far.
+    """
+    if resource is None:
+        return None
+    peak = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    )
+    # ru_maxrss is reported in KB on Linux and in bytes on macOS
+    scale = 1024 * 1024 if os.uname().sysname == "Darwin" else 1024
+    return round(peak / scale, 1)
+
+
+class RunEventLog:
+    """Appends progress events to one run's events.jsonl"""
+
+    def __init__(self, run_dir):
+        self.path = os.path.join(str(run_dir), EVENTS_FILE)
+        self._lock = threading.Lock()
+        self._seq = 0
+        # Continue numbering when a run ID is executed again
+        if os.path.exists(self.path):
+            with open(self.path, 'r') as f:
+                self._seq = sum(1 for _ in f)
+
+    def emit(self, event_type, **data):
+        """Append one event; returns its sequence number"""
+        with self._lock:
+            self._seq += 1
+            event = {"seq": self._seq, "type": event_type, "time": datetime.now().isoformat(), **data}
+            with open(self.path, 'a') as f:
+                f.write(json.dumps(event, default=str) + "\n")
+            return self._seq
@@ -0,0 +1,306 @@
+"""
+Pipeline Stage Scheduler
+Runs pipeline stages as a dependency graph instead of a fixed sequence
+
+Each stage declares the run-relative files it reads (inputs) and writes
+(outputs). Dependencies are derived from those declarations, and every stage
+whose inputs are ready starts as soon as its CPU/memory request fits in the
+remaining budget, so independent stages (e.g. DEM/friction preprocessing and
+weather ingestion) run side by side. With a StageCache, a cacheable stage
+whose key matches an earlier run is restored from the cache instead.
+Every completed stage leaves a checkpoint marker (see checkpoints.py), and
+a resumed run reuses the verified stages before its first incomplete one.
+"""
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from checkpoints import clear_marker, verify_marker, write_marker
+from config import Config
+from run_events import process_peak_rss_mb
+from stage_cache import file_sha256
+
+
+@dataclass
+class Stage:
+    """One node of the pipeline graph"""
+    name: str
+    func: Callable[[str], str]  # run_id -> output directory
+    inputs: List[str] = field(default_factory=list)  # paths relative to the run dir
+    outputs: List[str] = field(default_factory=list)
+    cpus: int = 1
+    memory_mb: int = 256
+    description: str = ""
+    # Cache key parameters beyond the input files (e.g. location, grid)
+    params: Optional[Callable[[], Dict]] = None
+    # False for stages whose outputs are not a function of their inputs
+    # (live data fetches, per-run IDs and timestamps)
+    cacheable: bool = True
+
+
+class StageError(Exception):
+    """A stage failed; `records` holds the per-stage report at that point"""
+
+    def __init__(self, stage, error, records):
+        super().__init__(f"Stage {stage} failed: {error}")
+        self.stage = stage
+        self.error = error
+        self.records = records
+
+
+class StageGraph:
+    """Validated stage DAG (dependencies derived from inputs/outputs)"""
+
+    def __init__(self, stages: List[Stage]):
+        self.stages = {stage.name: stage for stage in stages}
+        if len(self.stages) != len(stages):
+            raise ValueError("Duplicate stage names")
+
+        self.producers = {}
+        for stage in stages:
+            for output in stage.outputs:
+                if output in self.producers:
+                    raise ValueError(f"{output} is produced by both {self.producers[output]} and {stage.name}")
+                self.producers[output] = stage.name
+
+        self.dependencies = {
+            stage.name: sorted({self.producers[i] for i in stage.inputs if i in self.producers} - {stage.name})
+            for stage in stages
+        }
+        self.order = self._topological_order()
+
+    def external_inputs(self, name: str) -> List[str]:
+        """Inputs no stage produces (must already exist in the run dir)"""
+        return [i for i in self.stages[name].inputs if i not in self.producers]
+
+    def _topological_order(self) -> List[str]:
+        order, state = [], {}
+
+        def visit(name, path):
+            if state.get(name) == "done":
+                return
+            if state.get(name) == "visiting":
+                raise ValueError(f"Dependency cycle: {' -> '.join(path + [name])}")
+            state[name] = "visiting"
+            for dep in self.dependencies[name]:
+                visit(dep, path + [name])
+            state[name] = "done"
+            order.append(name)
+
+        # Declaration order breaks ties so the report reads naturally
+        for name in self.stages:
+            visit(name, [])
+        return order
+
+
+class Scheduler:
+    """
+    Run a StageGraph for one run ID within CPU and memory budgets.
+
+    Stages run in threads: they are expected to spend their time in
+    external models or I/O. A request larger than the whole budget is
+    clamped so the stage still runs (alone).
+    """
+
+    def __init__(self, graph: StageGraph, max_cpus: int = None, max_memory_mb: int = None, cache=None):
+        self.graph = graph
+        self.max_cpus = max(1, max_cpus or Config.MAX_CPUS)
+        self.max_memory_mb = max(1, max_memory_mb or Config.MAX_MEMORY_MB)
+        self.cache = cache
+
+    def run(self, run_id: str, log: Callable[[str], None] = print,
+            on_event: Optional[Callable[..., None]] = None, resume: bool = False) -> Dict[str, Dict]:
+        """
+        Execute every stage, returning per-stage records:
+        status, start_time, end_time, duration_seconds, output_dir, ...
+
+        on_event(event_type, **data) is called with stage_started and
+        stage_finished progress events (e.g. RunEventLog.emit).
+
+        With resume, stages whose checkpoint verifies (and whose
+        dependencies were all resumed) are not executed again; their
+        records carry resumed=True and the timings of the original run.
+
+        Raises:
+            StageError: First stage failure (running stages are allowed to
+                finish; stages depending on the failed one are skipped)
+        """
+        run_dir = Config.get_run_dir(run_id)
+        records = {name: self._record(name) for name in self.graph.order}
+        pending = list(self.graph.order)
+        running = {}
+        completed = set()
+        free_cpus, free_memory = self.max_cpus, self.max_memory_mb
+        failure = None
+        emit = on_event or (lambda event_type, **data: None)
+
+        if resume:
+            # Topological order: a stage is only reused after its dependencies
+            for name in self.graph.order:
+                if not set(self.graph.dependencies[name]) <= completed:
+                    continue
+                marker, reason = verify_marker(self.graph.stages[name], run_dir, self._file_hash)
+                if marker is None:
+                    log(f"[{name}] not resumed: {reason}")
+                    continue
+                pending.remove(name)
+                completed.add(name)
+                records[name].update(
+                    status="completed",
+                    resumed=True,
+                    end_time=marker["completed_at"],
+                    duration_seconds=marker["duration_seconds"],
+                    output_dir=marker["output_dir"],
+                    bytes_written=sum(output["size"] for output in marker["outputs"].values())
+                )
+                log(f"[{name}] resumed from checkpoint ({marker['completed_at']})")
+                emit("stage_finished", stage=name, status="completed", resumed=True,
+                     duration_seconds=marker["duration_seconds"], bytes_written=records[name]["bytes_written"])
+
+        with ThreadPoolExecutor(max_workers=len(pending) or 1, thread_name_prefix="stage") as pool:
+            while pending or running:
+                if failure is None:
+                    for name in list(pending):
+                        if not set(self.graph.dependencies[name]) <= completed:
+                            continue
+                        cpus, memory = self._demand(name)
+                        if cpus > free_cpus or memory > free_memory:
+                            continue
+                        missing = [p for p in self.graph.external_inputs(name) if not (run_dir / p).exists()]
+                        if missing:
+                            failure = (name, FileNotFoundError(f"Missing inputs: {', '.join(missing)}"))
+                            records[name]["status"] = "failed"
+                            records[name]["error"] = str(failure[1])
+                            pending.remove(name)
+                            emit("stage_finished", stage=name, status="failed", error=records[name]["error"])
+                            break
+                        pending.remove(name)
+                        free_cpus -= cpus
+                        free_memory -= memory
+                        records[name]["status"] = "running"
+                        records[name]["start_time"] = datetime.now().isoformat()
+                        log(f"[{name}] started ({cpus} CPU, {memory} MB)")
+                        emit("stage_started", stage=name, cpus=cpus, memory_mb=memory)
+                        running[pool.submit(self._execute, name, run_id)] = (name, time.perf_counter())
+
+                if not running:
+                    break
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name, started = running.pop(future)
+                    cpus, memory = self._demand(name)
+                    free_cpus += cpus
+                    free_memory += memory
+
+                    record = records[name]
+                    record["end_time"] = datetime.now().isoformat()
+                    record["duration_seconds"] = round(time.perf_counter() - started, 3)
+                    try:
+                        record.update(future.result())
+                        record["status"] = "completed"
+                        completed.add(name)
+                        cached = " (cache hit)" if record["cache"] == "hit" else ""
+                        log(f"[{name}] completed in {record['duration_seconds']}s{cached}")
+                    except Exception as e:
+                        record["status"] = "failed"
+                        record["error"] = str(e)
+                        log(f"[{name}] failed: {e}")
+                        if failure is None:
+                            failure = (name, e)
+                    emit(
+                        "stage_finished", stage=name, status=record["status"],
+                        duration_seconds=record["duration_seconds"], cache=record["cache"],
+                        bytes_written=record["bytes_written"], process_peak_rss_mb=record["process_peak_rss_mb"],
+                        error=record.get("error")
+                    )
+
+        for name in pending:
+            records[name]["status"] = "skipped"
+            emit("stage_finished", stage=name, status="skipped")
+
+        if failure is not None:
+            raise StageError(failure[0], failure[1], records)
+        return records
+
+    def _execute(self, name: str, run_id: str) -> Dict:
+        """Run (or restore) one stage, returning its record updates"""
+        stage = self.graph.stages[name]
+        run_dir = Config.get_run_dir(run_id)
+        started = time.perf_counter()
+        # Until it completes again, the stage must not look resumable
+        clear_marker(run_dir, name)
+        key = None
+        if self.cache is not None and stage.cacheable and stage.outputs:
+            key = self.cache.key_for(stage, run_dir)
+            if self.cache.restore(key, run_dir):
+                result = self._result(stage, run_dir, str((run_dir / stage.outputs[0]).parent), "hit", key)
+                return self._checkpoint(stage, run_dir, result, started)
+
+        # Outputs may be hard links into the cache (or another run): unlink
+        # them so the stage writes new files instead of through the links
+        for path in stage.outputs:
+            if os.path.lexists(run_dir / path):
+                os.remove(run_dir / path)
+
+        output_dir = stage.func(run_id)
+        missing = [p for p in stage.outputs if not (run_dir / p).exists()]
+        if missing:
+            raise FileNotFoundError(f"Declared outputs not written: {', '.join(missing)}")
+        if key is None:
+            return self._checkpoint(stage, run_dir, self._result(stage, run_dir, output_dir, "off", None), started)
+        self.cache.store(key, stage, run_id, run_dir)
+        return self._checkpoint(stage, run_dir, self._result(stage, run_dir, output_dir, "miss", key), started)
+
+    def _checkpoint(self, stage: Stage, run_dir, result: Dict, started: float) -> Dict:
+        """Write the stage's completion marker, then hand back its result"""
+        write_marker(stage, run_dir, {
+            "end_time": datetime.now().isoformat(),
+            "duration_seconds": round(time.perf_counter() - started, 3),
+            "output_dir": result["output_dir"]
+        }, self._file_hash)
+        return result
+
+    def _file_hash(self, path):
+        # The stage cache memoizes hashes by inode/size/mtime; reuse it when present
+        return self.cache.file_hash(path) if self.cache is not None else file_sha256(path)
+
+    @staticmethod
+    def _result(stage: Stage, run_dir, output_dir: str, cache: str, key: Optional[str]) -> Dict:
+        return {
+            "output_dir": output_dir,
+            "cache": cache,
+            "cache_key": key,
+            # Size of the declared outputs (linked from the cache on a hit)
+            "bytes_written": sum((run_dir / path).stat().st_size for path in stage.outputs),
+            # Lifetime process peak: stages share the process, so this is an upper bound
+            "process_peak_rss_mb": process_peak_rss_mb()
+        }
+
+    def _demand(self, name: str):
+        stage = self.graph.stages[name]
+        return min(stage.cpus, self.max_cpus), min(stage.memory_mb, self.max_memory_mb)
+
+    def _record(self, name: str) -> Dict:
+        stage = self.graph.stages[name]
+        return {
+            "status": "pending",
+            "description": stage.description,
+            "depends_on": self.graph.dependencies[name],
+            "inputs": stage.inputs,
+            "outputs": stage.outputs,
+            "cpus": stage.cpus,
+            "memory_mb": stage.memory_mb,
+            "start_time": None,
+            "end_time": None,
+            "duration_seconds": None,
+            "output_dir": None,
+            "cache": None,
+            "cache_key": None,
+            "bytes_written": None,
+            "process_peak_rss_mb": None,
+            "resumed": False
+        }
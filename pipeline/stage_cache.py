@@ -0,0 +1,183 @@
+"""
+Content-Addressed Stage Cache
+Skips stages whose inputs, parameters and code match an earlier run
+
+A stage's cache key is a SHA-256 over its name, the source of the module
+implementing it, its parameters (e.g. location and grid) and the contents of
+every declared input file. Completed outputs are stored under
+data_store/cache/<key[:2]>/<key>/ and a later run with the same key gets them
+hard-linked into its run directory instead of executing the stage.
+"""
+import hashlib
+import inspect
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+HASH_CHUNK_SIZE = 1024 * 1024
+MANIFEST = "manifest.json"
+
+
+def link_or_copy(source, target):
+    """Hard-link source to target (copy across filesystems), replacing target"""
+    target = Path(target)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    if os.path.lexists(target):
+        os.remove(target)
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target)
+
+
+def file_sha256(path) -> Optional[str]:
+    """SHA-256 of a file's content (None when missing)"""
+    try:
+        with open(path, 'rb') as f:
+            sha = hashlib.sha256()
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+                sha.update(chunk)
+            return sha.hexdigest()
+    except FileNotFoundError:
+        return None
+
+
+class StageCache:
+    """Content-addressed store of stage outputs"""
+
+    def __init__(self, cache_dir: Path):
+        self.cache_dir = Path(cache_dir)
+        self._lock = threading.Lock()
+        # (path, inode, size, mtime_ns) -> sha256, so an output hashed when
+        # stored is not re-read when the next stage uses it as an input
+        self._file_hashes: Dict[tuple, str] = {}
+        self._code_hashes: Dict[str, str] = {}
+
+    def key_for(self, stage, run_dir: Path) -> str:
+        """Cache key of a stage for the inputs currently in run_dir"""
+        material = {
+            "stage": stage.name,
+            "code": self._code_hash(stage.func),
+            "params": stage.params() if stage.params else {},
+            "inputs": {path: self.file_hash(run_dir / path) for path in sorted(stage.inputs)},
+            "outputs": sorted(stage.outputs)
+        }
+        encoded = json.dumps(material, sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    def restore(self, key: str, run_dir: Path) -> bool:
+        """Link a cached entry's outputs into run_dir; False on a miss"""
+        entry = self._entry_dir(key)
+        try:
+            with open(entry / MANIFEST, 'r') as f:
+                outputs = json.load(f)["outputs"]
+        except (OSError, ValueError, KeyError):
+            return False
+        if not all((entry / "files" / path).is_file() for path in outputs):
+            return False
+        for path in outputs:
+            link_or_copy(entry / "files" / path, run_dir / path)
+        # The manifest's mtime records the last use, for prune()
+        try:
+            os.utime(entry / MANIFEST)
+        except OSError:
+            pass
+        return True
+
+    def store(self, key: str, stage, run_id: str, run_dir: Path):
+        """Add a completed stage's declared outputs to the cache"""
+        entry = self._entry_dir(key)
+        if (entry / MANIFEST).exists():
+            return
+        staging = self.cache_dir / f".tmp-{uuid.uuid4().hex}"
+        try:
+            for path in stage.outputs:
+                link_or_copy(run_dir / path, staging / "files" / path)
+            with open(staging / MANIFEST, 'w') as f:
+                json.dump({
+                    "stage": stage.name,
+                    "key": key,
+                    "run_id": run_id,
+                    "created": datetime.now().isoformat(),
+                    "outputs": stage.outputs,
+                    "hashes": {path: self.file_hash(run_dir / path) for path in stage.outputs}
+                }, f, indent=2)
+            entry.parent.mkdir(parents=True, exist_ok=True)
+            # Atomic publish: concurrent runs storing the same key keep one entry
+            os.rename(staging, entry)
+        except OSError:
+            pass
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+    def prune(self, max_age_days: float, dry_run: bool = False) -> Dict[str, int]:
+        """
+        Delete entries not stored or restored for max_age_days, plus
+        staging directories left behind by interrupted stores
+
+        Returns:
+            dict: entries removed and bytes freed (files still linked into
+            a run directory free nothing until that run goes too)
+        """
+        cutoff = time.time() - max_age_days * 86400
+        removed, freed = 0, 0
+        if not self.cache_dir.exists():
+            return {"entries": 0, "bytes": 0}
+        for shard in self.cache_dir.iterdir():
+            if shard.name.startswith(".tmp-"):
+                if shard.stat().st_mtime < cutoff and not dry_run:
+                    shutil.rmtree(shard, ignore_errors=True)
+                continue
+            if not shard.is_dir():
+                continue
+            for entry in shard.iterdir():
+                try:
+                    last_used = (entry / MANIFEST).stat().st_mtime
+                except OSError:
+                    last_used = entry.stat().st_mtime
+                if last_used >= cutoff:
+                    continue
+                removed += 1
+                for root, _, names in os.walk(entry):
+                    for name in names:
+                        stat = os.stat(os.path.join(root, name))
+                        if stat.st_nlink == 1:
+                            freed += stat.st_size
+                if not dry_run:
+                    shutil.rmtree(entry, ignore_errors=True)
+        return {"entries": removed, "bytes": freed}
+
+    def file_hash(self, path: Path) -> Optional[str]:
+        """SHA-256 of a file's content (None when missing)"""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        memo_key = (str(path), stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            digest = self._file_hashes.get(memo_key)
+        if digest is None:
+            digest = file_sha256(path)
+            if digest is None:
+                return None
+            with self._lock:
+                self._file_hashes[memo_key] = digest
+        return digest
+
+    def _code_hash(self, func) -> str:
+        # Lazily loaded stages (orchestrator.StageFunction) name their file
+        source = getattr(func, "source_file", None) or inspect.getsourcefile(func) or func.__qualname__
+        digest = self._code_hashes.get(source)
+        if digest is None:
+            digest = self.file_hash(Path(source)) or hashlib.sha256(source.encode()).hexdigest()
+            self._code_hashes[source] = digest
+        return digest
+
+    def _entry_dir(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / key